@@ -0,0 +1,68 @@
+"""
+Compares serial and concurrent entity creation in IngestSubmitter.add_entities against a local fake ingest server.
+The session is the default one of IngestApi, cached in an SQLite file, unless another backend is given.
+
+    python -m benchmarks.bench_add_entities --entities 500 --latency 0.02 --workers 1 8 16
+    python -m benchmarks.bench_add_entities --entities 500 --latency 0.02 --workers 1 8 16 --backend memory
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from hca_ingest.api.ingestapi import IngestApi
+from hca_ingest.api.requests_utils import create_session_with_retry
+from hca_ingest.importer.submission.entity import Entity
+from hca_ingest.importer.submission.entity_map import EntityMap
+from hca_ingest.importer.submission.ingest_submitter import IngestSubmitter
+from benchmarks.fake_ingest_server import FakeIngestServer
+
+
+def create_entity_map(entity_count):
+    entities = []
+    for index in range(entity_count):
+        if index % 2:
+            content = {'file_core': {'file_name': f'file_{index}.fastq.gz'}}
+            entities.append(Entity('file', f'file_{index}', content))
+        else:
+            content = {'biomaterial_core': {'biomaterial_id': f'biomaterial_{index}'}}
+            entities.append(Entity('biomaterial', f'biomaterial_{index}', content))
+    return EntityMap(*entities)
+
+
+def run(server, entity_count, max_workers, backend, cache_dir):
+    cache_name = os.path.join(cache_dir, f'http_cache_{max_workers}')
+    session = create_session_with_retry(pool_maxsize=max(max_workers, 1), cache_name=cache_name, backend=backend)
+    ingest_api = IngestApi(url=server.url, session=session)
+    submission_url = ingest_api.create_submission()['_links']['self']['href']
+    entity_map = create_entity_map(entity_count)
+
+    submitter = IngestSubmitter(ingest_api, max_workers=max_workers)
+    start = time.perf_counter()
+    submission = submitter.add_entities(entity_map, submission_url)
+    elapsed = time.perf_counter() - start
+
+    assert not submission.errors, submission.errors
+    assert len(submission.metadata_dict) == entity_count
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entities', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.02, help='simulated server latency in seconds')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 16])
+    parser.add_argument('--backend', default='sqlite', help='the requests_cache backend of the session')
+    args = parser.parse_args()
+
+    with FakeIngestServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as cache_dir:
+        baseline = None
+        for max_workers in args.workers:
+            elapsed = run(server, args.entities, max_workers, args.backend, cache_dir)
+            baseline = baseline or elapsed
+            print(f'max_workers={max_workers:3d}: {args.entities} entities in {elapsed:6.2f}s '
+                  f'({args.entities / elapsed:7.1f} entities/s, x{baseline / elapsed:.1f})')
+
+
+if __name__ == '__main__':
+    main()
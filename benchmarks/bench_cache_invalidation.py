@@ -0,0 +1,60 @@
+"""
+Compares the HTTP cache hit rate of IngestApi when every write clears the whole cache with the targeted eviction of
+the responses related to the written url.
+
+Each step of the workload reads the API root, the submission and a project, like the importer does when it creates
+and links entities, then creates a biomaterial in the submission and links it to the project. The session is the
+default one of IngestApi, cached in an SQLite file, unless another backend is given.
+
+    python -m benchmarks.bench_cache_invalidation --entities 200 --latency 0.02
+    python -m benchmarks.bench_cache_invalidation --entities 200 --latency 0.02 --backend memory
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from hca_ingest.api.ingestapi import IngestApi
+from hca_ingest.api.requests_utils import create_session_with_retry
+from benchmarks.fake_ingest_server import FakeIngestServer
+
+
+class ClearingIngestApi(IngestApi):
+    def _evict_related_responses(self, url, **kwargs):
+        self.session.cache.clear()
+        self.cache_stats.increment('clears')
+
+
+def run(server, ingest_api_class, entity_count, backend, cache_dir):
+    cache_name = os.path.join(cache_dir, ingest_api_class.__name__)
+    ingest_api = ingest_api_class(url=server.url, session=create_session_with_retry(cache_name=cache_name,
+                                                                                    backend=backend))
+    submission_url = ingest_api.create_submission()['_links']['self']['href']
+    project = ingest_api.post(f'{submission_url}/projects', json={}).json()
+    project_url = project['_links']['self']['href']
+
+    start = time.perf_counter()
+    for index in range(entity_count):
+        ingest_api.get(server.url)
+        ingest_api.get(submission_url)
+        ingest_api.get(project_url)
+        biomaterial = ingest_api.post(f'{submission_url}/biomaterials', json={'index': index}).json()
+        ingest_api.link_entity(biomaterial, project, 'projects', is_collection=True)
+    return time.perf_counter() - start, ingest_api.cache_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entities', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.02, help='simulated server latency in seconds')
+    parser.add_argument('--backend', default='sqlite', help='the requests_cache backend of the session')
+    args = parser.parse_args()
+
+    with FakeIngestServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as cache_dir:
+        for name, ingest_api_class in [('clear all', ClearingIngestApi), ('targeted', IngestApi)]:
+            elapsed, stats = run(server, ingest_api_class, args.entities, args.backend, cache_dir)
+            print(f'{name:>9}: {elapsed:6.2f}s {stats}')
+
+
+if __name__ == '__main__':
+    main()
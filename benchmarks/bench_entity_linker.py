@@ -0,0 +1,44 @@
+"""
+Measures EntityLinker.convert_spreadsheet_links_to_ingest_links on generated entity maps of growing size, the time per
+entity should stay the same as the map grows.
+
+    python -m benchmarks.bench_entity_linker --entities 10000 100000
+"""
+import argparse
+import time
+
+from benchmarks.bench_entity_memory import create_spreadsheet_json
+from hca_ingest.importer.submission.entity_linker import EntityLinker
+from hca_ingest.importer.submission.entity_map import EntityMap
+
+
+class _TemplateManager:
+    @staticmethod
+    def get_schema_url(concrete_type):
+        return f'https://schema.humancellatlas.org/type/{concrete_type}/9.2.0/{concrete_type}'
+
+
+def run(spreadsheet_json):
+    entity_map = EntityMap.load(spreadsheet_json)
+    linker = EntityLinker(_TemplateManager(), entity_map)
+    start = time.perf_counter()
+    linker.convert_spreadsheet_links_to_ingest_links()
+    return entity_map, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entities', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for entity_count in args.entities:
+        spreadsheet_json = create_spreadsheet_json(entity_count)
+        results = [run(spreadsheet_json) for _ in range(args.repeat)]
+        entity_map, elapsed = min(results, key=lambda result: result[1])
+        print(f'{entity_count:7d} entities: {elapsed:6.2f}s, {elapsed / entity_count * 1e6:5.1f}us per entity, '
+              f'{entity_map.count_total()} entities and {entity_map.count_links()} links after linking')
+
+
+if __name__ == '__main__':
+    main()
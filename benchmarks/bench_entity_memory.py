@@ -0,0 +1,68 @@
+"""
+Reports the memory held per Entity of an EntityMap loaded from a generated spreadsheet json, once loaded and once its
+entities have been linked, and per IngestRow of a worksheet.
+
+    python -m benchmarks.bench_entity_memory --entities 100000
+"""
+import argparse
+import gc
+import tracemalloc
+from unittest.mock import MagicMock
+
+from hca_ingest.importer.spreadsheet.ingest_worksheet import IngestRow
+from hca_ingest.importer.submission.entity_linker import EntityLinker
+from hca_ingest.importer.submission.entity_map import EntityMap
+
+ROW_VALUES = ('donor_1', 'Donor one', 9606, 'Homo sapiens', 'NCBITaxon:9606', 'no', '45', 'year', 1.75, None)
+
+
+def create_spreadsheet_json(entity_count):
+    # a donor per sample, the sample derived from its donor and a file per sample, the shape of most submissions
+    group_count = entity_count // 3
+    biomaterials, files = {}, {}
+    for group in range(group_count):
+        biomaterials[f'donor_{group}'] = {'content': {'biomaterial_core': {'biomaterial_id': f'donor_{group}'}}}
+        biomaterials[f'sample_{group}'] = {'content': {'biomaterial_core': {'biomaterial_id': f'sample_{group}'}},
+                                           'links_by_entity': {'biomaterial': [f'donor_{group}']}}
+        files[f'file_{group}'] = {'content': {'file_core': {'file_name': f'file_{group}.fastq.gz'}},
+                                  'links_by_entity': {'biomaterial': [f'sample_{group}']}}
+    return {
+        'project': {'project_1': {'content': {'project_core': {'project_short_name': 'project'}}}},
+        'biomaterial': biomaterials,
+        'file': files
+    }
+
+
+def measure(create):
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    created = create()
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return created, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entities', type=int, default=100000)
+    args = parser.parse_args()
+
+    spreadsheet_json = create_spreadsheet_json(args.entities)
+    entity_map, loaded = measure(lambda: EntityMap.load(spreadsheet_json))
+    entity_count = entity_map.count_total()
+    print(f'{entity_count} entities loaded: {loaded / entity_count:.0f} bytes per entity')
+
+    linker = EntityLinker(MagicMock(), entity_map)
+    _, linked = measure(linker.convert_spreadsheet_links_to_ingest_links)
+    linked_count = entity_map.count_total()
+    print(f'{linked_count} entities linked: {(loaded + linked) / linked_count:.0f} bytes per entity, '
+          f'{entity_map.count_links()} links')
+
+    rows, allocated = measure(lambda: [IngestRow('Donor organism', index, ROW_VALUES) for index in range(args.entities)])
+    print(f'{len(rows)} rows: {allocated / len(rows):.0f} bytes per IngestRow')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Compares sequential and concurrent paging through a submission's files with IngestApi.get_all.
+
+    python -m benchmarks.bench_get_all --files 5000 --page-size 20 --latency 0.02 --pages-in-flight 1 4 8
+"""
+import argparse
+import time
+
+from hca_ingest.api.ingestapi import IngestApi
+from hca_ingest.api.requests_utils import create_session_with_retry
+from benchmarks.fake_ingest_server import FakeIngestServer
+
+
+def run(server, submission_url, file_count, page_size, pages_in_flight):
+    session = create_session_with_retry(pool_maxsize=max(pages_in_flight, 1), backend='memory')
+    ingest_api = IngestApi(url=server.url, session=session)
+    ingest_api.set_page_size(page_size)
+    ingest_api.set_pages_in_flight(pages_in_flight)
+
+    start = time.perf_counter()
+    files = list(ingest_api.get_all(f'{submission_url}/files', 'files'))
+    elapsed = time.perf_counter() - start
+
+    assert len(files) == file_count
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.02, help='simulated server latency in seconds')
+    parser.add_argument('--pages-in-flight', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    with FakeIngestServer(latency=0) as server:
+        submission_id = server.create_submission()
+        for index in range(args.files):
+            server.create_entity('files', submission_id, {'fileName': f'file_{index}.fastq.gz'})
+        server.latency = args.latency
+
+        baseline = None
+        for pages_in_flight in args.pages_in_flight:
+            elapsed = run(server, f'{server.url}/submissionEnvelopes/{submission_id}', args.files, args.page_size,
+                          pages_in_flight)
+            baseline = baseline or elapsed
+            print(f'pages_in_flight={pages_in_flight:3d}: {args.files} files in {elapsed:6.2f}s '
+                  f'(x{baseline / elapsed:.1f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures the cost per row of RowTemplate.do_import, the conversion of a spreadsheet row into a MetadataEntity, for a
+sheet mixing the kinds of columns found in a contributor spreadsheet.
+
+    python -m benchmarks.bench_row_template --rows 20000 --repeat 3
+"""
+import argparse
+import time
+
+from hca_ingest.importer.conversion import data_converter
+from hca_ingest.importer.conversion.conversion_strategy import DirectCellConversion, ListElementCellConversion, \
+    FieldOfSingleElementListCellConversion, IdentityCellConversion, LinkedIdentityCellConversion, \
+    LinkingDetailCellConversion, DO_NOTHING
+from hca_ingest.importer.conversion.data_converter import ListConverter, DataType
+from hca_ingest.importer.conversion.template_manager import RowTemplate
+from hca_ingest.importer.spreadsheet.ingest_worksheet import IngestRow
+
+STRING = data_converter.CONVERTER_MAP[DataType.STRING]
+NUMBER = data_converter.CONVERTER_MAP[DataType.NUMBER]
+BOOLEAN = data_converter.CONVERTER_MAP[DataType.BOOLEAN]
+
+CELL_CONVERSIONS = [
+    IdentityCellConversion('donor_organism.biomaterial_core.biomaterial_id', STRING),
+    DirectCellConversion('donor_organism.biomaterial_core.biomaterial_name', STRING),
+    DirectCellConversion('donor_organism.biomaterial_core.biomaterial_description', STRING),
+    DirectCellConversion('donor_organism.biomaterial_core.ncbi_taxon_id', ListConverter(DataType.INTEGER)),
+    DirectCellConversion('donor_organism.genus_species.text', STRING),
+    DirectCellConversion('donor_organism.genus_species.ontology', STRING),
+    DirectCellConversion('donor_organism.genus_species.ontology_label', STRING),
+    DirectCellConversion('donor_organism.is_living', BOOLEAN),
+    DirectCellConversion('donor_organism.organism_age', STRING),
+    DirectCellConversion('donor_organism.organism_age_unit.text', STRING),
+    DirectCellConversion('donor_organism.height', NUMBER),
+    FieldOfSingleElementListCellConversion('donor_organism.human_specific.ethnicity.text', STRING),
+    FieldOfSingleElementListCellConversion('donor_organism.human_specific.ethnicity.ontology', STRING),
+    ListElementCellConversion('donor_organism.diseases.text', STRING),
+    ListElementCellConversion('donor_organism.diseases.ontology', STRING),
+    LinkedIdentityCellConversion('project.project_core.project_short_name', 'project'),
+    LinkingDetailCellConversion('process.process_core.process_id', STRING),
+    DO_NOTHING,
+    DO_NOTHING,
+    DO_NOTHING,
+]
+
+ROW_VALUES = ('donor_1', 'Donor one', 'A donor', 9606, 'Homo sapiens', 'NCBITaxon:9606', 'Homo sapiens', 'no',
+              '45', 'year', 1.75, 'European', 'HANCESTRO:0005', 'normal||type 2 diabetes', 'PATO:0000461||MONDO:0005148',
+              'project_1', 'process_1', None, None, None)
+
+
+def run(row_count):
+    row_template = RowTemplate('biomaterial', 'donor_organism', CELL_CONVERSIONS,
+                               default_values={'describedBy': 'https://schema.humancellatlas.org/donor_organism',
+                                               'schema_type': 'biomaterial'})
+    rows = [IngestRow('Donor organism', index, ROW_VALUES) for index in range(row_count)]
+    start = time.perf_counter()
+    for row in rows:
+        metadata, errors = row_template.do_import(row)
+        assert not errors
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    elapsed = min(run(args.rows) for _ in range(args.repeat))
+    print(f'{args.rows} rows of {len(CELL_CONVERSIONS)} columns in {elapsed:.2f}s, '
+          f'{elapsed / args.rows * 1e6:.1f}us per row')
+
+
+if __name__ == '__main__':
+    main()
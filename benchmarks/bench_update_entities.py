@@ -0,0 +1,74 @@
+"""
+Measures IngestSubmitter.update_entities for an update spreadsheet referencing existing biomaterials of which only a
+few have changed, against a local fake ingest server.
+
+    python -m benchmarks.bench_update_entities --entities 2000 --changed 100 --latency 0.005 --workers 1 16
+"""
+import argparse
+import time
+
+from hca_ingest.api.ingestapi import IngestApi
+from hca_ingest.api.requests_utils import create_session_with_retry
+from hca_ingest.importer.submission.entity import Entity
+from hca_ingest.importer.submission.entity_map import EntityMap
+from hca_ingest.importer.submission.ingest_submitter import IngestSubmitter
+from benchmarks.fake_ingest_server import FakeIngestServer
+
+
+def create_biomaterials(server, entity_count):
+    submission_id = server.create_submission()
+    uuids = []
+    for index in range(entity_count):
+        content = {
+            'biomaterial_core': {'biomaterial_id': f'biomaterial_{index}', 'ncbi_taxon_id': [9606]},
+            'genus_species': [{'text': 'Homo sapiens', 'ontology': 'NCBITaxon:9606'}],
+            'organism_age': '45'
+        }
+        uuids.append(server.create_entity('biomaterials', submission_id, {'content': content})['uuid']['uuid'])
+    return uuids
+
+
+def create_entity_map(uuids, changed_count, age):
+    entities = []
+    for index, uuid in enumerate(uuids):
+        content = {
+            'biomaterial_core': {'biomaterial_id': f'biomaterial_{index}', 'ncbi_taxon_id': [9606]},
+            'organism_age': age if index < changed_count else '45'
+        }
+        entities.append(Entity('biomaterial', uuid, content, is_reference=True))
+    return EntityMap(*entities)
+
+
+def run(server, uuids, changed_count, max_workers, age):
+    session = create_session_with_retry(pool_maxsize=max(max_workers, 1), backend='memory')
+    ingest_api = IngestApi(url=server.url, session=session)
+    entity_map = create_entity_map(uuids, changed_count, age)
+
+    submitter = IngestSubmitter(ingest_api, max_workers=max_workers)
+    request_count = server.request_count
+    start = time.perf_counter()
+    submitter.update_entities(entity_map)
+    return time.perf_counter() - start, server.request_count - request_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entities', type=int, default=2000)
+    parser.add_argument('--changed', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.005, help='simulated server latency in seconds')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 16])
+    args = parser.parse_args()
+
+    with FakeIngestServer(latency=args.latency) as server:
+        uuids = create_biomaterials(server, args.entities)
+        baseline = None
+        for run_number, max_workers in enumerate(args.workers):
+            # a new age on every run so that each run has the same number of changed entities
+            elapsed, request_count = run(server, uuids, args.changed, max_workers, str(50 + run_number))
+            baseline = baseline or elapsed
+            print(f'max_workers={max_workers:3d}: {args.entities} entities, {args.changed} changed, in {elapsed:6.2f}s '
+                  f'with {request_count} requests (x{baseline / elapsed:.1f})')
+
+
+if __name__ == '__main__':
+    main()
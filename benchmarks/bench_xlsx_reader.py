@@ -0,0 +1,57 @@
+"""
+Compares the openpyxl and xlsx_stream workbook readers reading every data row of generated workbooks.
+
+    python -m benchmarks.bench_xlsx_reader --rows 10000 50000 --columns 20
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from openpyxl import Workbook
+
+from hca_ingest.importer.spreadsheet.ingest_workbook import IngestWorkbook, OPENPYXL_READER, XLSX_STREAM_READER
+from hca_ingest.importer.spreadsheet.ingest_worksheet import HEADER_ROW_IDX, START_DATA_ROW
+
+
+def create_workbook(file_path, row_count, column_count):
+    # not write_only, which leaves out the dimension element that spreadsheet applications write
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = 'Donor organism'
+    headers = [f'donor_organism.field_{column}' for column in range(column_count)]
+    for row_idx in range(1, START_DATA_ROW):
+        worksheet.append(headers if row_idx == HEADER_ROW_IDX else [])
+    for row_idx in range(row_count):
+        worksheet.append([f'value {row_idx}' if column % 2 else row_idx * column for column in range(column_count)])
+    workbook.save(file_path)
+
+
+def run(file_path, reader):
+    start = time.perf_counter()
+    workbook = IngestWorkbook.from_file(file_path, reader=reader)
+    row_count = sum(1 for worksheet in workbook.importable_worksheets() for _ in worksheet.get_data_rows())
+    return row_count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--columns', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for row_count in args.rows:
+            file_path = os.path.join(temp_dir, f'workbook_{row_count}.xlsx')
+            create_workbook(file_path, row_count, args.columns)
+            baseline = None
+            for reader in [OPENPYXL_READER, XLSX_STREAM_READER]:
+                rows_read, elapsed = run(file_path, reader)
+                assert rows_read == row_count
+                baseline = baseline or elapsed
+                print(f'{row_count:6d} rows x {args.columns} columns, {reader:11s}: {elapsed:6.2f}s '
+                      f'(x{baseline / elapsed:.1f})')
+
+
+if __name__ == '__main__':
+    main()
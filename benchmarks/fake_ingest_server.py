@@ -0,0 +1,205 @@
+"""
+A small in-memory stand-in for Ingest Core used by the benchmarks in this directory.
+
+It understands just enough of the HAL API used by hca_ingest.api.ingestapi.IngestApi to create a submission, add
+entities and files to it, find entities by uuid, link entities and page through the contents of the submission. Every
+request is delayed by a configurable latency to simulate the round trip to a real server.
+"""
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ENTITY_TYPES = ['biomaterials', 'processes', 'protocols', 'files', 'projects']
+ENTITY_PATTERN = re.compile(r'^/(?P<entity_type>\w+)/(?P<entity_id>[\w-]+)$')
+RELATION_PATTERN = re.compile(r'^/(?P<entity_type>\w+)/(?P<entity_id>[\w-]+)/(?P<relation>\w+)$')
+
+
+class FakeIngestServer:
+    def __init__(self, latency=0.02, port=0):
+        self.latency = latency
+        self.entities = {}
+        self.links = {}
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def count_links(self):
+        return sum(len(targets) for targets in self.links.values())
+
+    def create_submission(self):
+        return str(uuid.uuid4())
+
+    def create_entity(self, entity_type, submission_id, data):
+        return self._create(entity_type, submission_id, data)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # the headers and the body are written separately, with Nagle's algorithm every response on a kept alive
+            # connection would wait for the delayed ACK of the client
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server._delay()
+                parsed = urlparse(self.path)
+                self._respond(server._get(parsed.path, parse_qs(parsed.query)))
+
+            def do_POST(self):
+                server._delay()
+                self._respond(server._write('POST', urlparse(self.path).path, self._read_body(), self.headers))
+
+            def do_PUT(self):
+                server._delay()
+                self._respond(server._write('PUT', urlparse(self.path).path, self._read_body(), self.headers))
+
+            def do_PATCH(self):
+                server._delay()
+                self._respond(server._write('PATCH', urlparse(self.path).path, self._read_body(), self.headers))
+
+            def do_DELETE(self):
+                server._delay()
+                self._respond((204, None))
+
+            def _read_body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return self.rfile.read(length).decode('utf-8') if length else ''
+
+            def _respond(self, result):
+                status, body = result
+                payload = json.dumps(body).encode('utf-8') if body is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/hal+json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def _delay(self):
+        with self._lock:
+            self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _link(self, path):
+        return {'href': f'{self.url}{path}'}
+
+    def _get(self, path, query):
+        if path in ('', '/'):
+            links = {name: self._link(f'/{name}') for name in ENTITY_TYPES + ['submissionEnvelopes', 'schemas']}
+            return 200, {'_links': links}
+
+        match = RELATION_PATTERN.match(path)
+        if match and match.group('entity_type') == 'submissionEnvelopes':
+            entity_type = match.group('relation')
+            contents = [entity for entity in self.entities.values()
+                        if entity['_type'] == entity_type and entity['_submission'] == match.group('entity_id')]
+            return 200, self._page(path, entity_type, contents, query)
+
+        if match and match.group('entity_id') == 'search' and match.group('relation') == 'findByUuid':
+            entity_path = f"/{match.group('entity_type')}/{query.get('uuid', [''])[0]}"
+            if entity_path in self.entities:
+                return 200, self._public(self.entities[entity_path])
+            return 404, {'message': f'{entity_path} not found'}
+
+        match = ENTITY_PATTERN.match(path)
+        if match and match.group('entity_type') == 'submissionEnvelopes':
+            return 200, self._submission(match.group('entity_id'))
+        if match and path in self.entities:
+            return 200, self._public(self.entities[path])
+        return 404, {'message': f'{path} not found'}
+
+    def _page(self, path, entity_type, contents, query):
+        size = int(query.get('size', ['20'])[0])
+        number = int(query.get('page', ['0'])[0])
+        total_pages = (len(contents) + size - 1) // size
+        page_contents = contents[number * size:(number + 1) * size]
+        links = {'self': self._link(f'{path}?page={number}&size={size}')}
+        if number + 1 < total_pages:
+            links['next'] = self._link(f'{path}?page={number + 1}&size={size}')
+        return {
+            '_embedded': {entity_type: [self._public(entity) for entity in page_contents]},
+            '_links': links,
+            'page': {'size': size, 'totalElements': len(contents), 'totalPages': total_pages, 'number': number}
+        }
+
+    def _submission(self, submission_id):
+        path = f'/submissionEnvelopes/{submission_id}'
+        links = {name: self._link(f'{path}/{name}') for name in ENTITY_TYPES + ['submissionManifest']}
+        links['self'] = self._link(path)
+        return {'uuid': {'uuid': submission_id}, '_links': links}
+
+    def _write(self, method, path, body, headers):
+        if method == 'POST' and path == '/submissionEnvelopes':
+            return 201, self._submission(self.create_submission())
+
+        match = RELATION_PATTERN.match(path)
+        if method == 'POST' and match and match.group('entity_type') == 'submissionEnvelopes':
+            return 201, self._create(match.group('relation'), match.group('entity_id'), json.loads(body or '{}'))
+
+        if match and headers.get('Content-type') == 'text/uri-list':
+            targets = [line.strip() for line in body.splitlines() if line.strip()]
+            with self._lock:
+                existing = self.links.setdefault(path, [])
+                if method == 'PUT':
+                    existing.clear()
+                existing.extend(targets)
+            return 204, None
+
+        if method == 'PATCH' and path in self.entities:
+            with self._lock:
+                self.entities[path].update(json.loads(body or '{}'))
+            return 200, self._public(self.entities[path])
+        return 404, {'message': f'{path} not found'}
+
+    def _create(self, entity_type, submission_id, data):
+        entity_id = str(uuid.uuid4())
+        path = f'/{entity_type}/{entity_id}'
+        relations = ['project', 'projects', 'inputToProcesses', 'derivedByProcesses', 'protocols',
+                     'supplementaryFiles', 'submissionEnvelopes']
+        entity = dict(data)
+        entity.update({
+            '_type': entity_type,
+            '_submission': submission_id,
+            'uuid': {'uuid': entity_id},
+            '_links': dict({'self': self._link(path)},
+                           **{relation: self._link(f'{path}/{relation}') for relation in relations})
+        })
+        with self._lock:
+            self.entities[path] = entity
+        return self._public(entity)
+
+    @staticmethod
+    def _public(entity):
+        return {key: value for key, value in entity.items() if not key.startswith('_') or key == '_links'}
@@ -0,0 +1,390 @@
+"""
+An asyncio client for the ingest API with the same surface as IngestApi, for services which already run an event loop
+and want to drive many submissions at once. It needs the optional aiohttp dependency:
+
+    pip install hca-ingest[async]
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import AsyncIterator, Callable
+
+import polling
+from urllib3.util import retry
+
+from hca_ingest.api.hal_stream import select_fields
+from hca_ingest.api.ingestapi import IngestApi
+from hca_ingest.api.requests_utils import create_retry_policy
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncIngestApi:
+    """
+    All requests share one pooled aiohttp session, limited to `limit` open connections in total and `limit_per_host`
+    per host, and are retried with the same policy as the sessions from create_session_with_retry.
+
+    Unlike IngestApi, requests return the decoded json body instead of the response, errors are raised as
+    aiohttp.ClientResponseError and responses are not cached. Use it as an async context manager, or call close(), so
+    that the pooled connections are released:
+
+        async with AsyncIngestApi(url) as ingest_api:
+            submission = await ingest_api.create_submission()
+    """
+
+    def __init__(self, url=None, token_manager=None, retry_policy: retry.Retry = None, limit=100,
+                 limit_per_host=20):
+        if aiohttp is None:
+            raise ImportError('AsyncIngestApi needs aiohttp, install it with: pip install hca-ingest[async]')
+
+        self.logger = logging.getLogger(__name__)
+        self.token_manager = token_manager
+        self.retry_policy = retry_policy or create_retry_policy()
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+
+        if not url and 'INGEST_API' in os.environ:
+            url = os.environ['INGEST_API']
+            # expand interpolated env vars
+            url = os.path.expandvars(url)
+        self.url = url if url else "http://localhost:8080"
+        self.headers = {'Content-type': 'application/json'}
+        self.token = None
+        self.session = None
+        self._ingest_links = None
+        self._submission_links = {}
+        self.page_size = 100
+        self.poll_step = 5
+        self.logger.info(f"using {self.url} for ingest API")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    def set_page_size(self, page_size):
+        self.page_size = page_size
+
+    def get_headers(self):
+        if self.token_manager:
+            self.set_token(f'Bearer {self.token_manager.get_token()}')
+        return self.headers
+
+    async def _get_headers(self):
+        # getting a token can mean a request to the token service, which must not block the event loop
+        if self.token_manager:
+            token = await asyncio.get_running_loop().run_in_executor(None, self.token_manager.get_token)
+            self.set_token(f'Bearer {token}')
+        return self.headers
+
+    def set_token(self, token):
+        self.token = token
+        self.headers['Authorization'] = self.token
+        return self.headers
+
+    def unset_token(self):
+        self.token = None
+        self.headers.pop('Authorization', None)
+        return self.headers
+
+    async def get(self, url, **kwargs):
+        return await self._request('GET', url, **kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await self._request('PATCH', url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self._request('PUT', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self._request('POST', url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self._request('DELETE', url, **kwargs)
+
+    async def poll(self, url, step=None, timeout=None, max_tries=None, check_success: Callable = polling.is_truthy):
+        """
+        Gets url every step seconds until check_success is true for its json, raising the same exceptions as
+        polling.poll when timeout or max_tries is reached first.
+        """
+        step = self.poll_step if step is None else step
+        start = time.monotonic()
+        values = []
+        while True:
+            value = await self.get(url)
+            if check_success(value):
+                return value
+            values.append(value)
+            if max_tries is not None and len(values) >= max_tries:
+                raise polling.MaxCallException(values, value)
+            if timeout is not None and time.monotonic() - start + step > timeout:
+                raise polling.TimeoutException(values, value)
+            await asyncio.sleep(step)
+
+    async def get_link_from_resource_url(self, resource_url, link_name, size=1):
+        resource = await self.get(resource_url, params={'size': size})
+        return self.get_link_from_resource(resource, link_name)
+
+    @staticmethod
+    def get_link_from_resource(resource, link_name):
+        return IngestApi.get_link_from_resource(resource, link_name)
+
+    async def get_latest_schema_url(self, high_level_entity, domain_entity, concrete_entity):
+        latest_schema = await self.get_schemas(
+            latest_only=True,
+            high_level_entity=high_level_entity,
+            domain_entity=domain_entity.split('/')[0],
+            concrete_entity=concrete_entity
+        )
+        return latest_schema[0]['_links']['json-schema']['href'] if latest_schema else None
+
+    async def get_schemas(self, latest_only=True, high_level_entity=None, domain_entity=None, concrete_entity=None):
+        schema_url = await self.get_resource_repository_url('schemas')
+        if latest_only:
+            search_url = await self.get_link_from_resource_url(schema_url, 'search')
+            search = await self.get(search_url)
+            all_schemas = [schema async for schema in self.get_related_entities('latestSchemas', search, 'schemas')]
+        else:
+            all_schemas = [schema async for schema in self.get_entities(schema_url, 'schemas')]
+
+        filters = {'highLevelEntity': high_level_entity, 'domainEntity': domain_entity,
+                   'concreteEntity': concrete_entity}
+        for key, value in filters.items():
+            if value:
+                all_schemas = [schema for schema in all_schemas if schema.get(key) == value]
+        return all_schemas
+
+    async def get_resource_repository_url(self, repository_name: str):
+        ingest_links = await self._get_ingest_links()
+        if repository_name in ingest_links:
+            return ingest_links[repository_name]['href'].rsplit('{')[0]
+        return None
+
+    async def get_entity_by_uuid(self, entity_type, uuid):
+        endpoint = 'findByUuidUuid' if entity_type == 'submissionEnvelopes' else 'findByUuid'
+        return await self.get(f'{self.url}/{entity_type}/search/{endpoint}', params={'uuid': uuid})
+
+    async def get_entity_by_callback_link(self, callback_link):
+        return await self.get(f'{self.url}{callback_link}')
+
+    async def get_project_by_uuid(self, uuid):
+        return await self.get_entity_by_uuid('projects', uuid)
+
+    async def get_file_by_submission_url_and_filename(self, submission_url, filename):
+        search_url = await self.get_link_from_resource_url(f'{self.url}/files/search',
+                                                           'findBySubmissionEnvelopeAndFileName')
+        search_url = search_url.replace('{?submissionEnvelope,fileName}', '')
+        params = {'submissionEnvelope': submission_url, 'fileName': filename}
+        result = await self.get(search_url, params=params)
+        return result.get('_embedded', {}).get('files', [])
+
+    async def get_submission(self, submission_url):
+        return await self.get(submission_url)
+
+    async def get_submission_by_uuid(self, submission_uuid):
+        return await self.get_entity_by_uuid('submissionEnvelopes', submission_uuid)
+
+    async def create_submission(self, update_submission=False):
+        create_submission_url = await self.get_resource_repository_url('submissionEnvelopes')
+        if update_submission:
+            create_submission_url = f'{create_submission_url}/updateSubmissions'
+
+        submission = await self.post(create_submission_url, json={})
+        submission_url = submission['_links']['self']['href'].rsplit('{')[0]
+        self._submission_links[submission_url] = submission['_links']
+        return submission
+
+    async def get_submission_links(self, submission_url):
+        if not self._submission_links.get(submission_url):
+            self._submission_links[submission_url] = (await self.get(submission_url))['_links']
+        return self._submission_links.get(submission_url)
+
+    async def get_link_in_submission(self, submission_url, link_name):
+        links = await self.get_submission_links(submission_url)
+        if link_name in links:
+            return links.get(link_name)['href'].rsplit('{')[0]
+        raise ValueError(f"{link_name} is not in submission resource links")
+
+    async def update_submission_state(self, submission_url, state):
+        state_url = await self.get_link_in_submission(submission_url, state)
+        return await self.put(state_url)
+
+    async def get_entities(self, entity_url, entity_type, relation=None, projection=None,
+                           fields=None) -> AsyncIterator[dict]:
+        entity = await self.get(entity_url)
+        async for related_entity in self.get_related_entities(relation or entity_type, entity, entity_type,
+                                                              projection=projection, fields=fields):
+            yield related_entity
+
+    async def get_all(self, url, entity_type, projection=None, fields=None) -> AsyncIterator[dict]:
+        """See IngestApi.get_all for projection and fields."""
+        params = {'size': self.page_size}
+        if projection:
+            params['projection'] = projection
+        result = await self.get(url, params=params)
+        for entity in result.get('_embedded', {}).get(entity_type, []):
+            yield select_fields(entity, fields)
+
+        while 'next' in result['_links']:
+            result = await self.get(result['_links']['next']['href'])
+            for entity in result['_embedded'][entity_type]:
+                yield select_fields(entity, fields)
+            self.logger.info(f"GET {entity_type} {json.dumps(result['page'])}")
+
+    async def get_related_entities(self, relation, entity, entity_type, projection=None,
+                                   fields=None) -> AsyncIterator[dict]:
+        if relation in entity['_links']:
+            async for related_entity in self.get_all(entity['_links'][relation]['href'], entity_type,
+                                                     projection=projection, fields=fields):
+                yield related_entity
+
+    async def get_related_entities_count(self, relation, entity, entity_type):
+        if relation in entity['_links']:
+            result = await self.get(entity['_links'][relation]['href'])
+            if 'page' in result:
+                return result.get('page').get('totalElements')
+            return len(result['_embedded'][entity_type])
+
+    async def create_project(self, submission_url, content, uuid=None):
+        return await self.create_entity(submission_url, {'content': content}, 'projects', uuid)
+
+    async def create_biomaterial(self, submission_url, content, uuid=None):
+        return await self.create_entity(submission_url, {'content': content}, 'biomaterials', uuid)
+
+    async def create_process(self, submission_url, content, uuid=None):
+        return await self.create_entity(submission_url, {'content': content}, 'processes', uuid)
+
+    async def create_protocol(self, submission_url, content, uuid=None):
+        return await self.create_entity(submission_url, {'content': content}, 'protocols', uuid)
+
+    async def create_file(self, submission_url, filename, content, uuid=None):
+        submission_files_url = await self.get_link_in_submission(submission_url, 'files')
+        params = {'updatingUuid': uuid} if uuid else {}
+        try:
+            # conflicts are not retried here, the metadata of the existing file is updated instead
+            return await self.post(submission_files_url, json={'fileName': filename, 'content': content},
+                                   params=params, retry_conflicts=False)
+        except aiohttp.ClientResponseError as error:
+            if error.status not in (409, 500):
+                raise
+            search_files = await self.get_file_by_submission_url_and_filename(submission_url, filename)
+            if not search_files:
+                raise
+
+        file_in_ingest = search_files[0]
+        new_content = file_in_ingest.get('content') or {}
+        new_content.update(content)
+        file_url = file_in_ingest['_links']['self']['href']
+        self.logger.debug(f'Updating existing content of file {file_url}.')
+        return await self.patch(file_url, json={'content': new_content})
+
+    async def create_submission_manifest(self, submission_url, data):
+        return await self.create_entity(submission_url, data, 'submissionManifest')
+
+    async def create_submission_error(self, submission_url, data):
+        return await self.create_entity(submission_url, data, 'submissionEnvelopeErrors')
+
+    async def delete_submission_errors(self, submission_url: str):
+        await self.delete(f'{submission_url}/submissionErrors')
+
+    async def create_entity(self, submission_url, data, entity_type, uuid=None):
+        params = {'updatingUuid': uuid} if uuid else {}
+        entity_url = await self.get_link_in_submission(submission_url, entity_type)
+        self.logger.debug(f"POST {entity_url} {json.dumps(data)}")
+        return await self.post(entity_url, json=data, params=params)
+
+    async def link_entity(self, from_entity, to_entity, relationship, is_collection=True):
+        if not from_entity:
+            raise ValueError("Error: from_entity is None")
+
+        if not to_entity:
+            raise ValueError("Error: to_entity is None")
+
+        from_uri = IngestApi._get_relationship_uri(from_entity, relationship)
+        to_uri = self.get_link_from_resource(to_entity, 'self').rsplit('{')[0]
+        headers = dict(await self._get_headers(), **{'Content-type': 'text/uri-list'})
+        if is_collection:
+            return await self.post(from_uri, data=to_uri, headers=headers)
+        return await self.put(from_uri, data=to_uri, headers=headers)
+
+    async def link_entities(self, from_entity, to_entities, relationship):
+        if not to_entities:
+            raise ValueError("Error: to_entities is empty")
+
+        if not all(to_entities):
+            raise ValueError("Error: to_entities contains None")
+
+        from_uri = IngestApi._get_relationship_uri(from_entity, relationship)
+        to_uris = [self.get_link_from_resource(to_entity, 'self').rsplit('{')[0] for to_entity in to_entities]
+        headers = dict(await self._get_headers(), **{'Content-type': 'text/uri-list'})
+        return await self.post(from_uri, data='\n'.join(to_uris), headers=headers)
+
+    @staticmethod
+    def is_entity_editable(entity) -> bool:
+        return entity.get('editable') is True
+
+    async def _get_ingest_links(self):
+        if self._ingest_links is None:
+            self._ingest_links = (await self.get(self.url))['_links']
+        return self._ingest_links
+
+    def _get_session(self):
+        if not self.session:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def _request(self, method, url, retry_conflicts=True, **kwargs):
+        if 'headers' not in kwargs:
+            kwargs['headers'] = await self._get_headers()
+
+        session = self._get_session()
+        policy = self.retry_policy
+        retries = status_retries = read_retries = 0
+        while True:
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    body = await response.read()
+                    can_retry = _has_budget(policy.total, retries) and _has_budget(policy.status, status_retries)
+                    if retry_conflicts and can_retry and policy.is_retry(method, response.status):
+                        status_retries += 1
+                    else:
+                        response.raise_for_status()
+                        return json.loads(body) if body else None
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as error:
+                # a body cut short is a read error, as it is for urllib3
+                can_retry = _has_budget(policy.total, retries) and _has_budget(policy.read, read_retries)
+                if not can_retry or not _is_method_retryable(policy, method):
+                    raise
+                read_retries += 1
+                self.logger.debug(f'Retrying {method} {url} after {error!r}')
+
+            retries += 1
+            await asyncio.sleep(self._get_backoff_time(retries))
+
+    def _get_backoff_time(self, retries):
+        # same as urllib3: no delay before the first retry, then exponential back off
+        if retries <= 1:
+            return 0
+        return min(self.retry_policy.BACKOFF_MAX, self.retry_policy.backoff_factor * (2 ** (retries - 1)))
+
+
+def _is_method_retryable(policy: retry.Retry, method: str):
+    # no allowed methods means that every method is retried, as in urllib3
+    return not policy.allowed_methods or method.upper() in policy.allowed_methods
+
+
+def _has_budget(limit, used):
+    # a limit of None leaves the count to the other limits of the retry policy, as in urllib3
+    return limit is None or used < limit
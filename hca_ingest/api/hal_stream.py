@@ -0,0 +1,183 @@
+"""
+Incremental decoding of HAL collection pages, so that the entities of a page can be used as they arrive instead of
+after the whole page has been read and parsed, and pruning of the entities to the fields a client needs.
+"""
+import codecs
+import json
+import re
+from typing import Iterable, Iterator, Optional
+
+_CONTAINER_TOKENS = re.compile(r'["{}\[\]]')
+_STRING_TOKENS = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[\s,}\]]')
+_WHITESPACE = re.compile(r'\s*')
+
+
+def iter_embedded_entities(chunks: Iterable[bytes], entity_type: str, page: dict) -> Iterator[dict]:
+    """
+    Yields the items of `_embedded.<entity_type>` one by one from the utf-8 encoded chunks of a HAL collection page.
+    The other top level properties of the page, e.g. `_links` and `page`, are added to the page dict as they are read,
+    so they are all there once the iterator is exhausted.
+    """
+    stream = _JsonStream(chunks)
+    for key in stream.iter_object_keys():
+        if key != '_embedded':
+            page[key] = stream.read_value()
+            continue
+        for embedded_key in stream.iter_object_keys():
+            if embedded_key != entity_type:
+                stream.read_value()
+                continue
+            yield from stream.iter_array_values()
+
+
+def select_fields(entity: dict, fields: Optional[Iterable[str]]) -> dict:
+    """
+    Returns a new dict with only the given fields of entity, each a dotted path such as 'uuid.uuid' or '_links.self'.
+    Fields missing from entity are left out. All fields are kept when fields is None.
+    """
+    if fields is None:
+        return entity
+    selected = {}
+    for field in fields:
+        source, target = entity, selected
+        *parents, name = field.split('.')
+        for parent in parents:
+            source = source.get(parent) if isinstance(source, dict) else None
+            if source is None:
+                break
+            target = target.setdefault(parent, {})
+        else:
+            if isinstance(source, dict) and name in source:
+                target[name] = source[name]
+    return selected
+
+
+class _JsonStream:
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._position = 0
+        self._finished = False
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """Yields the keys of the object at the current position, the caller must read the value of each key."""
+        self._expect('{')
+        if self._peek() == '}':
+            self._position += 1
+            return
+        while True:
+            key = self.read_value()
+            self._expect(':')
+            yield key
+            if self._expect(',', '}') == '}':
+                return
+
+    def iter_array_values(self) -> Iterator:
+        self._expect('[')
+        if self._peek() == ']':
+            self._position += 1
+            return
+        while True:
+            yield self.read_value()
+            if self._expect(',', ']') == ']':
+                return
+
+    def read_value(self):
+        self._skip_whitespace()
+        start = self._position
+        end = self._find_value_end(start)
+        self._position = end
+        value = json.loads(self._buffer[start:end])
+        self._compact()
+        return value
+
+    def _find_value_end(self, start):
+        first = self._char_at(start)
+        if first == '"':
+            return self._find_string_end(start + 1)
+        if first not in '{[':
+            return self._search(_SCALAR_END, start, allow_end=True)
+
+        depth = 0
+        position = start
+        while True:
+            position = self._search(_CONTAINER_TOKENS, position)
+            token = self._buffer[position]
+            if token == '"':
+                position = self._find_string_end(position + 1)
+                continue
+            depth += 1 if token in '{[' else -1
+            position += 1
+            if depth == 0:
+                return position
+
+    def _find_string_end(self, position):
+        while True:
+            position = self._search(_STRING_TOKENS, position)
+            if self._buffer[position] == '"':
+                return position + 1
+            # skip the escaped character
+            self._char_at(position + 1)
+            position += 2
+
+    def _search(self, pattern, position, allow_end=False):
+        while True:
+            match = pattern.search(self._buffer, position)
+            if match:
+                return match.start()
+            position = len(self._buffer)
+            if not self._fill():
+                if allow_end:
+                    return position
+                raise ValueError('Unexpected end of JSON stream')
+
+    def _char_at(self, position):
+        while position >= len(self._buffer):
+            if not self._fill():
+                raise ValueError('Unexpected end of JSON stream')
+        return self._buffer[position]
+
+    def _peek(self):
+        self._skip_whitespace()
+        return self._char_at(self._position)
+
+    def _expect(self, *tokens):
+        token = self._peek()
+        if token not in tokens:
+            raise ValueError(f'Expected one of {tokens} at {self._position} but found {token!r}')
+        self._position += 1
+        return token
+
+    def _skip_whitespace(self):
+        while True:
+            self._position = _WHITESPACE.match(self._buffer, self._position).end()
+            if self._position < len(self._buffer) or not self._fill():
+                return
+
+    def _fill(self):
+        # reads at least as much text as is left unread in the buffer, so that the buffer is copied a logarithmic
+        # number of times while a value spanning many chunks is read, instead of once per chunk
+        if self._finished:
+            return False
+        unread_size = max(len(self._buffer) - self._position, 1)
+        texts = []
+        size = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            texts.append(text)
+            size += len(text)
+            if size >= unread_size:
+                break
+        else:
+            texts.append(self._decoder.decode(b'', final=True))
+            self._finished = True
+        self._buffer = ''.join([self._buffer] + texts)
+        return size > 0
+
+    def _compact(self):
+        # drop what has been read so that memory is bound by the size of the largest value
+        if self._position > 65536:
+            self._buffer = self._buffer[self._position:]
+            self._position = 0
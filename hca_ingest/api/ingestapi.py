@@ -5,13 +5,19 @@ desc goes here
 import json
 import logging
 import os
-import time
-from urllib.parse import urljoin
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse, parse_qsl, urlencode
 import polling
 
 import requests
 
-from hca_ingest.api.requests_utils import create_session_with_retry
+from hca_ingest.api.hal_stream import iter_embedded_entities, select_fields
+from hca_ingest.api.requests_utils import create_session_with_retry, get_cache_index, is_private_cache, \
+    status_retry_disabled, CacheStats
+
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class IngestApi:
@@ -28,14 +34,37 @@ class IngestApi:
         self.headers = self.__get_basic_header()
         self.token = None
         self._submission_links = {}
+        self._files_by_name = {}
+        self._files_lock = threading.Lock()
+        self.cache_stats = CacheStats()
+        self._cache_index = get_cache_index(self.session)
+        self._cache_synced = False
+        self._cache_lock = threading.Lock()
+        self._pending_eviction_segments = set()
         self.logger.info(f"using {self.url} for ingest API")
         self._ingest_links = self._get_ingest_links()
         self.page_size = 100
+        self.pages_in_flight = 1
+        self.stream_pages = False
         self.poll_step = 5
 
     def set_page_size(self, page_size):
         self.page_size = page_size
 
+    def set_pages_in_flight(self, pages_in_flight):
+        """
+        Sets how many pages get_all requests concurrently when the server reports page.totalPages. The session's
+        connection pool should be at least as large, see create_session_with_retry(pool_maxsize=...).
+        """
+        self.pages_in_flight = pages_in_flight
+
+    def set_stream_pages(self, stream_pages):
+        """
+        When set, get_all decodes the entities of each page while the page is being read, so memory is bound by the
+        largest entity instead of the page size. Streamed pages are neither cached nor fetched concurrently.
+        """
+        self.stream_pages = stream_pages
+
     def get_headers(self):
         # refresh token
         if self.token and not self.headers.get('Authorization'):
@@ -63,11 +92,14 @@ class IngestApi:
         return self.headers
 
     def get(self, url, bypass_cache=False, **kwargs):
+        if self._pending_eviction_segments:
+            self._evict_pending_responses()
         if bypass_cache:
             self.session.cache.delete_url(url)
         if 'headers' not in kwargs:
             kwargs['headers'] = self.get_headers()
         response = self.session.get(url, **kwargs)
+        self._index_cached_response(response)
         response.raise_for_status()
         return response
 
@@ -75,7 +107,7 @@ class IngestApi:
         if 'headers' not in kwargs:
             kwargs['headers'] = self.get_headers()
         response = self.session.patch(url, **kwargs)
-        self.session.cache.clear()
+        self._evict_related_responses(url, **kwargs)
         response.raise_for_status()
         return response
 
@@ -84,16 +116,20 @@ class IngestApi:
             kwargs['headers'] = self.get_headers()
 
         response = self.session.put(url, **kwargs)
-        self.session.cache.clear()
+        self._evict_related_responses(url, **kwargs)
         response.raise_for_status()
         return response
 
-    def post(self, url, **kwargs):
+    def post(self, url, retry_conflicts=True, **kwargs):
         if 'headers' not in kwargs:
             kwargs['headers'] = self.get_headers()
 
-        response = self.session.post(url, **kwargs)
-        self.session.cache.clear()
+        if retry_conflicts:
+            response = self.session.post(url, **kwargs)
+        else:
+            with status_retry_disabled(self.session, url):
+                response = self.session.post(url, **kwargs)
+        self._evict_related_responses(url, **kwargs)
         response.raise_for_status()
         return response
 
@@ -102,10 +138,70 @@ class IngestApi:
             kwargs['headers'] = self.get_headers()
 
         response = self.session.delete(url, **kwargs)
-        self.session.cache.clear()
+        self._evict_related_responses(url, **kwargs)
         response.raise_for_status()
         return response
 
+    def _index_cached_response(self, response):
+        if getattr(response, 'from_cache', False):
+            self.cache_stats.increment('hits')
+            return
+        self.cache_stats.increment('misses')
+        cache_key = getattr(response, 'cache_key', None)
+        if cache_key:
+            self._cache_index.add(cache_key, self._get_url_segments(response.url))
+
+    def _evict_related_responses(self, url, data=None, headers=None, **kwargs):
+        """
+        Evicts the cached responses that a write to url could have changed: every cached url that shares a path
+        segment with the written url, or with the urls in a text/uri-list body when linking. The responses which were
+        not cached through the session are indexed from the cache on the first write. A cache which other processes
+        write to, such as the default SQLite file, is indexed again on every write, only its new responses are read.
+
+        The write has been sent already, so a cache which cannot be updated, e.g. an SQLite file locked by another
+        process, does not fail it. The responses are evicted before the next request instead.
+        """
+        segments = self._get_url_segments(url)
+        if headers and headers.get('Content-type') == 'text/uri-list' and isinstance(data, str):
+            for linked_url in data.splitlines():
+                segments.update(self._get_url_segments(linked_url))
+        with self._cache_lock:
+            self._pending_eviction_segments.update(segments)
+        self._evict_pending_responses()
+
+    def _evict_pending_responses(self):
+        # the writes of the clients of a session are serialised, concurrent SQLite writes fail once the file is locked
+        with self._cache_index.write_lock, self._cache_lock:
+            segments = self._pending_eviction_segments
+            if not segments:
+                return
+            self._pending_eviction_segments = set()
+            try:
+                if not self._cache_synced or not is_private_cache(self.session):
+                    self._cache_index.sync(self.session.cache, self._get_url_segments)
+                    self._cache_synced = True
+                cache_keys = self._cache_index.pop_related(segments)
+                # deleted one by one, the bulk delete of the SQLite backend vacuums the database every time
+                for cache_key in cache_keys:
+                    self.session.cache.delete(cache_key)
+            except Exception as error:
+                self.logger.warning(f'Could not evict the cached responses related to a write, retrying before the '
+                                    f'next request: {str(error)}')
+                self._pending_eviction_segments.update(segments)
+                # the keys popped from the index are indexed again from the cache
+                self._cache_synced = False
+                return
+        if cache_keys:
+            self.cache_stats.increment('evictions', len(cache_keys))
+
+    def _get_url_segments(self, url):
+        parsed_url = urlparse(url)
+        path = parsed_url.path
+        api_url = urlparse(self.url)
+        if parsed_url.netloc == api_url.netloc and path.startswith(api_url.path):
+            path = path[len(api_url.path):]
+        return {(parsed_url.netloc, segment) for segment in path.split('/') if segment}
+
     def poll(self, url, **kwargs):
         if 'step' not in kwargs:
             kwargs['step'] = self.poll_step
@@ -271,19 +367,41 @@ class IngestApi:
     def get_process(self, process_url):
         return self.get(process_url).json()
 
-    def get_entities(self, entity_url, entity_type, relation=None):
+    def get_entities(self, entity_url, entity_type, relation=None, projection=None, fields=None):
         entity = self.get(entity_url).json()
         if not relation:
             relation = entity_type
-        return self.get_related_entities(relation, entity, entity_type)
+        return self.get_related_entities(relation, entity, entity_type, projection=projection, fields=fields)
+
+    def get_all(self, url, entity_type, projection=None, fields=None):
+        """
+        Yields every entity of the collection at url, page by page.
 
-    def get_all(self, url, entity_type):
+        :param projection: name of a server side projection, sent as the projection parameter so that servers which
+            support it return smaller documents
+        :param fields: dotted paths of the fields to keep, e.g. ['uuid', '_links.self'], the other fields are dropped
+            as each page is parsed
+        """
         params = {'size': self.page_size}
+        if projection:
+            params['projection'] = projection
+        for entity in self._get_all_pages(url, entity_type, params):
+            yield select_fields(entity, fields)
+
+    def _get_all_pages(self, url, entity_type, params):
+        if self.stream_pages:
+            yield from self._get_all_streamed(url, entity_type, params)
+            return
+
         result = self.get(url, params=params).json()
 
         entities = result["_embedded"][entity_type] if '_embedded' in result else []
         yield from entities
 
+        if self.pages_in_flight > 1 and 'page' in result and "next" in result["_links"]:
+            yield from self._get_remaining_pages(result, entity_type)
+            return
+
         while "next" in result["_links"]:
             next_url = result["_links"]["next"]["href"]
             result = self.get(next_url).json()
@@ -291,11 +409,53 @@ class IngestApi:
             yield from entities
             self.logger.info(f"GET {entity_type} {json.dumps(result['page'])}")
 
-    def get_related_entities(self, relation, entity, entity_type):
+    def _get_all_streamed(self, url, entity_type, params):
+        headers = dict(self.get_headers(), **{'Cache-Control': 'no-store'})
+        while url:
+            page = {}
+            with self.get(url, params=params, headers=headers, stream=True) as response:
+                yield from iter_embedded_entities(response.iter_content(STREAM_CHUNK_SIZE), entity_type, page)
+            self.logger.info(f"GET {entity_type} {json.dumps(page.get('page'))}")
+            url = page.get('_links', {}).get('next', {}).get('href')
+            params = None
+
+    def _get_remaining_pages(self, first_result, entity_type):
+        next_url = first_result["_links"]["next"]["href"]
+        page = first_result['page']
+        page_urls = (self._get_page_url(next_url, number) for number in range(page['number'] + 1, page['totalPages']))
+
+        executor = ThreadPoolExecutor(max_workers=self.pages_in_flight)
+        in_flight = deque()
+        try:
+            for page_url in page_urls:
+                in_flight.append(executor.submit(self.get, page_url))
+                if len(in_flight) < self.pages_in_flight:
+                    continue
+                yield from self._get_page_entities(in_flight.popleft().result(), entity_type)
+            while in_flight:
+                yield from self._get_page_entities(in_flight.popleft().result(), entity_type)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _get_page_entities(self, response, entity_type):
+        result = response.json()
+        self.logger.info(f"GET {entity_type} {json.dumps(result['page'])}")
+        return result.get("_embedded", {}).get(entity_type, [])
+
+    @staticmethod
+    def _get_page_url(url, number):
+        parsed_url = urlparse(url)
+        query = [(key, value) for key, value in parse_qsl(parsed_url.query) if key != 'page']
+        query.append(('page', str(number)))
+        return parsed_url._replace(query=urlencode(query)).geturl()
+
+    def get_related_entities(self, relation, entity, entity_type, projection=None, fields=None):
         # get the self link from entity
         if relation in entity["_links"]:
             entity_url = entity["_links"][relation]["href"]
-            yield from self.get_all(entity_url, entity_type)
+            yield from self.get_all(entity_url, entity_type, projection=projection, fields=fields)
 
     def get_related_entities_count(self, relation, entity, entity_type):
         if relation in entity["_links"]:
@@ -328,50 +488,63 @@ class IngestApi:
         return self.create_entity(submission_url, {'content': content}, "protocols", uuid)
 
     def create_file(self, submission_url, filename, content, uuid=None):
+        """
+        Creates the file named filename in the submission, or updates the content of the file with that name when
+        there is one already. The files of the submission are listed once, on the first call for the submission, so
+        that existing files are patched straight away instead of after a rejected POST and a search. Each listed file
+        is dropped once it is used, call forget_submission_files when done with the submission to drop the rest.
+        """
+        existing_file = self._get_files_by_name(submission_url).pop(filename, None)
+        if existing_file:
+            try:
+                return self._update_file_content(existing_file, content)
+            except requests.exceptions.HTTPError as error:
+                # the file was deleted since the files of the submission were listed
+                if error.response is None or error.response.status_code != requests.codes.not_found:
+                    raise
+        return self._post_file(submission_url, filename, content, uuid)
+
+    def forget_submission_files(self, submission_url):
+        with self._files_lock:
+            self._files_by_name.pop(submission_url, None)
+
+    def _get_files_by_name(self, submission_url):
+        with self._files_lock:
+            files_by_name = self._files_by_name.get(submission_url)
+            if files_by_name is None:
+                submission_files_url = self.get_link_in_submission(submission_url, 'files')
+                files = self.get_all(submission_files_url, 'files', fields=['fileName', 'content', '_links.self'])
+                files_by_name = {file.get('fileName'): file for file in files}
+                self._files_by_name[submission_url] = files_by_name
+            return files_by_name
+
+    def _post_file(self, submission_url, filename, content, uuid=None):
         submission_files_url = self.get_link_in_submission(submission_url, 'files')
-
-        file_to_create_object = {
-            "fileName": filename,
-            "content": content
-        }
-
         params = {}
         if uuid:
             params["updatingUuid"] = uuid
 
-        time.sleep(0.001)
-
-        # Do not use session retries here as it will throw requests.exceptions.RetryError for http 409 error
-        # We want to retry that error when creating files by doing a subsequent PATCH requests to update the metadata
-        response = requests.post(
-            submission_files_url,
-            json=file_to_create_object,
-            params=params,
-            headers=self.get_headers()
-        )
-
-        # TODO Investigate why core is returning internal server error
-        if response.status_code == requests.codes.conflict or response.status_code == requests.codes.internal_server_error:
+        try:
+            # conflicts are not retried here, the content of the existing file is updated instead
+            return self.post(submission_files_url, json={"fileName": filename, "content": content},
+                             params=params, retry_conflicts=False).json()
+        except requests.exceptions.HTTPError as error:
+            # the file was created since the files of the submission were listed
+            # TODO Investigate why core is returning internal server error
+            if error.response is None or \
+                    error.response.status_code not in (requests.codes.conflict, requests.codes.internal_server_error):
+                raise
             search_files = self.get_file_by_submission_url_and_filename(submission_url, filename)
+            if not search_files:
+                raise
+            return self._update_file_content(search_files[0], content)
 
-            if search_files:
-                file_in_ingest = search_files[0]
-                existing_content = file_in_ingest.get('content')
-                new_content = existing_content
-
-                if existing_content:
-                    new_content.update(content)
-                else:
-                    new_content = content
-
-                file_url = file_in_ingest['_links']['self']['href']
-                time.sleep(0.001)
-                response = self.patch(file_url, json={'content': new_content})
-                self.logger.debug(f'Updating existing content of file {file_url}.')
-
-        response.raise_for_status()
-
-        return response.json()
+    def _update_file_content(self, file_in_ingest, content):
+        existing_content = file_in_ingest.get('content')
+        new_content = dict(existing_content, **content) if existing_content else content
+        file_url = file_in_ingest['_links']['self']['href']
+        self.logger.debug(f'Updating existing content of file {file_url}.')
+        return self.patch(file_url, json={'content': new_content}).json()
 
     def create_submission_manifest(self, submission_url, data):
         return self.create_entity(submission_url, data, 'submissionManifest')
@@ -402,6 +575,43 @@ class IngestApi:
         if not to_entity:
             raise ValueError("Error: to_entity is None")
 
+        from_uri = self._get_relationship_uri(from_entity, relationship)
+        to_uri = self.get_link_from_resource(to_entity, 'self').rsplit("{")[0]
+
+        self.logger.info('fromUri ' + from_uri + ' toUri:' + to_uri)
+
+        headers = dict.copy(self.get_headers())
+        headers['Content-type'] = 'text/uri-list'
+
+        if is_collection:
+            return self.post(from_uri, data=to_uri, headers=headers)
+        return self.put(from_uri, data=to_uri, headers=headers)
+
+    def link_entities(self, from_entity, to_entities, relationship):
+        """
+        Adds all to_entities to the relationship collection of from_entity with a single request by sending one
+        uri per line in the text/uri-list body.
+        """
+        if not to_entities:
+            raise ValueError("Error: to_entities is empty")
+
+        if not all(to_entities):
+            raise ValueError("Error: to_entities contains None")
+
+        from_uri = self._get_relationship_uri(from_entity, relationship)
+        to_uris = [self.get_link_from_resource(to_entity, 'self').rsplit("{")[0] for to_entity in to_entities]
+
+        self.logger.info(f'fromUri {from_uri} toUris: {len(to_uris)}')
+
+        headers = dict.copy(self.get_headers())
+        headers['Content-type'] = 'text/uri-list'
+        return self.post(from_uri, data='\n'.join(to_uris), headers=headers)
+
+    @staticmethod
+    def _get_relationship_uri(from_entity, relationship):
+        if not from_entity:
+            raise ValueError("Error: from_entity is None")
+
         if not relationship:
             raise ValueError("Error: relationship is None")
 
@@ -421,17 +631,7 @@ class IngestApi:
             raise ValueError(
                 "Error: from_entity_links_relationship for relationship {0} has no href".format(relationship))
 
-        from_uri = from_entity["_links"][relationship]["href"].rsplit("{")[0]
-        to_uri = self.get_link_from_resource(to_entity, 'self').rsplit("{")[0]
-
-        self.logger.info('fromUri ' + from_uri + ' toUri:' + to_uri)
-
-        headers = dict.copy(self.get_headers())
-        headers['Content-type'] = 'text/uri-list'
-
-        if is_collection:
-            return self.post(from_uri, data=to_uri, headers=headers)
-        return self.put(from_uri, data=to_uri, headers=headers)
+        return from_entity["_links"][relationship]["href"].rsplit("{")[0]
 
     def create_bundle_manifest(self, bundle_manifest):
         url = self._ingest_links["bundleManifests"]["href"].rsplit("{")[0]
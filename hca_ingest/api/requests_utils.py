@@ -1,11 +1,17 @@
+import threading
+import weakref
+from contextlib import contextmanager
 from datetime import timedelta
-from requests.adapters import HTTPAdapter
+from typing import Callable, Iterable, Set
+import requests
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE
 from urllib3.util import retry
 from requests_cache import CachedSession
+from requests_cache.backends.base import BaseCache
 
 
-def create_session_with_retry(retry_policy=None) -> CachedSession:
-    retry_policy = retry_policy or retry.Retry(
+def create_retry_policy() -> retry.Retry:
+    return retry.Retry(
         total=50,
         # seems that this has a default value of 10,
         # setting this to a very high number so that it'll respect the status retry count
@@ -19,8 +25,160 @@ def create_session_with_retry(retry_policy=None) -> CachedSession:
         method_whitelist=frozenset(
             ['HEAD', 'GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'TRACE'])
     )
-    session = CachedSession(expire_after=timedelta(hours=2))
-    adapter = HTTPAdapter(max_retries=retry_policy)
+
+
+def create_session_with_retry(retry_policy=None, pool_maxsize=DEFAULT_POOLSIZE, **cache_options) -> CachedSession:
+    retry_policy = retry_policy or create_retry_policy()
+    cache_options.setdefault('expire_after', timedelta(hours=2))
+    session = CachedSession(**cache_options)
+    # pool_maxsize should be at least the number of threads sharing this session,
+    # otherwise connections are discarded instead of being reused
+    adapter = RetryOverrideAdapter(max_retries=retry_policy, pool_maxsize=pool_maxsize)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
     return session
+
+
+class RetryOverrideAdapter(HTTPAdapter):
+    """An HTTPAdapter whose retry policy can be replaced for the requests sent by the current thread."""
+
+    def __init__(self, *args, **kwargs):
+        self._local = threading.local()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def max_retries(self) -> retry.Retry:
+        local = self.__dict__.get('_local')
+        return getattr(local, 'max_retries', None) or self._max_retries
+
+    @max_retries.setter
+    def max_retries(self, max_retries: retry.Retry):
+        self._max_retries = max_retries
+
+    @contextmanager
+    def override_retries(self, max_retries: retry.Retry):
+        self._local.max_retries = max_retries
+        try:
+            yield
+        finally:
+            del self._local.max_retries
+
+
+@contextmanager
+def status_retry_disabled(session: requests.Session, url: str):
+    """
+    Sends the requests of the current thread to url without retrying on an error status, for requests whose error
+    status is handled by the caller, e.g. a POST which may conflict with an existing entity. Connection and read
+    errors are still retried, through the same connection pool. Only sessions of create_session_with_retry can do
+    this, the requests of other sessions are retried as usual.
+    """
+    adapter = session.get_adapter(url)
+    if not isinstance(adapter, RetryOverrideAdapter):
+        yield
+        return
+    with adapter.override_retries(adapter.max_retries.new(status_forcelist=None)):
+        yield
+
+
+class CacheStats:
+    """
+    Counts how the HTTP cache of an IngestApi is used: GET requests served from the cache (hits) or from the server
+    (misses), responses evicted after writes and full cache clears.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clears = 0
+        self._lock = threading.Lock()
+
+    def increment(self, counter: str, count: int = 1):
+        # requests are sent from several threads, += on an attribute is not atomic
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + count)
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def __repr__(self):
+        return f'CacheStats(hits={self.hits}, misses={self.misses}, hit_rate={self.hit_rate:.2%}, ' \
+               f'evictions={self.evictions}, clears={self.clears})'
+
+
+_CACHE_INDEXES = weakref.WeakKeyDictionary()
+_CACHE_INDEXES_LOCK = threading.Lock()
+
+
+def is_private_cache(session) -> bool:
+    """
+    Whether the cache of session is only seen by this process, i.e. the in-memory backend. The other backends, such
+    as the default SQLite file, can hold responses cached by earlier runs or by other processes.
+    """
+    return type(session.cache) is BaseCache
+
+
+def get_cache_index(session) -> 'CacheIndex':
+    """The CacheIndex of the responses cached through session, shared by every client using the session."""
+    with _CACHE_INDEXES_LOCK:
+        cache_index = _CACHE_INDEXES.get(session)
+        if cache_index is None:
+            cache_index = CacheIndex()
+            _CACHE_INDEXES[session] = cache_index
+        return cache_index
+
+
+class CacheIndex:
+    """
+    Remembers the path segments of every cached response so that a write only needs to evict the responses that
+    share a segment with the written url, e.g. a PATCH to /biomaterials/1 evicts /biomaterials/1,
+    /biomaterials/search/findByUuid?uuid=... and /submissionEnvelopes/2/biomaterials but keeps /schemas/... cached.
+    """
+
+    def __init__(self):
+        self._keys_by_segment = {}
+        self._segments_by_key = {}
+        self._lock = threading.Lock()
+        # held while the cached responses are being evicted, so that the cache is written by one thread at a time
+        self.write_lock = threading.Lock()
+
+    def add(self, cache_key: str, segments: Set[tuple]):
+        with self._lock:
+            self._segments_by_key[cache_key] = segments
+            for segment in segments:
+                self._keys_by_segment.setdefault(segment, set()).add(cache_key)
+
+    def pop_related(self, segments: Iterable[tuple]) -> Set[str]:
+        with self._lock:
+            keys = set()
+            for segment in segments:
+                keys.update(self._keys_by_segment.get(segment, ()))
+            self._remove(keys)
+            return keys
+
+    def sync(self, cache: BaseCache, get_url_segments: Callable[[str], Set[tuple]]):
+        """
+        Adds the responses in cache which were not cached through this index, e.g. by an earlier run or by another
+        process sharing the SQLite file, and drops the ones which are no longer in it. Only the responses which are
+        new to the index are read from the cache.
+        """
+        keys = set(cache.responses.keys())
+        with self._lock:
+            new_keys = keys - self._segments_by_key.keys()
+            self._remove(self._segments_by_key.keys() - keys)
+        for key in new_keys:
+            response = cache.get_response(key)
+            # a response which cannot be read is indexed without segments so that it is not read again
+            self.add(key, get_url_segments(response.url) if response is not None else set())
+
+    def _remove(self, keys: Iterable[str]):
+        for key in list(keys):
+            for segment in self._segments_by_key.pop(key, ()):
+                self._keys_by_segment[segment].discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._keys_by_segment.clear()
+            self._segments_by_key.clear()
@@ -3,6 +3,9 @@ from typing import Dict
 from hca_ingest.api.ingestapi import IngestApi
 from .entity import Entity
 
+# the fields read by Entity, everything else in the entity documents is dropped as they are fetched
+ENTITY_FIELDS = ['content', 'uuid', '_links.self']
+
 
 class DataCollector:
     def __init__(self, ingest_api: IngestApi):
@@ -80,6 +83,6 @@ class DataCollector:
 
     def __get_entities_by_submission_and_type(self, data_by_submission, submission, entity_type):
         entity_json = \
-            self.api.get_related_entities(entity_type, submission, entity_type)
+            self.api.get_related_entities(entity_type, submission, entity_type, fields=ENTITY_FIELDS)
         if entity_json:
             data_by_submission.extend(list(entity_json))
@@ -1,14 +1,14 @@
 from typing import Iterable
 
-import requests
-
+from hca_ingest.utils.schema_store import SchemaStore, get_default_schema_store
 from .entity import Entity
 from .schema_url import SchemaUrl
 
 
 class SchemaCollector:
-    def __init__(self):
+    def __init__(self, schema_store: SchemaStore = None):
         self.schema_cache = {}
+        self.schema_store = schema_store or get_default_schema_store()
 
     def get_schemas_for_entities(self, entity_list: Iterable[Entity]) -> dict:
         schema_urls = self.get_schema_urls_for_entities(entity_list)
@@ -24,7 +24,7 @@ class SchemaCollector:
         return self.__add_schema_to_cache(url)
 
     def __add_schema_to_cache(self, url: str) -> dict:
-        schema = self.__get_schema(url)
+        schema = self.schema_store.get(url)
         self.__add_linked_schema(schema)
         self.schema_cache[url] = schema
         return schema
@@ -61,10 +61,3 @@ class SchemaCollector:
             duplicate_types.remove(concrete_type)
         duplicate_types = set(duplicate_types)
         return set([schema for schema in schema_urls if schema.concrete_type in duplicate_types])
-
-    @staticmethod
-    def __get_schema(url: str)-> dict:
-        response = requests.get(url)
-        if response.ok:
-            return response.json()
-        response.raise_for_status()
@@ -3,7 +3,6 @@ from enum import Enum
 
 from hca_ingest.importer.conversion import utils, data_converter
 from hca_ingest.importer.conversion.data_converter import DataType, CONVERTER_MAP, ListConverter
-from hca_ingest.template.exceptions import UnknownKeySchemaException
 from hca_ingest.template.schema_template import SchemaTemplate
 
 _LOGGER = logging.getLogger(__name__)
@@ -119,9 +118,8 @@ class ColumnSpecification:
 
     @staticmethod
     def _map_key_to_spec(schema_template: SchemaTemplate, key):
-        try:
-            spec = schema_template.lookup_property_from_template(key)
-        except UnknownKeySchemaException:
+        spec = schema_template.find_property_in_template(key)
+        if not spec:
             _LOGGER.warning(f'[{key}] not found in the schema.')
             spec = {}
         return spec
@@ -8,6 +8,7 @@ from hca_ingest.importer.conversion.data_converter import Converter, ListConvert
 from hca_ingest.importer.conversion.exceptions import UnknownMainCategory
 from hca_ingest.importer.conversion.metadata_entity import MetadataEntity
 from hca_ingest.importer.conversion.utils import split_field_chain
+from hca_ingest.importer.data_node import FIELD_SEPARATOR
 
 _LIST_CONVERTER = ListConverter()
 
@@ -17,6 +18,8 @@ class CellConversion(object):
     def __init__(self, field, converter: Converter):
         self.field = field
         self.applied_field = self._process_applied_field(field)
+        # the applied field split once here rather than for every cell the conversion is applied to
+        self.applied_field_chain = tuple(self.applied_field.split(FIELD_SEPARATOR))
         self.converter = converter
 
     @staticmethod
@@ -36,7 +39,7 @@ class DirectCellConversion(CellConversion):
     def apply(self, metadata: MetadataEntity, cell_data):
         if cell_data is not None:
             content = self.converter.convert(cell_data)
-            metadata.define_content(self.applied_field, content)
+            metadata.define_content(self.applied_field_chain, content)
 
 
 class ListElementCellConversion(CellConversion):
@@ -44,12 +47,13 @@ class ListElementCellConversion(CellConversion):
     def __init__(self, field: str, converter: Converter):
         list_converter = ListConverter(base_converter=converter)
         super(ListElementCellConversion, self).__init__(field, list_converter)
+        self.parent_chain, self.target_field = _split_parent_chain(self.applied_field)
 
     def apply(self, metadata: MetadataEntity, cell_data):
         if cell_data is not None:
-            parent_path, target_field = split_field_chain(self.applied_field)
             data_list = self.converter.convert(cell_data)
-            parent = self._prepare_array(metadata, parent_path, len(data_list))
+            parent = self._prepare_array(metadata, self.parent_chain, len(data_list))
+            target_field = self.target_field
             for index, data in enumerate(data_list):
                 target_object = parent[index]
                 target_object[target_field] = data
@@ -70,12 +74,15 @@ class ListElementCellConversion(CellConversion):
 
 class FieldOfSingleElementListCellConversion(CellConversion):
 
+    def __init__(self, field, converter: Converter):
+        super(FieldOfSingleElementListCellConversion, self).__init__(field, converter)
+        self.parent_chain, self.target_field = _split_parent_chain(self.applied_field)
+
     def apply(self, metadata: MetadataEntity, cell_data):
         if cell_data is not None:
-            parent_path, target_field = split_field_chain(self.applied_field)
-            target_object = self._determine_target_object(metadata, parent_path)
+            target_object = self._determine_target_object(metadata, self.parent_chain)
             data = self.converter.convert(cell_data)
-            target_object[target_field] = data
+            target_object[self.target_field] = data
 
     @staticmethod
     def _determine_target_object(metadata, parent_path):
@@ -94,7 +101,7 @@ class IdentityCellConversion(CellConversion):
         value = self.converter.convert(cell_data)
         metadata.object_id = metadata.object_id or value
         if not metadata.is_module:
-            metadata.define_content(self.applied_field, value)
+            metadata.define_content(self.applied_field_chain, value)
 
 
 class ExternalReferenceCellConversion(CellConversion):
@@ -134,7 +141,7 @@ class LinkingDetailCellConversion(CellConversion):
 
     def apply(self, metadata: MetadataEntity, cell_data):
         value = self.converter.convert(cell_data)
-        metadata.define_linking_detail(self.applied_field, value)
+        metadata.define_linking_detail(self.applied_field_chain, value)
 
 
 class DoNothing(CellConversion):
@@ -149,6 +156,11 @@ class DoNothing(CellConversion):
 DO_NOTHING = DoNothing()
 
 
+def _split_parent_chain(applied_field):
+    parent_path, target_field = split_field_chain(applied_field)
+    return tuple(parent_path.split(FIELD_SEPARATOR)), target_field
+
+
 def determine_strategy(column_spec: ColumnSpecification):
     strategy = DO_NOTHING
     if column_spec is not None:
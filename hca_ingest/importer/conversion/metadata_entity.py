@@ -16,10 +16,11 @@ class MetadataEntity:
         self._concrete_type = concrete_type
         self._domain_type = domain_type
         self.object_id = object_id
-        self._content = DataNode(defaults=copy.deepcopy(content))
-        self._links = copy.deepcopy(links)
-        self._external_links = copy.deepcopy(external_links)
-        self._linking_details = DataNode(defaults=copy.deepcopy(linking_details))
+        # DataNode keeps its own copy of the defaults, the links are usually empty and need no copying
+        self._content = DataNode(defaults=content)
+        self._links = copy.deepcopy(links) if links else {}
+        self._external_links = copy.deepcopy(external_links) if external_links else {}
+        self._linking_details = DataNode(defaults=linking_details)
         self._spreadsheet_location = {
             'row_index': row.index,
             'worksheet_title': row.worksheet_title,
@@ -97,7 +98,8 @@ class MetadataEntity:
         return removed_fields
 
     def add_module_entity(self, module_entity):
-        for field, value in module_entity.content.as_dict().items():
+        # the module entity is only ever merged into one entity, so its content is moved rather than copied
+        for field, value in module_entity._content.node.items():
             module_list = self._content[field]
             if not module_list:
                 module_list = []
@@ -107,14 +109,24 @@ class MetadataEntity:
     def get_spreadsheet_location(self):
         return self._spreadsheet_location
 
-    def map_for_submission(self):
+    def map_for_submission(self, transfer=False):
+        """
+        :param transfer: when True the content and links of this entity are handed over to the returned dict
+        instead of being copied, the entity must not be used afterwards.
+        """
+        if transfer:
+            content, links = self._content.node, self._links
+            external_links, linking_details = self._external_links, self._linking_details.node
+        else:
+            content, links = self._content.as_dict(), self.links
+            external_links, linking_details = self.external_links, self.linking_details
         return {
             'is_reference': self.is_reference,
             'is_linking_reference': self.is_linking_reference,
             'concrete_type': self.concrete_type,
-            'content': self._content.as_dict(),
-            'links_by_entity': self.links,
-            'external_links_by_entity': self.external_links,
-            'linking_details': self.linking_details,
+            'content': content,
+            'links_by_entity': links,
+            'external_links_by_entity': external_links,
+            'linking_details': linking_details,
             'spreadsheet_location': self._spreadsheet_location
         }
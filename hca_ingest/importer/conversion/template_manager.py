@@ -1,26 +1,32 @@
 import copy
 import logging
+import threading
+from collections import OrderedDict
 
 from openpyxl.worksheet.worksheet import Worksheet
 
 from hca_ingest.api.ingestapi import IngestApi
 from hca_ingest.importer.conversion import conversion_strategy
 from hca_ingest.importer.conversion.column_specification import ColumnSpecification
-from hca_ingest.importer.conversion.conversion_strategy import CellConversion
 from hca_ingest.importer.conversion.metadata_entity import MetadataEntity
 from hca_ingest.importer.data_node import DataNode
 from hca_ingest.importer.spreadsheet.ingest_worksheet import IngestWorksheet, \
     MODULE_TITLE_PATTERN, IngestRow
-from hca_ingest.template.exceptions import UnknownKeySchemaException
 from hca_ingest.template.schema_template import SchemaTemplate
 
+ROW_TEMPLATE_CACHE_SIZE = 256
+
+_default_row_template_cache = None
+
 
 class TemplateManager:
     default_keys = ['describedBy', 'schema_type']
 
-    def __init__(self, template: SchemaTemplate, ingest_api: IngestApi):
+    def __init__(self, template: SchemaTemplate, ingest_api: IngestApi, row_template_cache: 'RowTemplateCache' = None):
         self.template = template
         self.ingest_api = ingest_api
+        self.row_template_cache = row_template_cache if row_template_cache is not None \
+            else get_default_row_template_cache()
         self.logger = logging.getLogger(__name__)
 
     def create_template_node(self, worksheet: Worksheet):
@@ -33,11 +39,31 @@ class TemplateManager:
 
     def create_row_template(self, ingest_worksheet: IngestWorksheet):
         concrete_type = self.get_concrete_type(ingest_worksheet.title)
-        domain_type = self.get_domain_type(concrete_type)
         column_headers = ingest_worksheet.get_column_headers()
+        context = self._determine_context(concrete_type, ingest_worksheet)
+        is_module_tab = ingest_worksheet.is_module_tab()
+
+        key = self._get_row_template_key(concrete_type, context, is_module_tab, column_headers)
+        row_template = self.row_template_cache.get(key) if key else None
+        if row_template is None:
+            row_template = self._do_create_row_template(concrete_type, context, is_module_tab, column_headers)
+            if key:
+                self.row_template_cache.put(key, row_template)
+        return row_template
+
+    def _get_row_template_key(self, concrete_type, context, is_module_tab, column_headers):
+        # the conversions only depend on the schemas and the layout of the worksheet, unless the schemas may change
+        if not getattr(self.template, 'is_versioned', False):
+            return None
+        schema_urls = frozenset(self.get_schemas() or ())
+        if not schema_urls:
+            return None
+        return schema_urls, concrete_type, context, is_module_tab, tuple(column_headers)
+
+    def _do_create_row_template(self, concrete_type, context, is_module_tab, column_headers):
+        domain_type = self.get_domain_type(concrete_type)
         cell_conversions = []
 
-        context = self._determine_context(concrete_type, ingest_worksheet)
         header_counter = {}
         for header in column_headers:
             if not header_counter.get(header):
@@ -50,7 +76,7 @@ class TemplateManager:
             cell_conversions.append(strategy)
 
         default_values = None
-        if not ingest_worksheet.is_module_tab():
+        if not is_module_tab:
             default_values = self._define_default_values(concrete_type)
 
         return RowTemplate(domain_type, concrete_type, cell_conversions,
@@ -132,9 +158,8 @@ class TemplateManager:
         return self.get_domain_type(concrete_type)
 
     def lookup(self, header_name):
-        try:
-            spec = self.template.lookup_property_from_template(header_name)
-        except UnknownKeySchemaException:
+        spec = self.template.find_property_in_template(header_name)
+        if not spec:
             self.logger.warning(f'UnknownKeySchemaException: Could not lookup {header_name} in template.')
             return {}
 
@@ -154,37 +179,103 @@ def build(schemas, ingest_api) -> TemplateManager:
     return template_mgr
 
 
+class RowTemplateCache:
+    """
+    Keeps the most recently used RowTemplates by schema urls, concrete type, module context and column headers, so that
+    worksheets with the same layout, imported with the same schemas, reuse the cell conversions of the first one.
+    Counts the lookups served from the cache (hits), those which were not (misses) and the templates evicted to keep
+    at most max_size of them.
+    """
+
+    def __init__(self, max_size=ROW_TEMPLATE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._row_templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key) -> 'RowTemplate':
+        with self._lock:
+            row_template = self._row_templates.get(key)
+            if row_template is None:
+                self.misses += 1
+                return None
+            self._row_templates.move_to_end(key)
+            self.hits += 1
+            return row_template
+
+    def put(self, key, row_template: 'RowTemplate'):
+        with self._lock:
+            self._row_templates[key] = row_template
+            self._row_templates.move_to_end(key)
+            while len(self._row_templates) > self.max_size:
+                self._row_templates.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._row_templates.clear()
+
+    def __len__(self):
+        return len(self._row_templates)
+
+    def __repr__(self):
+        return f'RowTemplateCache(size={len(self)}, hits={self.hits}, misses={self.misses}, ' \
+               f'hit_rate={self.hit_rate:.2%}, evictions={self.evictions})'
+
+
+def get_default_row_template_cache() -> RowTemplateCache:
+    """The row template cache shared by every TemplateManager of the process, i.e. by every import it runs."""
+    global _default_row_template_cache
+    if _default_row_template_cache is None:
+        _default_row_template_cache = RowTemplateCache()
+    return _default_row_template_cache
+
+
 class RowTemplate:
     def __init__(self, domain_type, object_type, cell_conversions, default_values=None):
         self.domain_type = domain_type
         self.concrete_type = object_type
         self.cell_conversions = cell_conversions
         self.default_values = copy.deepcopy(default_values) if default_values else {}
+        # the columns of the sheet that are converted, with their index, columns which are not are never looked at
+        self._conversion_plan = [(index, conversion) for index, conversion in enumerate(cell_conversions)
+                                 if not isinstance(conversion, conversion_strategy.DoNothing)]
 
     def do_import(self, row: IngestRow, is_module=False):
         row_errors = []
         metadata = MetadataEntity(domain_type=self.domain_type, concrete_type=self.concrete_type,
                                   content=self.default_values, row=row, is_module=is_module)
-        for index, cell in enumerate(row.values):
-            if cell.value is None:
+        values = row.values
+        value_count = len(values)
+        for index, conversion in self._conversion_plan:
+            if index >= value_count:
+                break
+            value = values[index]
+            if value is None:
                 continue
-            conversion: CellConversion = self.cell_conversions[index]
             try:
-                conversion.apply(metadata, cell.value)
+                conversion.apply(metadata, value)
             except ValueError as e:
                 error_detail = f'Could not convert to {conversion.converter.type().value} ' \
-                               f'from: {type(cell.value).__name__} {cell.value}'
-                if type(cell.value) == float:
+                               f'from: {type(value).__name__} {value}'
+                if isinstance(value, float):
                     error_detail += " This may be because the default excel number format is float."
 
                 row_errors.append({
-                    "location": f'column={index}, value={cell.value}',
+                    "location": f'column={index}, value={value}',
                     "type": "Conversion Error",
                     "detail": error_detail
                 })
             except Exception as e:
                 row_errors.append({
-                    "location": f'column={index}, value={cell.value}',
+                    "location": f'column={index}, value={value}',
                     "type": e.__class__.__name__,
                     "detail": str(e)
                 })
@@ -8,21 +8,23 @@ class DataNode:
     def __init__(self, defaults={}):
         self.node = copy.deepcopy(defaults)
 
+    # keys are either a dotted field chain, e.g. 'organ.ontology', or a tuple of fields already split, which spares
+    # splitting the same chain for every row
     def __setitem__(self, key, value):
-        field_chain = key.split(FIELD_SEPARATOR)
+        field_chain = key if isinstance(key, tuple) else key.split(FIELD_SEPARATOR)
         target_node = self._determine_node(field_chain)
         target_node[field_chain[-1]] = value
 
     def _determine_node(self, field_chain):
         current_node = self.node
-        for field in field_chain[:len(field_chain) - 1]:
+        for field in field_chain[:-1]:
             if field not in current_node:
                 current_node[field] = {}
             current_node = current_node[field]
         return current_node
 
     def __getitem__(self, key):
-        field_chain = key.split(FIELD_SEPARATOR)
+        field_chain = key if isinstance(key, tuple) else key.split(FIELD_SEPARATOR)
         current_node = self.node.get(field_chain[0])
         for field in field_chain[1:]:
             if current_node is None:
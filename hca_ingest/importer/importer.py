@@ -1,4 +1,7 @@
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from typing import Tuple, List
 
 from openpyxl import Workbook
@@ -8,14 +11,15 @@ from hca_ingest.api.ingestapi import IngestApi
 from hca_ingest.importer.conversion import template_manager
 from hca_ingest.importer.conversion.metadata_entity import MetadataEntity
 from hca_ingest.importer.conversion.template_manager import TemplateManager
-from hca_ingest.importer.spreadsheet.ingest_workbook import IngestWorkbook
-from hca_ingest.importer.spreadsheet.ingest_worksheet import IngestWorksheet
+from hca_ingest.importer.spreadsheet.csv_bundle_reader import is_csv_bundle
+from hca_ingest.importer.spreadsheet.ingest_workbook import IngestWorkbook, OPENPYXL_READER, CSV_BUNDLE_READER
+from hca_ingest.importer.spreadsheet.ingest_worksheet import IngestWorksheet, MaxRowExceededError
 from hca_ingest.importer.submission.entity_linker import EntityLinker
 from hca_ingest.importer.submission.entity_map import EntityMap
 from hca_ingest.importer.submission.ingest_submitter import IngestSubmitter
 from hca_ingest.importer.submission.submission import Submission
 from hca_ingest.template.exceptions import UnknownKeySchemaException
-from hca_ingest.utils.IngestError import ImporterError, ParserError
+from hca_ingest.utils.IngestError import ImporterError, ParserError, SubmissionError
 
 format = '%(asctime)s - %(name)s %(levelname)s [%(filename)s:%(lineno)s - %(funcName)20s() ] %(message)s'
 logging.basicConfig(format=format)
@@ -25,16 +29,30 @@ class XlsImporter:
     """
     XlsImporter is used to convert a contributor's spreadsheet into metadata json entities and to submit those to
     Ingest. Please see https://github.com/HumanCellAtlas/ingest-central/wiki/Data-Contributors-Spreadsheet-Quick-Guide
-    for more information on the spreadsheet format.
+    for more information on the spreadsheet format. The file can also be a directory or zip file of csv/tsv files, one
+    per worksheet, see hca_ingest.importer.spreadsheet.csv_bundle_reader.
+
+    Given a checkpoint_dir, the work done in each submission is journaled there until the import is complete, so
+    that importing the file again into a submission after a failed import carries on from where it stopped.
+
+    max_workers (threads submitting to Ingest) and max_processes (forked processes converting the worksheets) cannot
+    both be more than 1: forking while other threads are running can leave a lock held forever in the child.
     """
 
-    def __init__(self, ingest_api: IngestApi):
+    def __init__(self, ingest_api: IngestApi, max_workers: int = 1, max_processes: int = 1,
+                 workbook_reader: str = OPENPYXL_READER, checkpoint_dir: str = None):
+        if max_workers > 1 and max_processes > 1:
+            raise ValueError('max_workers and max_processes cannot both be more than 1, the worksheets are converted '
+                             'in forked processes which is not safe while other threads are running')
         self.ingest_api = ingest_api
         self.logger = logging.getLogger(__name__)
-        self.submitter = IngestSubmitter(self.ingest_api)
+        self.submitter = IngestSubmitter(self.ingest_api, max_workers=max_workers, checkpoint_dir=checkpoint_dir)
+        self.max_processes = max_processes
+        self.workbook_reader = workbook_reader
 
     def generate_json(self, file_path, is_update, project_uuid=None, update_project=False):
-        ingest_workbook = IngestWorkbook.from_file(file_path)
+        reader = CSV_BUNDLE_READER if is_csv_bundle(file_path) else self.workbook_reader
+        ingest_workbook = IngestWorkbook.from_file(file_path, reader=reader)
 
         try:
             template_mgr = template_manager.build(ingest_workbook.get_schemas(), self.ingest_api)
@@ -42,7 +60,7 @@ class XlsImporter:
             raise SchemaRetrievalError(
                 f'There was an error retrieving the schema information to process the spreadsheet. {str(e)}')
 
-        workbook_importer = WorkbookImporter(template_mgr)
+        workbook_importer = WorkbookImporter(template_mgr, max_processes=self.max_processes)
         spreadsheet_json, errors = workbook_importer.do_import(ingest_workbook, is_update, project_uuid, update_project)
 
         return spreadsheet_json, template_mgr, errors
@@ -104,16 +122,26 @@ class XlsImporter:
             self.logger.error(str(e), exc_info=True)
             return None, template_mgr
         finally:
+            # the checkpoint is already removed if the submission was completed
+            self.submitter.close_checkpoint(submission_url)
             self.logger.info(f'Submission in {submission_url} is done!')
             return submission, template_mgr
 
     def _submit_new_entities(self, entity_map, submission_url):
         submission = self.submitter.add_entities(entity_map, submission_url)
+        if submission.errors:
+            self.report_submission_errors(submission_url, submission.errors)
+            return submission
+
         project = entity_map.get_project()
         if project and project.is_new:
             self.submitter.link_submission_to_project(project.uuid, submission_url)
 
         self.submitter.link_entities(entity_map, submission)
+        if submission.errors:
+            self.report_submission_errors(submission_url, submission.errors)
+        else:
+            self.submitter.finish_checkpoint(submission_url)
         return submission
 
     def report_errors(self, submission_url, errors):
@@ -124,10 +152,19 @@ class XlsImporter:
                 ParserError(error["location"], error["type"], error["detail"]).getJSON()
             )
 
+    def report_submission_errors(self, submission_url, errors):
+        self.logger.info(f'Logged {len(errors)} SubmissionErrors.', exc_info=False)
+        for error in errors:
+            self.ingest_api.create_submission_error(submission_url, SubmissionError(str(error)).getJSON())
+
     @staticmethod
     def update_spreadsheet_with_uuids(submission: Submission, template_mgr: TemplateManager, file_path):
         if not submission:
             return
+        if is_csv_bundle(file_path):
+            logging.getLogger(__name__).warning(
+                f'Not adding the entity uuids to {file_path}, only xlsx spreadsheets can be updated.')
+            return
         wb = IngestWorkbook.from_file(file_path, read_only=False)
         wb.add_entity_uuids(submission)
         wb.add_schemas_worksheet(template_mgr.get_schemas())
@@ -237,9 +274,10 @@ class _ImportRegistry:
                 raise LinkToConcreteEntityNotFound(module_entity)
 
     def flatten(self):
+        # the registry is discarded once flattened, so the entities hand their content over without copying it
         flat_map = {}
         for domain_type, type_map in self._submittable_registry.items():
-            flat_type_map = {object_id: metadata.map_for_submission()
+            flat_type_map = {object_id: metadata.map_for_submission(transfer=True)
                              for object_id, metadata in type_map.items()}
             flat_map[domain_type] = flat_type_map
         return flat_map
@@ -250,9 +288,16 @@ class _ImportRegistry:
 
 
 class WorkbookImporter:
-    def __init__(self, template_mgr):
+    def __init__(self, template_mgr, max_processes: int = 1):
+        """
+        :param max_processes: when more than 1, the rows of the worksheets are converted in a pool of up to this many
+        processes. The results are still merged in worksheet order, so the output is the same as a sequential import.
+        The processes are forked, so this must not be used while the process runs other threads, e.g. along with an
+        IngestSubmitter with max_workers more than 1.
+        """
         self.worksheet_importer = WorksheetImporter(template_mgr)
         self.template_mgr = template_mgr
+        self.max_processes = max_processes
         self.logger = logging.getLogger(__name__)
 
     def do_import(self, workbook: IngestWorkbook, is_update, project_uuid=None, update_project=False,
@@ -268,12 +313,15 @@ class WorkbookImporter:
 
         importable_worksheets = [ws for ws in importable_worksheets]
 
-        for worksheet in importable_worksheets:
-            try:
-                self._import_worksheet(project_uuid, registry, update_project, workbook_errors, worksheet)
-            except Exception as e:
-                workbook_errors.append(
-                    {"location": f'sheet={worksheet.title}', "type": e.__class__.__name__, "detail": str(e)})
+        with ExitStack() as stack:
+            conversions = self._convert_worksheets(workbook, importable_worksheets, stack)
+            for worksheet, conversion in zip(importable_worksheets, conversions):
+                try:
+                    self._import_worksheet(project_uuid, registry, update_project, workbook_errors, worksheet,
+                                           conversion)
+                except Exception as e:
+                    workbook_errors.append(
+                        {"location": f'sheet={worksheet.title}', "type": e.__class__.__name__, "detail": str(e)})
 
         if not registry.has_project() and not project_uuid:
             e = NoProjectFound()
@@ -291,9 +339,31 @@ class WorkbookImporter:
 
         return registry.flatten(), workbook_errors
 
-    def _import_worksheet(self, project_uuid, registry, update_project, workbook_errors, worksheet):
+    def _convert_worksheets(self, workbook: IngestWorkbook, worksheets: List[IngestWorksheet], stack: ExitStack):
+        """
+        Returns one callable per worksheet which returns the converted entities and errors of that worksheet. The
+        conversion either happens when the callable is called or has already been started in a process pool.
+        Identifiers of entities without one are only generated when the callable is called, so that they are given
+        in worksheet order whichever way the rows were converted.
+        """
+        if self.max_processes <= 1 or len(worksheets) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            return [lambda worksheet=worksheet: self.worksheet_importer.do_import(worksheet)
+                    for worksheet in worksheets]
+
+        # forked workers inherit the template and the workbook, so neither needs to be pickled
+        executor = stack.enter_context(ProcessPoolExecutor(
+            max_workers=min(self.max_processes, len(worksheets)),
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worksheet_worker,
+            initargs=(self.worksheet_importer, workbook)
+        ))
+        futures = [executor.submit(_import_worksheet_in_worker, worksheet.title) for worksheet in worksheets]
+        return [lambda future=future: self.worksheet_importer.generate_missing_ids(*future.result())
+                for future in futures]
+
+    def _import_worksheet(self, project_uuid, registry, update_project, workbook_errors, worksheet, conversion):
         self.sheet_in_schemas(worksheet)
-        metadata_entities, worksheet_errors = self.worksheet_importer.do_import(worksheet)
+        metadata_entities, worksheet_errors = conversion()
         module_field_name = worksheet.get_module_field_name()
         workbook_errors.extend(worksheet_errors)
 
@@ -386,7 +456,7 @@ class WorksheetImporter:
         self.logger = logging.getLogger(__name__)
         self.concrete_entity = None
 
-    def do_import(self, ingest_worksheet: IngestWorksheet):
+    def do_import(self, ingest_worksheet: IngestWorksheet, generate_ids=True):
         records = []
         worksheet_errors = []
         try:
@@ -400,15 +470,32 @@ class WorksheetImporter:
                     else:
                         error["location"] = f'sheet={ingest_worksheet.title} row={index}'
                     worksheet_errors.append(error)
-                if not metadata.object_id:
-                    metadata.object_id = self._generate_id()
                 records.append(metadata)
+        except MaxRowExceededError as e:
+            # rows are converted as they are read, those before the limit was reached are dropped with their errors
+            # so that the sheet is rejected as a whole
+            records = []
+            worksheet_errors = [{
+                "location": f'sheet={ingest_worksheet.title}',
+                "type": e.__class__.__name__,
+                "detail": str(e)
+            }]
         except Exception as e:
             worksheet_errors.append({
                 "location": f'sheet={ingest_worksheet.title}',
                 "type": e.__class__.__name__,
                 "detail": str(e)
             })
+        # identifiers are only generated for the records which are kept, as they are when the rows are converted in
+        # another process, so that the following sheets get the same identifiers either way
+        if generate_ids:
+            self.generate_missing_ids(records, worksheet_errors)
+        return records, worksheet_errors
+
+    def generate_missing_ids(self, records, worksheet_errors):
+        for metadata in records:
+            if not metadata.object_id:
+                metadata.object_id = self._generate_id()
         return records, worksheet_errors
 
     def _generate_id(self):
@@ -416,6 +503,23 @@ class WorksheetImporter:
         return f'{self.UNKNOWN_ID_PREFIX}{self.unknown_id_ctr}'
 
 
+_worker_worksheet_importer = None
+_worker_workbook = None
+
+
+def _init_worksheet_worker(worksheet_importer: WorksheetImporter, workbook: IngestWorkbook):
+    global _worker_worksheet_importer, _worker_workbook
+    _worker_worksheet_importer = worksheet_importer
+    # a workbook read from a file is opened again so that the worker does not share the file handle of the parent
+    _worker_workbook = IngestWorkbook.from_file(workbook.file_path, reader=workbook.reader) \
+        if workbook.file_path else workbook
+
+
+def _import_worksheet_in_worker(worksheet_title):
+    worksheet = IngestWorksheet(_worker_workbook.workbook[worksheet_title])
+    return _worker_worksheet_importer.do_import(worksheet, generate_ids=False)
+
+
 class MultipleProjectsFound(Exception):
     def __init__(self):
         message = f'The spreadsheet should only be associated to a single project.'
@@ -0,0 +1,111 @@
+"""
+A read only backend for IngestWorkbook which reads a bundle of csv or tsv files, one per worksheet, from a directory or
+a zip file. Each file is named after its worksheet, e.g. `Donor organism.csv` or `Schemas.tsv`, and follows the same
+layout as a worksheet of the spreadsheet: the programmatic headers in row 4 and the data from row 6. The Schemas file
+lists the schema urls from row 2, as the Schemas worksheet does.
+
+Worksheets are ordered by file name. The files are read a row at a time so their size is not bound by memory, values
+are the strings of the file with empty fields read as None.
+"""
+import csv
+import io
+import os
+import zipfile
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+CSV_EXTENSIONS = {'.csv': ',', '.tsv': '\t'}
+ENCODING = 'utf-8-sig'
+
+
+def is_csv_bundle(path) -> bool:
+    return os.path.isdir(path) or (zipfile.is_zipfile(path) and _is_csv_zip(path))
+
+
+def load_csv_bundle(path) -> 'CsvBundle':
+    if os.path.isdir(path):
+        file_names = [name for name in os.listdir(path) if _get_delimiter(name)]
+        return CsvBundle([CsvWorksheet(_get_title(name), _FileSource(os.path.join(path, name)))
+                          for name in sorted(file_names)])
+    with zipfile.ZipFile(path) as archive:
+        member_names = [name for name in archive.namelist() if _get_delimiter(name) and not name.endswith('/')]
+    return CsvBundle([CsvWorksheet(_get_title(name), _ZipMemberSource(path, name))
+                      for name in sorted(member_names, key=os.path.basename)])
+
+
+class CsvBundle:
+    """The subset of the openpyxl Workbook interface used to read a workbook, backed by CsvWorksheets."""
+
+    def __init__(self, worksheets: List['CsvWorksheet']):
+        self.worksheets = worksheets
+
+    @property
+    def sheetnames(self):
+        return [worksheet.title for worksheet in self.worksheets]
+
+    def __getitem__(self, title):
+        for worksheet in self.worksheets:
+            if worksheet.title == title:
+                return worksheet
+        raise KeyError(f'Worksheet {title} does not exist.')
+
+
+class CsvWorksheet:
+    """The subset of the openpyxl Worksheet interface used to read a worksheet, only rows of values are supported."""
+
+    def __init__(self, title, source):
+        self.title = title
+        self._source = source
+
+    @property
+    def max_row(self):
+        # the number of rows is only known once the file has been read, rows are read up to the end of the file
+        return None
+
+    def calculate_dimension(self, force=False):
+        pass
+
+    def iter_rows(self, min_row=1, max_row=None, values_only=True) -> Iterator[Tuple]:
+        if not values_only:
+            raise ValueError('CsvWorksheet only reads values, there are no cells in a csv file.')
+        min_row = min_row or 1
+        with self._source.open() as text:
+            reader = csv.reader(text, delimiter=_get_delimiter(self._source.name))
+            for row_number, row in enumerate(reader, start=1):
+                if max_row is not None and row_number > max_row:
+                    return
+                if row_number >= min_row:
+                    yield tuple(value if value != '' else None for value in row)
+
+
+class _FileSource:
+    def __init__(self, path):
+        self.name = path
+
+    def open(self):
+        return open(self.name, encoding=ENCODING, newline='')
+
+
+class _ZipMemberSource:
+    def __init__(self, zip_path, member_name):
+        self.zip_path = zip_path
+        self.name = member_name
+
+    @contextmanager
+    def open(self):
+        # every reader opens the zip file itself so that worksheets can be read by several processes at once
+        with zipfile.ZipFile(self.zip_path) as archive, archive.open(self.name) as member:
+            yield io.TextIOWrapper(member, encoding=ENCODING, newline='')
+
+
+def _get_title(file_name):
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def _get_delimiter(file_name):
+    return CSV_EXTENSIONS.get(os.path.splitext(file_name)[1].lower())
+
+
+def _is_csv_zip(path):
+    with zipfile.ZipFile(path) as archive:
+        return any(_get_delimiter(name) for name in archive.namelist())
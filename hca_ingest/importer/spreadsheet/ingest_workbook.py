@@ -2,22 +2,42 @@ from typing import List
 
 from openpyxl import Workbook, load_workbook
 
+from hca_ingest.importer.spreadsheet.csv_bundle_reader import load_csv_bundle
 from hca_ingest.importer.spreadsheet.ingest_worksheet import IngestWorksheet
+from hca_ingest.importer.spreadsheet.xlsx_stream_reader import load_stream_workbook
 from hca_ingest.importer.submission.submission import Submission
 
 SCHEMAS_WORKSHEET = 'Schemas'
 SPECIAL_TABS = [SCHEMAS_WORKSHEET]
 
+OPENPYXL_READER = 'openpyxl'
+XLSX_STREAM_READER = 'xlsx_stream'
+CSV_BUNDLE_READER = 'csv_bundle'
+
 
 class IngestWorkbook:
 
-    def __init__(self, workbook: Workbook):
+    def __init__(self, workbook: Workbook, file_path=None, reader=OPENPYXL_READER):
         self.workbook = workbook
+        self.file_path = file_path
+        self.reader = reader
 
     @classmethod
-    def from_file(cls, file_path, read_only=True) -> 'IngestWorkbook':
+    def from_file(cls, file_path, read_only=True, reader=OPENPYXL_READER) -> 'IngestWorkbook':
+        """
+        :param reader: OPENPYXL_READER loads the workbook with openpyxl. XLSX_STREAM_READER parses the sheets
+        directly into rows of values, which is faster for large sheets, but the workbook can then only be read.
+        CSV_BUNDLE_READER reads a directory or zip file of csv/tsv files, one per worksheet, which can only be read.
+        """
+        if reader in (XLSX_STREAM_READER, CSV_BUNDLE_READER):
+            if not read_only:
+                raise ValueError(f'The {reader} reader can only read workbooks.')
+            load = load_stream_workbook if reader == XLSX_STREAM_READER else load_csv_bundle
+            return cls(load(file_path), file_path, reader)
+        if reader != OPENPYXL_READER:
+            raise ValueError(f'Unknown workbook reader: {reader}')
         workbook = load_workbook(filename=file_path, read_only=read_only)
-        return cls(workbook)
+        return cls(workbook, file_path, reader)
 
     def get_worksheet(self, worksheet_title):
         if worksheet_title in self.workbook.sheetnames:
@@ -49,9 +69,8 @@ class IngestWorkbook:
         if not worksheet:
             return schemas
 
-        for row in worksheet.iter_rows(min_row=2, max_row=worksheet.max_row):
-            schema_cell = row[0]
-            schemas.append(schema_cell.value)
+        for row in worksheet.iter_rows(min_row=2, max_row=worksheet.max_row, values_only=True):
+            schemas.append(row[0])
         return schemas
 
     def importable_worksheets(self):
@@ -68,16 +87,17 @@ class IngestWorkbook:
 
             if not worksheets.get(worksheet_title):
                 worksheet = self.workbook[worksheet_title]
-                ingest_worksheet = IngestWorksheet(worksheet=worksheet)
-                worksheets[worksheet_title] = ingest_worksheet
+                worksheets[worksheet_title] = IngestWorksheet(worksheet=worksheet)
+            ingest_worksheet = worksheets[worksheet_title]
 
             column_header = f'{entity.concrete_type}.uuid'
 
-            if column_header not in ingest_worksheet.get_column_headers():
+            uuid_col_idx = ingest_worksheet.get_column_index(column_header)
+            if uuid_col_idx is None:
                 ingest_worksheet.insert_column_with_header(column_header, col_idx)
+                uuid_col_idx = col_idx
 
-            ingest_worksheet = worksheets.get(worksheet_title)
-            ingest_worksheet.cell(row=row_index, column=col_idx).value = entity.uuid
+            ingest_worksheet.cell(row=row_index, column=uuid_col_idx).value = entity.uuid
 
     def add_schemas_worksheet(self, schemas):
         if SCHEMAS_WORKSHEET not in self.workbook.sheetnames:
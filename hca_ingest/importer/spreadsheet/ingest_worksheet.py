@@ -15,43 +15,72 @@ class IngestWorksheet(object):
     def __init__(self, worksheet: Worksheet, header_row_idx=HEADER_ROW_IDX):
         self._worksheet = worksheet
         self._header_row_idx = header_row_idx
+        self._column_headers = None
+        self._header_columns = None
 
     @staticmethod
     def is_empty(row):
-        return all(cell.value is None for cell in row)
+        return all(value is None for value in row)
 
     @property
     def title(self):
         return self._worksheet.title
 
     def has_column(self, column_name):
-        if column_name in self.get_column_headers():
-            return True
-        return False
+        return column_name in self._get_header_columns()
 
     def get_column_headers(self):
-        rows = self._worksheet.iter_rows(min_row=self._header_row_idx, max_row=self._header_row_idx)
+        """
+        The non-blank headers of the worksheet in column order. The header row is only read the first time, the same
+        list is returned until a column is inserted with insert_column_with_header, so callers must not modify it.
+        """
+        if self._column_headers is None:
+            self._read_header_row()
+        return self._column_headers
+
+    def get_column_index(self, column_name):
+        """The 1-based index of the first column with the given header, or None when there is no such column."""
+        return self._get_header_columns().get(column_name)
+
+    def _get_header_columns(self):
+        if self._header_columns is None:
+            self._read_header_row()
+        return self._header_columns
+
+    def _read_header_row(self):
+        rows = self._worksheet.iter_rows(min_row=self._header_row_idx, max_row=self._header_row_idx, values_only=True)
         header_row = next(rows)
 
         headers = []
-        for cell in header_row:
-            if cell.value is None:
+        header_columns = {}
+        for col_idx, value in enumerate(header_row, start=1):
+            if value is None:
                 continue
 
-            cell_value = cell.value.strip()
+            cell_value = value.strip()
             headers.append(cell_value)
+            header_columns.setdefault(cell_value, col_idx)
 
-        return headers
+        self._column_headers = headers
+        self._header_columns = header_columns
 
     def get_data_rows(self, start_row=START_DATA_ROW, end_row=None):
-        headers = self.get_column_headers()
+        """
+        Yields the non-empty data rows of the worksheet one at a time, so that each row can be converted before the
+        next one is read. MaxRowExceededError is raised as soon as the sheet is found to have more than MAX_ROW_LIMIT
+        data rows.
+        """
+        column_count = len(self.get_column_headers())
         max_row = end_row or self.compute_max_row()
-        rows = self._worksheet.iter_rows(min_row=start_row, max_row=max_row)
-        rows = [row[:len(headers)] for row in rows if not self.is_empty(row)]
-        if len(rows) > MAX_ROW_LIMIT:
-            raise MaxRowExceededError(f'Maximum row limit ({MAX_ROW_LIMIT}) exceeded in sheet: {self.title}')
-        rows = [IngestRow(self._worksheet.title, START_DATA_ROW + index, row) for index, row in enumerate(rows)]
-        return rows
+        rows = self._worksheet.iter_rows(min_row=start_row, max_row=max_row, values_only=True)
+        row_count = 0
+        for row in rows:
+            if self.is_empty(row):
+                continue
+            if row_count == MAX_ROW_LIMIT:
+                raise MaxRowExceededError(f'Maximum row limit ({MAX_ROW_LIMIT}) exceeded in sheet: {self.title}')
+            yield IngestRow(self._worksheet.title, START_DATA_ROW + row_count, row[:column_count])
+            row_count += 1
 
     # NOTE: there are no tests around this because it's too complicated to
     # setup the scenario where the worksheet returns an erroneous max_row value
@@ -76,6 +105,8 @@ class IngestWorksheet(object):
     def insert_column_with_header(self, header, col_idx):
         self._worksheet.insert_cols(col_idx)
         self._worksheet.cell(row=self._header_row_idx, column=col_idx).value = header
+        self._column_headers = None
+        self._header_columns = None
 
     def cell(self, row, column):
         return self._worksheet.cell(row=row, column=column)
@@ -88,6 +119,9 @@ class IngestWorksheet(object):
 
 
 class IngestRow(object):
+    """A data row of a worksheet, values holds the plain cell values of the row in column order."""
+    __slots__ = ('values', 'index', 'worksheet_title')
+
     def __init__(self, worksheet_title, index, values):
         self.values = values or []
         self.index = index or None  # starts at 1
@@ -0,0 +1,215 @@
+"""
+A read only xlsx backend for IngestWorkbook which parses the sheet xml directly and yields rows as tuples of plain
+values, without creating a cell object per value as openpyxl does.
+
+The workbook level parts, i.e. the sheet names, the shared strings, the date styles and the epoch, are still read by
+openpyxl's read only loader, and cells are converted as openpyxl's worksheet parser does, so values come out the same
+as `iter_rows(values_only=True)` of a workbook loaded by openpyxl: shared and inline strings, numbers as int or float,
+booleans, dates as datetimes, durations as timedeltas and formulas as their text prefixed with '=', the cells sharing
+the formula of another cell included. Read only openpyxl 3.0 workbooks differ in one way, they read durations as
+datetimes.
+
+Writing is not supported, workbooks which are modified, e.g. to add entity uuids, are still loaded with openpyxl.
+
+The private attributes of openpyxl's read only worksheet and workbook are used to get at the sheet xml and the
+workbook parts, which is why openpyxl is pinned to 3.0.x in requirements.in.
+"""
+from typing import Iterator, Optional, Tuple
+from warnings import warn
+from xml.etree.ElementTree import Element, iterparse
+
+from openpyxl import load_workbook
+from openpyxl.formula.translate import Translator
+from openpyxl.utils.cell import column_index_from_string, get_column_letter
+from openpyxl.utils.datetime import from_excel, from_ISO8601
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+from openpyxl.xml.constants import SHEET_MAIN_NS
+
+_ROW_TAG = f'{{{SHEET_MAIN_NS}}}row'
+_VALUE_TAG = f'{{{SHEET_MAIN_NS}}}v'
+_FORMULA_TAG = f'{{{SHEET_MAIN_NS}}}f'
+_INLINE_STRING_TAG = f'{{{SHEET_MAIN_NS}}}is'
+_TEXT_TAG = f'{{{SHEET_MAIN_NS}}}t'
+_DIGITS = '0123456789'
+
+
+def load_stream_workbook(file_path) -> 'StreamWorkbook':
+    return StreamWorkbook(load_workbook(filename=file_path, read_only=True))
+
+
+class StreamWorkbook:
+    """The subset of the openpyxl Workbook interface used to read a workbook, backed by StreamWorksheets."""
+
+    def __init__(self, workbook):
+        self._workbook = workbook
+        self.worksheets = [StreamWorksheet(worksheet) for worksheet in workbook.worksheets]
+
+    @property
+    def sheetnames(self):
+        return [worksheet.title for worksheet in self.worksheets]
+
+    def __getitem__(self, title):
+        for worksheet in self.worksheets:
+            if worksheet.title == title:
+                return worksheet
+        raise KeyError(f'Worksheet {title} does not exist.')
+
+    def close(self):
+        self._workbook.close()
+
+
+class StreamWorksheet:
+    """The subset of the openpyxl Worksheet interface used to read a worksheet, only rows of values are supported."""
+
+    def __init__(self, worksheet: ReadOnlyWorksheet):
+        self._worksheet = worksheet
+        self._column_indexes = {}
+
+    @property
+    def title(self):
+        return self._worksheet.title
+
+    @property
+    def max_row(self):
+        return self._worksheet.max_row
+
+    @property
+    def max_column(self):
+        return self._worksheet.max_column
+
+    def calculate_dimension(self, force=False):
+        """Finds the size of a sheet whose xml has no dimension element, without converting any of its values."""
+        max_row = max_column = 0
+        for max_row, element in self._iter_row_elements():
+            if len(element):
+                last_reference = element[-1].get('r')
+                column = self._get_column_index(last_reference) if last_reference else len(element)
+                max_column = max(max_column, column)
+        self._worksheet._max_row = max_row
+        self._worksheet._max_column = max_column
+
+    def iter_rows(self, min_row=1, max_row=None, values_only=True) -> Iterator[Tuple]:
+        """
+        Yields a tuple of values for every row from min_row up to max_row or the last row of the sheet, whichever
+        comes first. Rows are padded with None to the width of the sheet, including the rows missing from the xml.
+        """
+        if not values_only:
+            raise ValueError('StreamWorksheet only reads values, use the openpyxl reader for cells.')
+        min_row = min_row or 1
+        width = self.max_column or 0
+        empty_row = (None,) * width
+        next_row = min_row
+        for row_number, row in self._iter_parsed_rows():
+            if max_row is not None and row_number > max_row:
+                while next_row <= max_row:
+                    next_row += 1
+                    yield empty_row
+                return
+            if row_number < min_row:
+                continue
+            while next_row < row_number:
+                next_row += 1
+                yield empty_row
+            if len(row) < width:
+                row.extend([None] * (width - len(row)))
+            next_row += 1
+            yield tuple(row)
+
+    def _iter_parsed_rows(self) -> Iterator[Tuple[int, list]]:
+        workbook = self._worksheet.parent
+        context = _ParseContext(self._worksheet._shared_strings, workbook._date_formats,
+                                workbook._timedelta_formats, workbook.epoch)
+        column_indexes = self._column_indexes
+        for row_number, element in self._iter_row_elements():
+            row = []
+            for cell in element:
+                reference = cell.get('r')
+                if reference:
+                    column = column_indexes.get(reference.rstrip(_DIGITS)) or self._get_column_index(reference)
+                    if column > len(row) + 1:
+                        row.extend([None] * (column - len(row) - 1))
+                else:
+                    reference = f'{get_column_letter(len(row) + 1)}{row_number}'
+                row.append(self._parse_value(cell, reference, context))
+            yield row_number, row
+
+    def _iter_row_elements(self) -> Iterator[Tuple[int, Element]]:
+        source = self._worksheet._get_source()
+        try:
+            row_number = 0
+            for _, element in iterparse(source):
+                if element.tag != _ROW_TAG:
+                    continue
+                row_reference = element.get('r')
+                row_number = int(row_reference) if row_reference else row_number + 1
+                yield row_number, element
+                # drop the cells of the row once they have been read, the rows are never revisited
+                element.clear()
+        finally:
+            source.close()
+
+    def _get_column_index(self, reference: str) -> int:
+        letters = reference.rstrip(_DIGITS)
+        column = self._column_indexes.get(letters)
+        if column is None:
+            column = self._column_indexes[letters] = column_index_from_string(letters)
+        return column
+
+    @staticmethod
+    def _parse_value(cell, reference, context: '_ParseContext') -> Optional[object]:
+        data_type = cell.get('t', 'n')
+        if data_type == 'inlineStr':
+            inline_string = cell.find(_INLINE_STRING_TAG)
+            if inline_string is None:
+                return None
+            return ''.join(text.text or '' for text in inline_string.iter(_TEXT_TAG))
+
+        formula = cell.find(_FORMULA_TAG)
+        if formula is not None:
+            return context.parse_formula(formula, reference)
+        value = cell.findtext(_VALUE_TAG) or None
+        if value is None:
+            return None
+        if data_type == 's':
+            return context.shared_strings[int(value)]
+        if data_type == 'n':
+            number = float(value) if '.' in value or 'E' in value or 'e' in value else int(value)
+            style = cell.get('s')
+            if style and int(style) in context.date_formats:
+                return context.parse_date(number, int(style), reference)
+            return number
+        if data_type == 'b':
+            return bool(int(value))
+        if data_type == 'd':
+            return from_ISO8601(value)
+        return value
+
+
+class _ParseContext:
+    """What converting the cells of a sheet needs from the workbook, and the shared formulas of the sheet so far."""
+
+    def __init__(self, shared_strings, date_formats, timedelta_formats, epoch):
+        self.shared_strings = shared_strings
+        self.date_formats = date_formats
+        self.timedelta_formats = timedelta_formats
+        self.epoch = epoch
+        self.shared_formulas = {}
+
+    def parse_formula(self, formula: Element, reference: str) -> str:
+        value = f'={formula.text or ""}'
+        if formula.get('t') == 'shared':
+            index = formula.get('si')
+            # the first cell of a shared formula has its text, the others are translated from it
+            if index in self.shared_formulas:
+                return self.shared_formulas[index].translate_formula(reference)
+            if value != '=':
+                self.shared_formulas[index] = Translator(value, reference)
+        return value
+
+    def parse_date(self, number, style: int, reference: str):
+        try:
+            return from_excel(number, self.epoch, timedelta=style in self.timedelta_formats)
+        except (OverflowError, ValueError):
+            warn(f'Cell {reference} is marked as a date but the serial value {number} is outside the limits for '
+                 f'dates. The cell will be treated as an error.')
+            return '#VALUE!'
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+from hca_ingest.importer.submission.entity import Entity
+from hca_ingest.importer.submission.entity_map import EntityMap
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ImportCheckpoint:
+    """
+    A journal of the work an import has done in a submission: the manifest, the entities created with the links of
+    their ingest json and the links created between them. It is kept in a json lines file named after the submission
+    url so that an import which stopped halfway can be run again into the same submission, and only do what is left.
+
+    Every record is appended and flushed as soon as the work it describes is done. A line left incomplete by a
+    process that was killed while writing it is ignored when the journal is read. The manifest is journaled with a
+    digest of the entities it counts, a journal is only resumed by an import of the same entities.
+    """
+
+    def __init__(self, path: str, submission_url: str):
+        self.path = path
+        self.submission_url = submission_url
+        self.manifest = None
+        self.entity_digest = None
+        self._ingest_json_by_key = {}
+        self._links = set()
+        self._lock = threading.Lock()
+        ends_with_newline = self._read()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._file.tell() == 0:
+            self._write({'submission_url': submission_url})
+        elif not ends_with_newline:
+            # ends the incomplete record so that the next one starts on a line of its own
+            self._file.write('\n')
+
+    @staticmethod
+    def open(checkpoint_dir: str, submission_url: str) -> 'ImportCheckpoint':
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        file_name = hashlib.sha256(submission_url.encode('utf-8')).hexdigest() + '.jsonl'
+        return ImportCheckpoint(os.path.join(checkpoint_dir, file_name), submission_url)
+
+    @staticmethod
+    def entity_key(entity: Entity) -> str:
+        return f'{entity.type}.{entity.id}'
+
+    @staticmethod
+    def digest_entities(entity_map: EntityMap) -> str:
+        keys = sorted(ImportCheckpoint.entity_key(entity) for entity in entity_map.get_new_entities())
+        counts = [entity_map.count_total(), entity_map.count_links()]
+        return hashlib.sha256(json.dumps([keys, counts]).encode('utf-8')).hexdigest()
+
+    @property
+    def entity_count(self) -> int:
+        return len(self._ingest_json_by_key)
+
+    @property
+    def link_count(self) -> int:
+        return len(self._links)
+
+    def get_ingest_json(self, entity: Entity) -> Optional[dict]:
+        return self._ingest_json_by_key.get(self.entity_key(entity))
+
+    def has_link(self, entity: Entity, link: dict) -> bool:
+        return self._get_link_key(self.entity_key(entity), link) in self._links
+
+    def add_manifest(self, manifest: dict, entity_map: EntityMap):
+        self.manifest = manifest
+        self.entity_digest = self.digest_entities(entity_map)
+        self._write({'manifest': manifest, 'entity_digest': self.entity_digest})
+
+    def check_entities(self, entity_map: EntityMap):
+        """Raises a ValueError if the journaled manifest was not defined for the entities of entity_map."""
+        if self.entity_digest != self.digest_entities(entity_map):
+            raise ValueError(f'The import checkpoint {self.path} is for different entities than the ones imported '
+                             f'into {self.submission_url}. Remove it to import into the submission anyway.')
+
+    def add_entity(self, entity: Entity):
+        key = self.entity_key(entity)
+        # the links are all the following imports need to link the entity, its content is not kept
+        ingest_json = {'uuid': entity.ingest_json.get('uuid'), '_links': entity.ingest_json.get('_links')}
+        self._ingest_json_by_key[key] = ingest_json
+        self._write({'entity': key, 'ingest_json': ingest_json})
+
+    def add_link(self, entity: Entity, link: dict):
+        link_key = self._get_link_key(self.entity_key(entity), link)
+        self._links.add(link_key)
+        self._write({'link': list(link_key)})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def remove(self):
+        self.close()
+        os.remove(self.path)
+
+    @staticmethod
+    def _get_link_key(entity_key: str, link: dict) -> tuple:
+        return entity_key, link['relationship'], f'{link["entity"]}.{link["id"]}'
+
+    def _write(self, record: dict):
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def _read(self) -> bool:
+        if not os.path.exists(self.path):
+            return True
+        line = '\n'
+        with open(self.path, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    _LOGGER.warning(f'Ignoring an incomplete record of the import checkpoint {self.path}.')
+                    continue
+                self._read_record(record)
+        _LOGGER.info(f'Resuming the import into {self.submission_url} from {self.path}: {self.entity_count} '
+                     f'entities and {self.link_count} links are already done.')
+        return line.endswith('\n')
+
+    def _read_record(self, record: dict):
+        if 'entity' in record:
+            self._ingest_json_by_key[record['entity']] = record['ingest_json']
+        elif 'link' in record:
+            self._links.add(tuple(record['link']))
+        elif 'manifest' in record:
+            self.manifest = record['manifest']
+            self.entity_digest = record.get('entity_digest')
+        elif record.get('submission_url', self.submission_url) != self.submission_url:
+            raise ValueError(f'The import checkpoint {self.path} is not for the submission {self.submission_url}.')
@@ -1,40 +1,60 @@
 # TODO Check how we can refactor to merge MetadataEntity and Entity
 class Entity(object):
+    # an Entity is created for every row of the spreadsheet and every generated process, so it is slotted and its link
+    # containers, which are empty for most entities, are only allocated once they are used
+    __slots__ = ('type', 'id', 'content', 'ingest_json', 'is_reference', 'is_linking_reference', 'concrete_type',
+                 'spreadsheet_location', '_links_by_entity', '_direct_links', '_external_links', '_linking_details')
+
     def __init__(self, entity_type, entity_id, content, ingest_json=None, links_by_entity=None,
                  direct_links=None, external_links=None, is_reference=False, is_linking_reference=False, linking_details=None, concrete_type=None,
                  spreadsheet_location=None):
         self.type = entity_type
         self.id = entity_id
         self.content = content
-        self._prepare_links_by_entity(links_by_entity)
-        self._prepare_direct_links(direct_links)
-        self._prepare_linking_details(linking_details)
-        self._prepare_external_links(external_links)
+        self._links_by_entity = dict(links_by_entity) if links_by_entity else None
+        self._direct_links = list(direct_links) if direct_links else None
+        self._external_links = dict(external_links) if external_links else None
+        self._linking_details = dict(linking_details) if linking_details else None
         self.ingest_json = ingest_json
         self.is_reference = is_reference  # if entity is in a row and has uuid
         self.is_linking_reference = is_linking_reference  # if the entity uuid is only specified in a linking column
         self.concrete_type = concrete_type
         self.spreadsheet_location = spreadsheet_location
 
-    def _prepare_links_by_entity(self, links_by_entity):
-        self.links_by_entity = {}
-        if links_by_entity is not None:
-            self.links_by_entity.update(links_by_entity)
+    @property
+    def links_by_entity(self) -> dict:
+        if self._links_by_entity is None:
+            self._links_by_entity = {}
+        return self._links_by_entity
+
+    @links_by_entity.setter
+    def links_by_entity(self, links_by_entity: dict):
+        self._links_by_entity = links_by_entity
+
+    @property
+    def direct_links(self) -> tuple:
+        # read only, the links of an entity in an EntityMap are counted by the map as EntityMap.add_direct_link adds them
+        return tuple(self._direct_links) if self._direct_links else ()
+
+    @property
+    def external_links(self) -> dict:
+        if self._external_links is None:
+            self._external_links = {}
+        return self._external_links
 
-    def _prepare_direct_links(self, direct_links):
-        self.direct_links = []
-        if direct_links is not None:
-            self.direct_links.extend(direct_links)
+    @external_links.setter
+    def external_links(self, external_links: dict):
+        self._external_links = external_links
 
-    def _prepare_external_links(self, external_links):
-        self.external_links = {}
-        if external_links is not None:
-            self.external_links.update(external_links)
+    @property
+    def linking_details(self) -> dict:
+        if self._linking_details is None:
+            self._linking_details = {}
+        return self._linking_details
 
-    def _prepare_linking_details(self, linking_details):
-        self.linking_details = {}
-        if linking_details is not None:
-            self.linking_details.update(linking_details)
+    @linking_details.setter
+    def linking_details(self, linking_details: dict):
+        self._linking_details = linking_details
 
     @property
     def uuid(self):
@@ -48,7 +68,30 @@ class Entity(object):
     def is_new(self):
         return not self.is_reference and not self.is_linking_reference
 
+    def iter_links(self):
+        return self._links_by_entity.items() if self._links_by_entity else ()
+
+    def iter_external_links(self):
+        return self._external_links.items() if self._external_links else ()
+
+    def get_links(self, entity_type: str) -> list:
+        return self._links_by_entity.get(entity_type, []) if self._links_by_entity else []
+
+    def get_external_links(self, entity_type: str) -> list:
+        return self._external_links.get(entity_type, []) if self._external_links else []
+
+    def has_direct_links(self) -> bool:
+        return bool(self._direct_links)
+
+    def count_direct_links(self) -> int:
+        return len(self._direct_links) if self._direct_links else 0
+
+    def _add_direct_link(self, link: dict):
+        if self._direct_links is None:
+            self._direct_links = []
+        self._direct_links.append(link)
+
     def add_link(self, type:str, entity_id:str):
         links = self.links_by_entity.get(type, [])
         links.append(entity_id)
-        self.links_by_entity[type] = links
\ No newline at end of file
+        self.links_by_entity[type] = links
@@ -10,23 +10,40 @@ EntityLinker is responsible for converting linking info from spreadsheet to link
 """
 
 
+VALID_SPREADSHEET_LINKS = frozenset([
+    ('biomaterial', 'biomaterial'),
+    ('file', 'biomaterial'),
+    ('file', 'file'),
+    ('biomaterial', 'process'),
+    ('biomaterial', 'protocol'),
+    ('file', 'process'),
+    ('file', 'protocol'),
+])
+
+
 class EntityLinker(object):
 
     def __init__(self, template_manager: TemplateManager, entity_map: EntityMap):
         self.template_manager = template_manager
         self.process_id_ctr = 0
         self.entity_map = entity_map
+        self._process_schema_url = None
 
     def convert_spreadsheet_links_to_ingest_links(self):
-        for entity in list(self.entity_map.get_entities()):
+        # every entity and link is visited once: the external links are loaded first so that the project and the
+        # linked entities are all in the entity map, which is then only read by dictionary lookups
+        entities = list(self.entity_map.get_entities())
+        for entity in entities:
             self._load_external_links_to_entity_map(entity)
+
+        project = self.entity_map.get_project()
+        for entity in entities:
             self._validate_entity_links(entity)
-            self._generate_direct_links(entity)
+            self._generate_direct_links(entity, project)
         return self.entity_map
 
     def _load_external_links_to_entity_map(self, entity: Entity):
-        external_links = entity.external_links
-        for external_link_type, external_link_uuids in external_links.items():
+        for external_link_type, external_link_uuids in entity.iter_external_links():
             for entity_uuid in external_link_uuids:
                 external_link_entity = Entity(entity_type=external_link_type,
                                               entity_id=entity_uuid,
@@ -37,22 +54,17 @@ class EntityLinker(object):
                 self.entity_map.add_entity(external_link_entity)
 
     # direct_links maps to ingest db model
-    def _generate_direct_links(self, entity: Entity):
-        project = self.entity_map.get_project()
-
+    def _generate_direct_links(self, entity: Entity, project: Entity):
         self._link_entity_to_project(entity, project)
         self._link_supplementary_file_to_project(entity, project)
 
-        external_links = entity.external_links or {}
-        links_by_entity = entity.links_by_entity or {}
-
         input_biomaterial_ids = []
-        input_biomaterial_ids.extend(external_links.get('biomaterial', []))
-        input_biomaterial_ids.extend(links_by_entity.get('biomaterial', []))
+        input_biomaterial_ids.extend(entity.get_external_links('biomaterial'))
+        input_biomaterial_ids.extend(entity.get_links('biomaterial'))
 
         input_file_ids = []
-        input_file_ids.extend(external_links.get('file', []))
-        input_file_ids.extend(links_by_entity.get('file', []))
+        input_file_ids.extend(entity.get_external_links('file'))
+        input_file_ids.extend(entity.get_links('file'))
 
         if input_biomaterial_ids or input_file_ids:
             process = self._create_or_get_process(entity)
@@ -64,7 +76,7 @@ class EntityLinker(object):
             self._link_input_files_to_entity(input_file_ids, process)
 
     def _link_entity_as_output_to_process(self, entity: Entity, linking_process: Entity):
-        entity.direct_links.append({
+        self.entity_map.add_direct_link(entity, {
             'entity': linking_process.type,
             'id': linking_process.id,
             'relationship': 'derivedByProcesses'
@@ -73,7 +85,7 @@ class EntityLinker(object):
     def _link_input_files_to_entity(self, linked_file_ids: List[str], linking_process: Entity):
         for linked_file_id in linked_file_ids:
             linked_file_entity = self.entity_map.get_entity('file', linked_file_id)
-            linked_file_entity.direct_links.append({
+            self.entity_map.add_direct_link(linked_file_entity, {
                 'entity': linking_process.type,
                 'id': linking_process.id,
                 'relationship': 'inputToProcesses'
@@ -82,36 +94,33 @@ class EntityLinker(object):
     def _link_input_biomaterials_to_entity(self, linked_biomaterial_ids: List[str], linking_process: Entity):
         for linked_biomaterial_id in linked_biomaterial_ids:
             linked_biomaterial_entity = self.entity_map.get_entity('biomaterial', linked_biomaterial_id)
-            linked_biomaterial_entity.direct_links.append({
+            self.entity_map.add_direct_link(linked_biomaterial_entity, {
                 'entity': linking_process.type,
                 'id': linking_process.id,
                 'relationship': 'inputToProcesses'
             })
 
     def _link_protocols_to_process(self, entity: Entity, process: Entity):
-        links_by_entity = entity.links_by_entity
-        external_links = entity.external_links
-
         protocol_ids = []
-        protocol_ids.extend(external_links.get('protocol', []))
-        protocol_ids.extend(links_by_entity.get('protocol', []))
+        protocol_ids.extend(entity.get_external_links('protocol'))
+        protocol_ids.extend(entity.get_links('protocol'))
 
         for protocol_id in protocol_ids:
-            process.direct_links.append({
+            self.entity_map.add_direct_link(process, {
                 'entity': 'protocol',
                 'id': protocol_id,
                 'relationship': 'protocols'
             })
 
     def _link_process_to_project(self, linking_process: Entity, project: Entity):
-        linking_process.direct_links.append({
+        self.entity_map.add_direct_link(linking_process, {
             'entity': 'project',
             'id': project.id,
             'relationship': 'project',
             'is_collection': False
         })
         # TODO: Remove when process.projects is deprecated
-        linking_process.direct_links.append({
+        self.entity_map.add_direct_link(linking_process, {
             'entity': 'project',
             'id': project.id,
             'relationship': 'projects'
@@ -119,7 +128,7 @@ class EntityLinker(object):
 
     def _link_supplementary_file_to_project(self, entity: Entity, project: Entity):
         if project and entity.concrete_type == 'supplementary_file':
-            project.direct_links.append({
+            self.entity_map.add_direct_link(project, {
                 'entity': 'file',
                 'id': entity.id,
                 'relationship': 'supplementaryFiles'
@@ -127,7 +136,7 @@ class EntityLinker(object):
 
     def _link_entity_to_project(self, entity: Entity, project: Entity):
         if project and entity.type != 'project':
-            entity.direct_links.append({
+            self.entity_map.add_direct_link(entity, {
                 'entity': 'project',
                 'id': project.id,
                 'relationship': 'project',
@@ -136,7 +145,7 @@ class EntityLinker(object):
             # TODO: Remove when biomaterial/process.projects is deprecated
             # https://github.com/ebi-ait/dcp-ingest-central/issues/88
             if entity.type == 'biomaterial' or entity.type == 'process':
-                entity.direct_links.append({
+                self.entity_map.add_direct_link(entity, {
                     'entity': 'project',
                     'id': project.id,
                     'relationship': 'projects'
@@ -146,29 +155,26 @@ class EntityLinker(object):
         if entity.is_reference:
             return
 
-        links_by_entity = entity.links_by_entity
-
-        for link_entity_type, link_entity_ids in links_by_entity.items():
-            for link_entity_id in link_entity_ids:
-                if not link_entity_type == 'process':  # it is expected that no processes are defined in any tab,
-                    # these will be created later
-                    if not self._is_valid_spreadsheet_link(entity.type, link_entity_type):
-                        raise InvalidLinkInSpreadsheet(entity, link_entity_type, link_entity_id)
-                    if not self.entity_map.get_entity(link_entity_type, link_entity_id):
-                        raise LinkedEntityNotFound(entity, link_entity_type, link_entity_id)
-                    if not self.entity_map.get_entity(link_entity_type, link_entity_id):
-                        raise LinkedEntityNotFound(entity, link_entity_type, link_entity_id)
-
-                if link_entity_type == 'process' and not len(link_entity_ids) == 1:
+        for link_entity_type, link_entity_ids in entity.iter_links():
+            if not link_entity_ids:
+                continue
+            if link_entity_type == 'process':
+                # it is expected that no processes are defined in any tab, these will be created later
+                if not len(link_entity_ids) == 1:
                     raise MultipleProcessesFound(entity, link_entity_ids)
+                continue
+            if not self._is_valid_spreadsheet_link(entity.type, link_entity_type):
+                raise InvalidLinkInSpreadsheet(entity, link_entity_type, link_entity_ids[0])
+            for link_entity_id in link_entity_ids:
+                if not self.entity_map.get_entity(link_entity_type, link_entity_id):
+                    raise LinkedEntityNotFound(entity, link_entity_type, link_entity_id)
 
     def _create_or_get_process(self, entity: Entity) -> Entity:
-        external_links = entity.external_links
-        processes = external_links.get('process', [])
+        processes = entity.get_external_links('process')
         external_process_id = processes[0] if len(processes) > 0 else None
 
-        links_by_entity = entity.links_by_entity
-        process_id = links_by_entity['process'][0] if links_by_entity.get('process') else None
+        process_links = entity.get_links('process')
+        process_id = process_links[0] if process_links else None
 
         if not process_id:
             process_id = self._generate_empty_process_id()
@@ -191,22 +197,13 @@ class EntityLinker(object):
 
     @staticmethod
     def _is_valid_spreadsheet_link(from_entity_type, to_entity_type):
-        VALID_ENTITY_LINKS_MAP = [
-            'biomaterial-biomaterial',
-            'file-biomaterial',
-            'file-file',
-            'biomaterial-process',
-            'biomaterial-protocol',
-            'file-process',
-            'file-protocol',
-        ]
-        link_key = from_entity_type + '-' + to_entity_type
-
-        return link_key in VALID_ENTITY_LINKS_MAP
+        return (from_entity_type, to_entity_type) in VALID_SPREADSHEET_LINKS
 
     def _create_process_json(self, process_id: str, linking_details: dict):
         schema_type = 'process'
-        described_by = self.template_manager.get_schema_url(schema_type)
+        if not self._process_schema_url:
+            self._process_schema_url = self.template_manager.get_schema_url(schema_type)
+        described_by = self._process_schema_url
 
         if linking_details:
             if not linking_details.get('process_core'):
@@ -1,4 +1,4 @@
-from typing import List, Iterable
+from typing import List
 
 from hca_ingest.importer.submission.entity import Entity
 
@@ -7,6 +7,9 @@ class EntityMap(object):
 
     def __init__(self, *entities):
         self.entities_dict_by_type = {}
+        # kept up to date as entities and links are added so that the manifest is counted without going through the map
+        self._new_entity_count_by_type = {}
+        self._link_count = 0
         if entities is None:
             return
         for entity in entities:
@@ -48,8 +51,8 @@ class EntityMap(object):
                 yield entity
 
     def get_entity(self, type, id) -> Entity:
-        if self.entities_dict_by_type.get(type) and self.entities_dict_by_type[type].get(id):
-            return self.entities_dict_by_type[type][id]
+        entities_of_type = self.entities_dict_by_type.get(type)
+        return entities_of_type.get(id) if entities_of_type else None
 
     def add_entity(self, entity: Entity):
         entities_of_type = self.entities_dict_by_type.get(entity.type)
@@ -58,15 +61,31 @@ class EntityMap(object):
             entities_of_type = self.entities_dict_by_type.get(entity.type)
 
         existing_entity = self.get_entity(entity.type, entity.id)
-        if existing_entity and existing_entity.is_reference and entity.is_linking_reference:
-            existing_entity.is_linking_reference = True
-        elif existing_entity and existing_entity.is_linking_reference and entity.is_reference:
-            existing_entity.is_reference = entity.is_reference
-            existing_entity.content = entity.content
-        elif existing_entity:
-            entities_of_type[entity.id] = existing_entity
+        if existing_entity:
+            was_new = self._is_counted_as_new(existing_entity)
+            if existing_entity.is_reference and entity.is_linking_reference:
+                existing_entity.is_linking_reference = True
+            elif existing_entity.is_linking_reference and entity.is_reference:
+                existing_entity.is_reference = entity.is_reference
+                existing_entity.content = entity.content
+            self._count_new_entity(existing_entity.type, self._is_counted_as_new(existing_entity) - was_new)
         else:
             entities_of_type[entity.id] = entity
+            self._count_new_entity(entity.type, self._is_counted_as_new(entity))
+            self._link_count += entity.count_direct_links()
+
+    def add_direct_link(self, entity: Entity, link: dict):
+        """Adds a link to the direct links of the entity, links should be added through here to be counted."""
+        entity._add_direct_link(link)
+        if self.get_entity(entity.type, entity.id) is entity:
+            self._link_count += 1
+
+    @staticmethod
+    def _is_counted_as_new(entity: Entity) -> bool:
+        return not (entity.is_reference and entity.is_linking_reference)
+
+    def _count_new_entity(self, entity_type, count):
+        self._new_entity_count_by_type[entity_type] = self._new_entity_count_by_type.get(entity_type, 0) + count
 
     def get_entities(self) -> List[Entity]:
         for entity_type, entities_dict in self.entities_dict_by_type.items():
@@ -79,17 +98,13 @@ class EntityMap(object):
                     yield entity
 
     def get_project(self) -> Entity:
-        project_ids = list(self.entities_dict_by_type.get('project', {}).keys())
-        return self.get_entity('project', project_ids[0]) if project_ids else None
+        return next(iter(self.entities_dict_by_type.get('project', {}).values()), None)
 
     def count_total(self) -> int:
-        return len(list(self.get_entities()))
+        return sum(len(entities_dict) for entities_dict in self.entities_dict_by_type.values())
 
     def count_entities_of_type(self, type) -> int:
-        return len(list(self.get_new_entities_of_type(type)))
+        return self._new_entity_count_by_type.get(type, 0)
 
     def count_links(self) -> int:
-        count = 0
-        for entity in self.get_entities():
-            count = count + len(entity.direct_links)
-        return count
+        return self._link_count
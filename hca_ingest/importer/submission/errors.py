@@ -38,3 +38,21 @@ class MultipleProcessesFound(Error):
 
         self.process_ids = process_ids
         self.from_entity = from_entity
+
+
+class EntityCreationFailed(Error):
+    def __init__(self, entity, cause):
+        message = f'The {entity.type} with id {entity.id} could not be created in ingest: {cause}'
+        super(EntityCreationFailed, self).__init__('EntityCreationFailed', message)
+        self.entity = entity
+        self.cause = cause
+
+
+class EntityLinkFailed(Error):
+    def __init__(self, from_entity, link, cause):
+        message = f'The {from_entity.type} with id {from_entity.id} could not be linked to {link["entity"]} ' \
+                  f'with id {link["id"]} as {link["relationship"]}: {cause}'
+        super(EntityLinkFailed, self).__init__('EntityLinkFailed', message)
+        self.from_entity = from_entity
+        self.link = link
+        self.cause = cause
@@ -1,10 +1,12 @@
-import copy
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Tuple
 
 from hca_ingest.api.ingestapi import IngestApi
+from hca_ingest.importer.submission.checkpoint import ImportCheckpoint
 from hca_ingest.importer.submission.entity import Entity
 from hca_ingest.importer.submission.entity_map import EntityMap
+from hca_ingest.importer.submission.errors import EntityCreationFailed, EntityLinkFailed
 from hca_ingest.importer.submission.submission import Submission
 
 ENTITY_LINK = {
@@ -17,16 +19,37 @@ ENTITY_LINK = {
 }
 
 
-def json_equals(json1: dict, json2: dict):
-    return json.dumps(json1, sort_keys=True) == json.dumps(json2, sort_keys=True)
+def json_equals(json1, json2) -> bool:
+    """
+    Compares two json documents structurally, without serialising them. Values are only equal if they are of the same
+    type, as in their json text: 1, 1.0 and True are all different.
+    """
+    if isinstance(json1, dict):
+        return (isinstance(json2, dict) and json1.keys() == json2.keys()
+                and all(json_equals(value, json2[key]) for key, value in json1.items()))
+    if isinstance(json1, (list, tuple)):
+        return (isinstance(json2, (list, tuple)) and len(json1) == len(json2)
+                and all(json_equals(value1, value2) for value1, value2 in zip(json1, json2)))
+    return type(json1) is type(json2) and json1 == json2
 
 
 class IngestSubmitter(object):
-    def __init__(self, ingest_api: IngestApi):
+    def __init__(self, ingest_api: IngestApi, max_workers: int = 1, checkpoint_dir: str = None):
+        """
+        :param ingest_api: the client used to talk to Ingest Core
+        :param max_workers: the maximum number of requests to Ingest Core that are allowed to be in flight at the
+                            same time. The default of 1 submits everything serially.
+        :param checkpoint_dir: a directory where the entities and links created in each submission are journaled, see
+                               ImportCheckpoint. Submitting again into a submission skips what is in its journal. By
+                               default nothing is journaled.
+        """
         self.ingest_api = ingest_api
+        self.max_workers = max_workers
+        self.checkpoint_dir = checkpoint_dir
+        self._checkpoints = {}
         self.logger = logging.getLogger(__name__)
         self.PROGRESS_CTR = 50
-        self.logger = logging.getLogger(__name__)
+        self.LINK_RETRIES = 2
 
     def add_entity(self, entity: Entity, submission_url: str):
         link_name = ENTITY_LINK[entity.type]
@@ -49,65 +72,286 @@ class IngestSubmitter(object):
 
     def add_entities(self, entity_map: EntityMap, submission_url: str) -> Submission:
         submission = Submission(self.ingest_api, submission_url)
-        submission.define_manifest(entity_map)
-        for e in entity_map.get_new_entities():
-            self.add_entity(e, submission_url)
-            # NOTE: this inflates the submission.metadata_dict
-            submission.add_entity(e)
+        checkpoint = self.get_checkpoint(submission_url)
+        if checkpoint and checkpoint.manifest:
+            checkpoint.check_entities(entity_map)
+            submission.manifest = checkpoint.manifest
+        else:
+            submission.define_manifest(entity_map)
+            if checkpoint:
+                checkpoint.add_manifest(submission.manifest, entity_map)
+
+        new_entities = []
+        for entity in entity_map.get_new_entities():
+            ingest_json = checkpoint.get_ingest_json(entity) if checkpoint else None
+            if ingest_json:
+                entity.ingest_json = ingest_json
+                submission.add_entity(entity)
+            else:
+                new_entities.append(entity)
+
+        try:
+            for e, _, error in self._map_concurrently(
+                    lambda entity: self._add_entity(entity, submission_url, checkpoint), new_entities):
+                if error:
+                    self.logger.error(f'The {e.type} with id {e.id} could not be created: {str(error)}')
+                    submission.add_error(EntityCreationFailed(e, error))
+                    continue
+                # NOTE: this inflates the submission.metadata_dict
+                submission.add_entity(e)
+        finally:
+            # the files of the submission are listed by the first create_file, they are only needed while adding
+            self.ingest_api.forget_submission_files(submission_url)
 
         return submission
 
+    def _add_entity(self, entity: Entity, submission_url: str, checkpoint: ImportCheckpoint):
+        entity = self.add_entity(entity, submission_url)
+        if checkpoint:
+            checkpoint.add_entity(entity)
+        return entity
+
+    def get_checkpoint(self, submission_url: str) -> ImportCheckpoint:
+        if not self.checkpoint_dir:
+            return None
+        checkpoint = self._checkpoints.get(submission_url)
+        if not checkpoint:
+            checkpoint = ImportCheckpoint.open(self.checkpoint_dir, submission_url)
+            self._checkpoints[submission_url] = checkpoint
+        return checkpoint
+
+    def finish_checkpoint(self, submission_url: str):
+        """Removes the journal of a submission, once everything has been submitted there is nothing to resume."""
+        checkpoint = self._checkpoints.pop(submission_url, None)
+        if checkpoint:
+            checkpoint.remove()
+
+    def close_checkpoint(self, submission_url: str):
+        """Closes the journal of a submission and keeps it, for an import which did not finish to be resumed."""
+        checkpoint = self._checkpoints.pop(submission_url, None)
+        if checkpoint:
+            checkpoint.close()
+
     def update_entities(self, entity_map: EntityMap):
-        updated_entities = [self.update_entity(e) for e in entity_map.get_entities() if e.is_reference]
+        """
+        Updates the content of every referenced entity in the entity map. The entities are fetched and only the ones
+        whose content changes are patched, up to max_workers at a time. Every entity is attempted, the first error is
+        raised once they all have been.
+        """
+        references = [entity for entity in entity_map.get_entities() if entity.is_reference]
+        self._load_ingest_jsons([entity for entity in references if not entity.ingest_json])
+
+        updated_entities = []
+        first_error = None
+        for entity, updated_entity, error in self._map_concurrently(self.update_entity, references):
+            if error:
+                self.logger.error(f'The {entity.type} with id {entity.id} could not be updated: {str(error)}')
+                first_error = first_error or error
+                continue
+            updated_entities.append(updated_entity)
+        if first_error:
+            raise first_error
         return updated_entities
 
     def update_entity(self, entity: Entity):
         if not entity.ingest_json:
             entity.ingest_json = self.ingest_api.get_entity_by_uuid(ENTITY_LINK[entity.type], entity.id)
 
-        patch = copy.deepcopy(entity.ingest_json.get('content'))
-        patch.update(entity.content)
-        if not json_equals(entity.ingest_json.get('content'), patch):
+        patch = self._get_content_patch(entity)
+        if patch is not None:
             self.ingest_api.patch(entity.url, json={'content': patch})
 
         return entity
 
+    @staticmethod
+    def _get_content_patch(entity: Entity):
+        # only the fields in the entity content are compared, the patch is the existing content updated with them
+        existing_content = entity.ingest_json.get('content') or {}
+        for key, value in entity.content.items():
+            if key not in existing_content or not json_equals(existing_content[key], value):
+                return dict(existing_content, **entity.content)
+        return None
+
     def link_submission_to_project(self, project_uuid: str, submission_url: str):
         project_entity = self.ingest_api.get_entity_by_uuid('projects', project_uuid)
         submission_envelope = self.ingest_api.get_submission(submission_url)
         self.ingest_api.link_entity(project_entity, submission_envelope, 'submissionEnvelopes')
 
     def link_entity(self, from_entity: Entity, to_entity: Entity, relationship: str, is_collection=True):
-        if from_entity.is_linking_reference and not from_entity.ingest_json:
-            from_entity.ingest_json = self.ingest_api.get_entity_by_uuid(ENTITY_LINK[from_entity.type],
-                                                                         from_entity.id)
-
-        if to_entity.is_linking_reference and not to_entity.ingest_json:
-            to_entity.ingest_json = self.ingest_api.get_entity_by_uuid(ENTITY_LINK[to_entity.type], to_entity.id)
+        self._load_ingest_json(from_entity)
+        self._load_ingest_json(to_entity)
 
         from_entity_ingest = from_entity.ingest_json
         to_entity_ingest = to_entity.ingest_json
 
         self.ingest_api.link_entity(from_entity_ingest, to_entity_ingest, relationship, is_collection)
 
+    def _load_ingest_json(self, entity: Entity):
+        if entity.is_linking_reference and not entity.ingest_json:
+            entity.ingest_json = self.ingest_api.get_entity_by_uuid(ENTITY_LINK[entity.type], entity.id)
+
     def link_entities(self, entity_map: EntityMap, submission: Submission):
-        progress = 0
+        """
+        Creates every direct link in the entity map. Links that start from the same entity are created in sequence
+        as they all modify that entity, links of different entities are created concurrently. Collection links of an
+        entity that share a relationship are sent as one request, falling back to one request per link if that is
+        rejected. Links that fail are retried individually up to LINK_RETRIES times and are then recorded as errors
+        of the submission.
+        """
+        checkpoint = self.get_checkpoint(submission.get_submission_url())
+        self._load_linking_references(entity_map)
+        progress = _LinkProgress(self.ingest_api, submission.manifest, self.PROGRESS_CTR)
+
+        failed_links = []
+        entity_links = []
         for entity in entity_map.get_entities():
-            for link in entity.direct_links:
-                to_entity = entity_map.get_entity(link['entity'], link['id'])
-                try:
-                    self.link_entity(entity, to_entity, relationship=link['relationship'],
-                                     is_collection=link.get('is_collection', True))
-                    progress = progress + 1
-                    expected_links = int(submission.manifest.get('expectedLinks', 0))
-                    if progress % self.PROGRESS_CTR == 0 or (progress == expected_links):
-                        manifest_url = self.ingest_api.get_link_from_resource(submission.manifest, 'self')
-                        self.ingest_api.patch(manifest_url, json={'actualLinks': progress})
-                        self.logger.info(f"links progress: {progress}/ {submission.manifest.get('expectedLinks')}")
+            if not entity.has_direct_links():
+                continue
+            links = entity.direct_links
+            if checkpoint:
+                links = [link for link in links if not checkpoint.has_link(entity, link)]
+                progress.add(entity.count_direct_links() - len(links))
+            if links:
+                entity_links.append((entity, links))
+
+        for (entity, links), entity_failures, _ in self._map_concurrently(
+                lambda entity_link: self._link_direct_links(entity_map, *entity_link, checkpoint), entity_links):
+            progress.add(len(links) - len(entity_failures))
+            failed_links.extend((entity, link, error) for link, error in entity_failures)
+
+        for _ in range(self.LINK_RETRIES):
+            if not failed_links:
+                break
+            self.logger.info(f'Retrying {len(failed_links)} failed links.')
+            retried_links = [(entity, link) for entity, link, _ in failed_links]
+            failed_links = []
+            for (entity, link), _, error in self._map_concurrently(
+                    lambda entity_link: self._link(entity_map, *entity_link, checkpoint), retried_links):
+                if error:
+                    failed_links.append((entity, link, error))
+                else:
+                    progress.add(1)
+
+        for entity, link, error in failed_links:
+            link_error = EntityLinkFailed(entity, link, error)
+            self.logger.error(link_error.message)
+            submission.add_error(link_error)
 
+        progress.finish()
+
+    def _load_linking_references(self, entity_map: EntityMap):
+        # fetched once up front so that concurrent links to the same reference do not all look it up
+        self._load_ingest_jsons([entity for entity in entity_map.get_entities()
+                                 if entity.is_linking_reference and not entity.ingest_json])
+
+    def _load_ingest_jsons(self, references: list):
+        for entity, ingest_json, _ in self._map_concurrently(
+                lambda e: self.ingest_api.get_entity_by_uuid(ENTITY_LINK[e.type], e.id), references):
+            if ingest_json:
+                entity.ingest_json = ingest_json
+
+    def _link_direct_links(self, entity_map: EntityMap, entity: Entity, links: list,
+                           checkpoint: ImportCheckpoint = None) -> list:
+        failures = []
+        for group in self._group_links_for_batching(links):
+            if len(group) > 1 and self._link_batch(entity_map, entity, group, checkpoint):
+                continue
+            for link in group:
+                try:
+                    self._link(entity_map, entity, link, checkpoint)
                 except Exception as link_error:
-                    error_message = f'''The {entity.type} with id {entity.id} could not be linked to {to_entity.type} \
-                    with id {to_entity.id}.'''
-                    self.logger.error(error_message)
-                    self.logger.error(f'{str(link_error)}')
-                    raise
+                    failures.append((link, link_error))
+        return failures
+
+    @staticmethod
+    def _group_links_for_batching(direct_links: list) -> list:
+        # collection links sharing a relationship can be sent in one text/uri-list request,
+        # non collection links replace the relationship and are always sent one by one
+        groups = {}
+        single_links = []
+        for link in direct_links:
+            if link.get('is_collection', True):
+                groups.setdefault(link['relationship'], []).append(link)
+            else:
+                single_links.append([link])
+        return list(groups.values()) + single_links
+
+    def _link_batch(self, entity_map: EntityMap, entity: Entity, links: list,
+                    checkpoint: ImportCheckpoint = None) -> bool:
+        try:
+            to_entities = [entity_map.get_entity(link['entity'], link['id']) for link in links]
+            for linked_entity in [entity] + to_entities:
+                self._load_ingest_json(linked_entity)
+            self.ingest_api.link_entities(entity.ingest_json, [e.ingest_json for e in to_entities],
+                                          links[0]['relationship'])
+        except Exception as batch_error:
+            self.logger.warning(f'Linking {len(links)} {links[0]["relationship"]} of {entity.type} {entity.id} in '
+                                f'one request failed, linking them one by one: {str(batch_error)}')
+            return False
+        if checkpoint:
+            for link in links:
+                checkpoint.add_link(entity, link)
+        return True
+
+    def _link(self, entity_map: EntityMap, entity: Entity, link: dict, checkpoint: ImportCheckpoint = None):
+        to_entity = entity_map.get_entity(link['entity'], link['id'])
+        self.link_entity(entity, to_entity, relationship=link['relationship'],
+                         is_collection=link.get('is_collection', True))
+        if checkpoint:
+            checkpoint.add_link(entity, link)
+
+    def _map_concurrently(self, function: Callable, items: Iterable) -> Iterator[Tuple[object, object, Exception]]:
+        """
+        Applies function to every item using at most max_workers threads. Results are yielded in the order of the
+        given items as (item, result, error) tuples so that a failure for one item does not stop the others.
+        """
+        if self.max_workers <= 1:
+            for item in items:
+                yield (item,) + self._call(function, item)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(item, executor.submit(self._call, function, item)) for item in items]
+            for item, future in futures:
+                yield (item,) + future.result()
+
+    @staticmethod
+    def _call(function: Callable, item) -> Tuple[object, Exception]:
+        try:
+            return function(item), None
+        except Exception as error:
+            return None, error
+
+
+class _LinkProgress:
+    """
+    Keeps the actualLinks of the submission manifest up to date while links are being created. The count only ever
+    increases and the manifest is patched every time it crosses a multiple of progress_ctr and once more at the end.
+    """
+
+    def __init__(self, ingest_api: IngestApi, manifest: dict, progress_ctr: int):
+        self.ingest_api = ingest_api
+        self.manifest = manifest
+        self.progress_ctr = progress_ctr
+        self.expected_links = int(manifest.get('expectedLinks', 0)) if manifest else 0
+        self.count = 0
+        self.reported_count = 0
+        self.logger = logging.getLogger(__name__)
+
+    def add(self, link_count: int):
+        if link_count <= 0:
+            return
+        self.count = self.count + link_count
+        if self.count // self.progress_ctr > self.reported_count // self.progress_ctr \
+                or self.count == self.expected_links:
+            self._report()
+
+    def finish(self):
+        if self.count != self.reported_count:
+            self._report()
+
+    def _report(self):
+        manifest_url = self.ingest_api.get_link_from_resource(self.manifest, 'self')
+        self.ingest_api.patch(manifest_url, json={'actualLinks': self.count})
+        self.reported_count = self.count
+        self.logger.info(f"links progress: {self.count}/ {self.expected_links}")
@@ -15,6 +15,7 @@ class Submission(object):
         self.submission_url = submission_url
         self.metadata_dict = {}
         self.manifest = None
+        self.errors = []
         self.logger = logging.getLogger(__name__)
 
     def is_update(self):
@@ -28,6 +29,10 @@ class Submission(object):
         self.metadata_dict[entity.type + '.' + entity.id] = entity
         return entity
 
+    def add_error(self, error: Exception):
+        self.errors.append(error)
+        return error
+
     def get_entity(self, entity_type: str, id: str):
         key = entity_type + '.' + id
         return self.metadata_dict[key]
@@ -1,5 +1,7 @@
 from collections import namedtuple
 
+MigrationInfo = namedtuple("MigrationInfo", "replaced_by version target_version")
+
 
 class MigrationParser():
     """
@@ -64,5 +66,4 @@ class MigrationParser():
             _version = property_migration["effective_from_source"]
             _target_version = property_migration["effective_from_target"]
 
-        MigrationInfo = namedtuple("MigrationInfo", "replaced_by version target_version")
         return MigrationInfo(replaced_by=_replaced_by, version=_version, target_version=_target_version)
@@ -2,14 +2,14 @@ import json
 from typing import Dict
 
 import jsonref
-from jsonref import JsonLoader
 from mergedeep import merge
 
+from hca_ingest.utils.schema_store import SchemaStoreLoader
 from .descriptor import ComplexPropertyDescriptor
 
 
 class SchemaParser:
-    json_loader = JsonLoader()
+    json_loader = SchemaStoreLoader()
 
     def __init__(self, json_schema,
                  ignored_properties=["required_properties", "describedBy", "schema_version", "schema_type",
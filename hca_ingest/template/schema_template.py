@@ -1,16 +1,21 @@
+import json
 from datetime import datetime
 
-import requests
+import jsonref
 import yaml
 
 from hca_ingest.api.ingestapi import IngestApi
 from hca_ingest.template.descriptor import SimplePropertyDescriptor
+from hca_ingest.utils.schema_store import SchemaStore, get_default_schema_store
 from .exceptions import RootSchemaException, UnknownKeySchemaException
 from .migration_parser import MigrationParser
 from .schema_parser import SchemaParser
 from .tab_config import TabConfig
+from .template_snapshots import TemplateSnapshots, get_default_template_snapshots
 
 EXTERNAL_REFERENCE_FIELD = 'uuid'
+SNAPSHOT_ATTRIBUTES = ['json_schemas', 'template_version', 'created_date', 'meta_data_properties', 'custom_properties',
+                       'labels', 'tabs', 'migrations', 'spreadsheet_configuration']
 
 
 class SchemaTemplate():
@@ -21,7 +26,8 @@ class SchemaTemplate():
     def __init__(self, ingest_api_url="http://api.ingest.dev.archive.data.humancellatlas.org",
                  migrations_url="https://schema.humancellatlas.org/property_migrations",
                  metadata_schema_urls=None, json_schema_docs=None, tab_config=None, property_migrations=None,
-                 custom_properties=None):
+                 custom_properties=None, schema_store: SchemaStore = None,
+                 template_snapshots: TemplateSnapshots = None):
         """ Creates and empty/default dictionary containing the following information:
         1) template_version:  A string keeping track of the version of the TopLevelSchemaDescriptor that is being used
         in case the components of this dictionary changes over time.
@@ -63,6 +69,11 @@ class SchemaTemplate():
                                     from an older version.
         :param custom_properties: An object representing a deserialized JSON-string which contains custom fields added
                                   on top of metadata schema
+        :param schema_store: A SchemaStore from which the metadata schemas and property migrations are read. Defaults
+                             to the store shared by the whole process.
+        :param template_snapshots: TemplateSnapshots used to load this template instead of building it when it was
+                                   built before from the same versioned metadata_schema_urls and property migrations.
+                                   Defaults to the snapshots kept in INGEST_SCHEMA_CACHE_DIR, if set.
         """
 
         # Function validation: only one of json_schema_docs or metadata_schema_urls may be populated or neither (NAND
@@ -72,18 +83,35 @@ class SchemaTemplate():
                 'Only one of function arguments metadata_schema_urls or json_schema_docs (or neither) may be '
                 'populated when initializing SchemaTemplate.')
 
+        self.schema_store = schema_store or get_default_schema_store()
         self.metadata_schema_urls = metadata_schema_urls
         # If neither the metadata_schema_urls are given nor the json_schema_docs, fetch the metadata schema URLs via
         # querying the Ingest API.
         if not metadata_schema_urls and not json_schema_docs:
             self.metadata_schema_urls = self._get_latest_submittable_schema_urls(ingest_api_url)
 
+        # Fully qualified property keys already looked up, mapped to their spec or to None if they are in no schema
+        self._property_index = {}
+
         self.property_migrations = property_migrations
         # If the property migrations were not given as input, read the migrations from the migrations URL and store
         # into the deserialized JSON into a Python object.
         if not self.property_migrations:
             self.property_migrations = self._get_property_migrations_json_obj(migrations_url)
 
+        # whether the template is fully defined by its metadata_schema_urls, which only hold versioned urls
+        self.is_versioned = not (json_schema_docs or custom_properties) \
+            and all(SchemaStore.is_immutable(url) for url in self.metadata_schema_urls)
+
+        snapshot_key = None
+        template_snapshots = template_snapshots or get_default_template_snapshots()
+        if template_snapshots and self.is_versioned and not tab_config:
+            snapshot_key = template_snapshots.get_key(self.metadata_schema_urls, self.property_migrations)
+            snapshot = template_snapshots.load(snapshot_key)
+            if snapshot:
+                self.__dict__.update(snapshot)
+                return
+
         self.json_schemas = json_schema_docs
         if not self.json_schemas:
             self.json_schemas = self._get_json_objs_from_metadata_schema_urls()
@@ -112,6 +140,15 @@ class SchemaTemplate():
 
         self.spreadsheet_configuration = tab_config if tab_config else TabConfig(self.get_dictionary_representation())
 
+        if snapshot_key:
+            template_snapshots.save(snapshot_key, self._get_snapshot_attributes())
+
+    def _get_snapshot_attributes(self):
+        attributes = {attribute: getattr(self, attribute) for attribute in SNAPSHOT_ATTRIBUTES}
+        # parsing leaves jsonref proxies in the schemas, which cannot be pickled
+        attributes['json_schemas'] = json.loads(jsonref.dumps(self.json_schemas))
+        return attributes
+
     def init_custom_properties(self, schema_descriptor):
         external_field_descriptor = SimplePropertyDescriptor({})
         external_field_descriptor.identifiable = True
@@ -157,16 +194,34 @@ class SchemaTemplate():
         :param property_key: A string representing the fully qualified path to the desired metadata or custom property
         :return: A dictionary representing the attributes of the property. If none is found, an exception will be thrown
         """
-        result = self._lookup_fully_qualified_key_path_in_dictionary(property_key, self.meta_data_properties)
-
-        if not result:
-            result = self._lookup_fully_qualified_key_path_in_dictionary(property_key, self.custom_properties)
+        result = self.find_property_in_template(property_key)
 
         if not result:
             raise UnknownKeySchemaException(f"ERROR: Cannot find key {property_key} in any schema!")
 
         return result
 
+    def find_property_in_template(self, property_key):
+        """
+        Same as lookup_property_from_template but returns None instead of raising an exception if the property is not
+        found. Every key is looked up in the schemas once, later lookups of the key, found or not, are a dictionary hit.
+
+        :param property_key: A string representing the fully qualified path to the desired metadata or custom property
+        :return: A dictionary representing the attributes of the property or None if none is found
+        """
+        try:
+            return self._property_index[property_key]
+        except KeyError:
+            pass
+
+        result = self._lookup_fully_qualified_key_path_in_dictionary(property_key, self.meta_data_properties)
+
+        if not result:
+            result = self._lookup_fully_qualified_key_path_in_dictionary(property_key, self.custom_properties)
+
+        self._property_index[property_key] = result or None
+        return result or None
+
     def lookup_metadata_schema_name_given_title(self, tab_display_name):
         """
         Given a tab's display name which is often used to label a column in a spreadsheet that represents a property of
@@ -275,7 +330,7 @@ class SchemaTemplate():
         """
 
         try:
-            return requests.get(migrations_url).json()["migrations"]
+            return self.schema_store.get(migrations_url)["migrations"]
         except Exception:
             raise RootSchemaException(f"Was unable to read the property migrations file from URL {migrations_url}")
 
@@ -289,7 +344,7 @@ class SchemaTemplate():
         metadata_schema_objs = []
         for uri in self.metadata_schema_urls:
             try:
-                metadata_schema_objs.append(requests.get(url=uri).json())
+                metadata_schema_objs.append(self.schema_store.get(uri))
             except Exception:
                 raise RootSchemaException(f"Was unable to read metadata schema JSON at {uri}")
         return metadata_schema_objs
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from typing import Optional
+
+from hca_ingest.utils.schema_store import SCHEMA_CACHE_DIR_ENV
+
+# bump whenever the attributes of SchemaTemplate or the classes they hold change, so old snapshots are ignored
+SNAPSHOT_FORMAT_VERSION = 1
+
+_logger = logging.getLogger(__name__)
+
+
+class TemplateSnapshots:
+    """
+    Pickled SchemaTemplate attributes, one file per set of metadata schema urls and property migrations, so that a
+    template built once can be loaded by later processes without fetching and parsing the schemas again.
+
+    Snapshots are unpickled, so snapshot_dir must only be writable by trusted users.
+    """
+
+    def __init__(self, snapshot_dir: str):
+        self.snapshot_dir = snapshot_dir
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+    @staticmethod
+    def get_key(metadata_schema_urls, property_migrations) -> str:
+        source = json.dumps({
+            'format': SNAPSHOT_FORMAT_VERSION,
+            'metadata_schema_urls': sorted(metadata_schema_urls),
+            'property_migrations': property_migrations
+        }, sort_keys=True)
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._get_path(key), 'rb') as snapshot_file:
+                return pickle.load(snapshot_file)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            _logger.warning(f'Ignoring unreadable template snapshot {key}: {error}')
+            return None
+
+    def save(self, key: str, attributes: dict):
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as snapshot_file:
+                pickle.dump(attributes, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._get_path(key))
+        except Exception as error:
+            _logger.warning(f'Could not save template snapshot {key}: {error}')
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.snapshot_dir, f'{key}.pickle')
+
+
+def get_default_template_snapshots() -> Optional[TemplateSnapshots]:
+    """Snapshots are kept in the templates directory of INGEST_SCHEMA_CACHE_DIR, when it is set."""
+    cache_dir = os.environ.get(SCHEMA_CACHE_DIR_ENV)
+    return TemplateSnapshots(os.path.join(cache_dir, 'templates')) if cache_dir else None
@@ -2,9 +2,9 @@ import os
 from functools import reduce
 
 import jsonschema
-import requests
 
 from .errorreport import ErrorReport
+from .schema_store import get_default_schema_store
 from .validationreport import ValidationReport
 
 BUNDLE_SCHEMA_BASE_URL = "https://schema.humancellatlas.org/bundle/%s/"
@@ -56,7 +56,7 @@ class BundleValidator:
             raise ("Could not find schema_url")
 
     def get_schema_from_url(self, schema_url):
-        return requests.get(schema_url).json()
+        return get_default_schema_store().get(schema_url)
 
     def load_bundle_schema(self, schema_type, version):
 
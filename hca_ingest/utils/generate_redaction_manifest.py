@@ -85,6 +85,12 @@ class EntityRedaction:
         }
 
 
+# the redaction manifest only needs the ids of the entities and the links to follow to related entities
+ENTITY_FIELDS = ['uuid', '_links']
+FILE_FIELDS = ENTITY_FIELDS + ['content.describedBy']
+BUNDLE_MANIFEST_FIELDS = ['bundleUuid', '_links.self']
+
+
 class RedactionManifestUtils:
 
     @staticmethod
@@ -104,20 +110,20 @@ class RedactionManifestUtils:
         ingest_client = IngestApi(ingest_url)
 
         project = ingest_client.get_project_by_uuid(project_uuid)
-        submission_for_project = list(ingest_client.get_related_entities("submissionEnvelopes", project, "submissionEnvelopes"))[0]
+        submission_for_project = list(ingest_client.get_related_entities("submissionEnvelopes", project, "submissionEnvelopes", fields=ENTITY_FIELDS))[0]
         submissions_for_project = EntityMap.from_list([submission_for_project])
 
-        files = list(ingest_client.get_related_entities("files", submission_for_project, "files"))
+        files = list(ingest_client.get_related_entities("files", submission_for_project, "files", fields=FILE_FIELDS))
         supplementary_files = EntityMap.from_list([f for f in files if "supplementary_file" in f["content"]["describedBy"]])
         sequence_files = EntityMap.from_list([f for f in files if "sequence_file" in f["content"]["describedBy"]])
 
         assert len(supplementary_files) + len(sequence_files) == len(files)
 
-        biomaterials = EntityMap.from_list(ingest_client.get_related_entities("biomaterials", submission_for_project, "biomaterials"))
-        processes = EntityMap.from_list(ingest_client.get_related_entities("processes", submission_for_project, "processes"))
-        protocols = EntityMap.from_list(ingest_client.get_related_entities("protocols", submission_for_project, "protocols"))
-        projects = EntityMap.from_list(ingest_client.get_related_entities("projects", submission_for_project, "projects"))
-        primary_bundle_manifests = EntityMap.from_list(ingest_client.get_related_entities("bundleManifests", submission_for_project, "bundleManifests"), ["bundleUuid"])
+        biomaterials = EntityMap.from_list(ingest_client.get_related_entities("biomaterials", submission_for_project, "biomaterials", fields=ENTITY_FIELDS))
+        processes = EntityMap.from_list(ingest_client.get_related_entities("processes", submission_for_project, "processes", fields=ENTITY_FIELDS))
+        protocols = EntityMap.from_list(ingest_client.get_related_entities("protocols", submission_for_project, "protocols", fields=ENTITY_FIELDS))
+        projects = EntityMap.from_list(ingest_client.get_related_entities("projects", submission_for_project, "projects", fields=ENTITY_FIELDS))
+        primary_bundle_manifests = EntityMap.from_list(ingest_client.get_related_entities("bundleManifests", submission_for_project, "bundleManifests", fields=BUNDLE_MANIFEST_FIELDS), ["bundleUuid"])
 
         analysis_processes = EntityMap()
         analysis_protocols = EntityMap()
@@ -126,14 +132,14 @@ class RedactionManifestUtils:
         analysis_bundle_manifests = EntityMap()
 
         for file in sequence_files:
-            input_to_processes = ingest_client.get_related_entities("inputToProcesses", file, "processes")
+            input_to_processes = ingest_client.get_related_entities("inputToProcesses", file, "processes", fields=ENTITY_FIELDS)
             for analysis_process in input_to_processes:
                 analysis_processes.add([analysis_process])
-                analysis_protocols.add(ingest_client.get_related_entities("protocols", analysis_process, "protocols"))
-                analysis_files.add(ingest_client.get_related_entities("derivedFiles", analysis_process, "files"))
-                analysis_submission = list(ingest_client.get_related_entities("submissionEnvelopes", analysis_process, "submissionEnvelopes"))[0]
+                analysis_protocols.add(ingest_client.get_related_entities("protocols", analysis_process, "protocols", fields=ENTITY_FIELDS))
+                analysis_files.add(ingest_client.get_related_entities("derivedFiles", analysis_process, "files", fields=ENTITY_FIELDS))
+                analysis_submission = list(ingest_client.get_related_entities("submissionEnvelopes", analysis_process, "submissionEnvelopes", fields=ENTITY_FIELDS))[0]
                 analysis_submissions.add([analysis_submission])
-                analysis_bundle_manifests.add(ingest_client.get_related_entities("bundleManifests", analysis_submission, "bundleManifests"), ["bundleUuid"])
+                analysis_bundle_manifests.add(ingest_client.get_related_entities("bundleManifests", analysis_submission, "bundleManifests", fields=BUNDLE_MANIFEST_FIELDS), ["bundleUuid"])
 
         assert len(projects.uuids()) == 1
 
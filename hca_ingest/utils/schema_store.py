@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import timedelta
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from jsonref import JsonLoader
+from requests_cache import DO_NOT_CACHE
+
+from hca_ingest.api.requests_utils import create_session_with_retry, create_retry_policy
+
+SCHEMA_CACHE_DIR_ENV = 'INGEST_SCHEMA_CACHE_DIR'
+DEFAULT_TTL = timedelta(hours=1)
+DEFAULT_TIMEOUT = 60
+# a schema server which cannot be reached fails the fetch within seconds, not after the 50 retries of the policy
+SCHEMA_CONNECT_RETRIES = 3
+VERSION_PATTERN = re.compile(r'^\d+\.\d+\.\d+$')
+
+_default_schema_store = None
+
+
+class SchemaStore:
+    """
+    Fetches json schemas by url, keeping a copy of each schema in cache_dir when one is given so that every process
+    using the same directory can skip the request. Schemas at versioned urls never change and are kept forever, other
+    urls, e.g. .../latest/... or the property migrations, are fetched again once their copy is older than ttl.
+
+    Copies are written to a temporary file which is then renamed, so processes sharing cache_dir never read a partly
+    written schema.
+
+    Schemas are fetched through session with a timeout in seconds. The default session retries as the ones from
+    create_session_with_retry do, with fewer retries of connection errors, and does not cache responses itself.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: timedelta = DEFAULT_TTL,
+                 session: Optional[requests.Session] = None, timeout: float = DEFAULT_TIMEOUT):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.session = session or create_session_with_retry(create_retry_policy().new(connect=SCHEMA_CONNECT_RETRIES),
+                                                            backend='memory', expire_after=DO_NOT_CACHE)
+        self.timeout = timeout
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, url: str) -> dict:
+        if not self.cache_dir:
+            return self._fetch(url)
+
+        path = self._get_path(url)
+        schema = self._read(path, url)
+        if schema is None:
+            schema = self._fetch(url)
+            self._write(path, schema)
+        return schema
+
+    @staticmethod
+    def is_immutable(url: str) -> bool:
+        segments = urlparse(url).path.split('/')
+        return 'latest' not in segments and any(VERSION_PATTERN.match(segment) for segment in segments)
+
+    def _get_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _read(self, path: str, url: str) -> Optional[dict]:
+        try:
+            if not self.is_immutable(url) and time.time() - os.path.getmtime(path) > self.ttl.total_seconds():
+                return None
+            with open(path, encoding='utf-8') as schema_file:
+                return json.load(schema_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, schema: dict):
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as schema_file:
+                json.dump(schema, schema_file)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _fetch(self, url: str) -> dict:
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+class SchemaStoreLoader(JsonLoader):
+    """A jsonref loader which fetches http(s) references through a SchemaStore."""
+
+    def __init__(self, schema_store: Optional[SchemaStore] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.schema_store = schema_store
+
+    def get_remote_json(self, uri, **kwargs):
+        if kwargs or urlparse(uri).scheme not in ('http', 'https'):
+            return super().get_remote_json(uri, **kwargs)
+        return (self.schema_store or get_default_schema_store()).get(uri)
+
+
+def get_default_schema_store() -> SchemaStore:
+    """
+    The schema store shared by the template, downloader and validation utilities. Schemas are only kept on disk when
+    the INGEST_SCHEMA_CACHE_DIR environment variable names a directory.
+    """
+    global _default_schema_store
+    if _default_schema_store is None:
+        _default_schema_store = SchemaStore(os.environ.get(SCHEMA_CACHE_DIR_ENV))
+    return _default_schema_store
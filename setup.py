@@ -17,5 +17,8 @@ setup(
     url="https://github.com/ebi-ait/ingest-client",
     packages=find_packages(exclude=['tests', 'tests.*']),
     install_requires=install_requires,
+    extras_require={
+        'async': ['aiohttp']
+    },
     include_package_data=True
 )
@@ -0,0 +1,184 @@
+import threading
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+import polling
+import pytest
+
+from hca_ingest.api.async_ingestapi import AsyncIngestApi
+from hca_ingest.api.requests_utils import create_retry_policy
+
+aiohttp = pytest.importorskip('aiohttp')
+web = pytest.importorskip('aiohttp.web')
+TestServer = pytest.importorskip('aiohttp.test_utils').TestServer
+
+TRUNCATED_BODY = object()
+
+
+class AsyncIngestApiTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+        self.responses = {}
+        app = web.Application()
+        app.router.add_route('*', '/{path:.*}', self.handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.url = str(self.server.make_url('')).rstrip('/')
+        retry_policy = create_retry_policy().new(status=2, backoff_factor=0)
+        self.ingest_api = AsyncIngestApi(self.url, retry_policy=retry_policy)
+        self.ingest_api.set_page_size(2)
+
+    async def asyncTearDown(self):
+        await self.ingest_api.close()
+        await self.server.close()
+
+    async def handle(self, request):
+        body = await request.text()
+        key = (request.method, request.path)
+        self.requests.append((request.method, request.path_qs, request.headers.get('Content-type'), body))
+        responses = self.responses.get(key, [(404, {})])
+        status, data = responses.pop(0) if len(responses) > 1 else responses[0]
+        if data is TRUNCATED_BODY:
+            return await self.truncated_response(request, status)
+        return web.json_response(data, status=status)
+
+    @staticmethod
+    async def truncated_response(request, status):
+        response = web.StreamResponse(status=status, headers={'Content-Length': '100'})
+        await response.prepare(request)
+        await response.write(b'{"id"')
+        request.transport.close()
+        return response
+
+    def given_response(self, method, path, *responses):
+        self.responses[(method, path)] = list(responses)
+
+    def link(self, path):
+        return {'href': f'{self.url}{path}'}
+
+    async def test_get_all__follows_next_pages(self):
+        # given
+        self.given_response('GET', '/things', (200, {
+            '_embedded': {'things': [{'id': 1}, {'id': 2}]},
+            '_links': {'next': self.link('/things/page2')}
+        }))
+        self.given_response('GET', '/things/page2', (200, {
+            '_embedded': {'things': [{'id': 3}]},
+            '_links': {},
+            'page': {'number': 1}
+        }))
+
+        # when
+        things = [thing async for thing in self.ingest_api.get_all(f'{self.url}/things', 'things')]
+
+        # then
+        self.assertEqual([thing['id'] for thing in things], [1, 2, 3])
+        self.assertEqual(self.requests[0][1], '/things?size=2')
+
+    async def test_request__given_conflict__then_retry(self):
+        # given
+        self.given_response('POST', '/things', (409, {}), (201, {'id': 1}))
+
+        # when
+        thing = await self.ingest_api.post(f'{self.url}/things', json={})
+
+        # then
+        self.assertEqual(thing, {'id': 1})
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_request__given_persistent_conflict__then_raise_error(self):
+        # given
+        self.given_response('POST', '/things', (409, {}))
+
+        # when
+        with self.assertRaises(aiohttp.ClientResponseError) as context:
+            await self.ingest_api.post(f'{self.url}/things', json={})
+
+        # then
+        self.assertEqual(context.exception.status, 409)
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_request__given_truncated_body__then_retry(self):
+        # given
+        self.given_response('GET', '/things/1', (200, TRUNCATED_BODY), (200, {'id': 1}))
+
+        # when
+        thing = await self.ingest_api.get(f'{self.url}/things/1')
+
+        # then
+        self.assertEqual(thing, {'id': 1})
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_request__token_is_got_outside_the_event_loop(self):
+        # given
+        self.given_response('GET', '/things/1', (200, {'id': 1}))
+        token_threads = []
+        self.ingest_api.token_manager = MagicMock()
+        self.ingest_api.token_manager.get_token.side_effect = \
+            lambda: token_threads.append(threading.current_thread()) or 'token'
+
+        # when
+        await self.ingest_api.get(f'{self.url}/things/1')
+
+        # then
+        self.assertEqual(len(token_threads), 1)
+        self.assertIsNot(token_threads[0], threading.current_thread())
+        self.assertEqual(self.ingest_api.headers['Authorization'], 'Bearer token')
+
+    async def test_create_file__given_conflict__then_update_existing_file(self):
+        # given
+        submission_path = '/submissionEnvelopes/1'
+        self.given_response('GET', submission_path, (200, {'_links': {'files': self.link(f'{submission_path}/files')}}))
+        self.given_response('POST', f'{submission_path}/files', (409, {}))
+        self.given_response('GET', '/files/search', (200, {'_links': {
+            'findBySubmissionEnvelopeAndFileName': self.link('/files/search/find{?submissionEnvelope,fileName}')
+        }}))
+        self.given_response('GET', '/files/search/find', (200, {'_embedded': {'files': [{
+            'content': {'describedBy': 'schema', 'file_core': {}},
+            '_links': {'self': self.link('/files/1')}
+        }]}}))
+        self.given_response('PATCH', '/files/1', (200, {'uuid': {'uuid': 'file-uuid'}}))
+
+        # when
+        file = await self.ingest_api.create_file(f'{self.url}{submission_path}', 'a.fastq.gz', {'file_core': {'a': 1}})
+
+        # then
+        self.assertEqual(file, {'uuid': {'uuid': 'file-uuid'}})
+        self.assertEqual([method for method, *_ in self.requests], ['GET', 'POST', 'GET', 'GET', 'PATCH'])
+        self.assertIn('"describedBy": "schema"', self.requests[-1][3])
+        self.assertIn('"file_core": {"a": 1}', self.requests[-1][3])
+
+    async def test_link_entity(self):
+        # given
+        self.given_response('POST', '/processes/1/inputBiomaterials', (204, None))
+        from_entity = {'_links': {'inputBiomaterials': self.link('/processes/1/inputBiomaterials')}}
+        to_entity = {'_links': {'self': self.link('/biomaterials/1')}}
+
+        # when
+        await self.ingest_api.link_entity(from_entity, to_entity, 'inputBiomaterials')
+
+        # then
+        method, path, content_type, body = self.requests[0]
+        self.assertEqual((method, path, content_type), ('POST', '/processes/1/inputBiomaterials', 'text/uri-list'))
+        self.assertEqual(body, f'{self.url}/biomaterials/1')
+
+    async def test_poll__until_editable(self):
+        # given
+        self.given_response('GET', '/things/1', (200, {'editable': False}), (200, {'editable': True}))
+
+        # when
+        thing = await self.ingest_api.poll(f'{self.url}/things/1', step=0, max_tries=3,
+                                           check_success=AsyncIngestApi.is_entity_editable)
+
+        # then
+        self.assertTrue(thing['editable'])
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_poll__given_max_tries__then_raise_error(self):
+        # given
+        self.given_response('GET', '/things/1', (200, {'editable': False}))
+
+        # expect
+        with self.assertRaises(polling.MaxCallException):
+            await self.ingest_api.poll(f'{self.url}/things/1', step=0, max_tries=2,
+                                       check_success=AsyncIngestApi.is_entity_editable)
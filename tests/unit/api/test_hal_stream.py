@@ -0,0 +1,111 @@
+import json
+from unittest import TestCase
+
+from hca_ingest.api.hal_stream import iter_embedded_entities, select_fields
+
+
+def chunked(text, size):
+    data = text.encode('utf-8')
+    return [data[index:index + size] for index in range(0, len(data), size)]
+
+
+class IterEmbeddedEntitiesTest(TestCase):
+    def setUp(self):
+        self.entities = [
+            {'content': {'name': 'quote " and \\\\ backslash', 'values': [1, 2.5, None, True, False]}},
+            {'content': {'name': 'unicode é中\U0001F600', 'nested': {'list': [[], {}, [{'a': '}]'}]]}}},
+            {'content': {}}
+        ]
+        self.document = {
+            '_embedded': {'files': self.entities},
+            '_links': {'next': {'href': 'http://ingest/files?page=1'}},
+            'page': {'size': 3, 'totalElements': 6, 'totalPages': 2, 'number': 0}
+        }
+
+    def test_iter_embedded_entities(self):
+        for indent in [None, 2]:
+            for chunk_size in [1, 7, 100000]:
+                # given
+                chunks = chunked(json.dumps(self.document, indent=indent, ensure_ascii=False), chunk_size)
+                page = {}
+
+                # when
+                entities = list(iter_embedded_entities(chunks, 'files', page))
+
+                # then
+                self.assertEqual(entities, self.entities)
+                self.assertEqual(page['_links'], self.document['_links'])
+                self.assertEqual(page['page'], self.document['page'])
+
+    def test_iter_embedded_entities__yields_before_the_page_is_read(self):
+        # given
+        chunks = iter(chunked(json.dumps(self.document), 10))
+        page = {}
+
+        # when
+        first_entity = next(iter_embedded_entities(chunks, 'files', page))
+
+        # then
+        self.assertEqual(first_entity, self.entities[0])
+        self.assertTrue(list(chunks))
+
+    def test_iter_embedded_entities__given_large_entity_in_small_chunks(self):
+        # given
+        large_entity = {'content': {'values': [f'value {index}' for index in range(20000)]}}
+        document = {'_embedded': {'files': [large_entity, {'b': 2}]}, '_links': {}}
+
+        # when
+        entities = list(iter_embedded_entities(chunked(json.dumps(document), 16), 'files', {}))
+
+        # then
+        self.assertEqual(entities, [large_entity, {'b': 2}])
+
+    def test_iter_embedded_entities__given_other_embedded_types__then_skip_them(self):
+        # given
+        document = {'_embedded': {'processes': [{'a': 1}], 'files': [{'b': 2}], 'empty': []}, '_links': {}}
+
+        # when
+        entities = list(iter_embedded_entities(chunked(json.dumps(document), 3), 'files', {}))
+
+        # then
+        self.assertEqual(entities, [{'b': 2}])
+
+    def test_iter_embedded_entities__given_no_embedded__then_yield_nothing(self):
+        # given
+        page = {}
+
+        # when
+        entities = list(iter_embedded_entities(chunked('{"_links": {}, "page": {"totalElements": 0}}', 4), 'files',
+                                               page))
+
+        # then
+        self.assertEqual(entities, [])
+        self.assertEqual(page, {'_links': {}, 'page': {'totalElements': 0}})
+
+    def test_iter_embedded_entities__given_truncated_page__then_raise_error(self):
+        with self.assertRaises(ValueError):
+            list(iter_embedded_entities(chunked('{"_embedded": {"files": [{"a": 1}, {"b"', 4), 'files', {}))
+
+
+class SelectFieldsTest(TestCase):
+    def setUp(self):
+        self.entity = {
+            'uuid': {'uuid': 'uuid-1'},
+            'content': {'describedBy': 'schema', 'name': 'a'},
+            'validationErrors': [],
+            '_links': {'self': {'href': 'http://ingest/files/1'}, 'project': {'href': 'http://ingest/projects/1'}}
+        }
+
+    def test_select_fields(self):
+        # when
+        selected = select_fields(self.entity, ['uuid', '_links.self', 'content.describedBy', 'missing', 'uuid.a.b'])
+
+        # then
+        self.assertEqual(selected, {
+            'uuid': {'uuid': 'uuid-1'},
+            'content': {'describedBy': 'schema'},
+            '_links': {'self': {'href': 'http://ingest/files/1'}}
+        })
+
+    def test_select_fields__given_no_fields__then_keep_entity(self):
+        self.assertIs(select_fields(self.entity, None), self.entity)
@@ -1,10 +1,15 @@
+import json
+import threading
 import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import TestCase
 
 import requests_mock
 from requests import HTTPError
 from requests_mock import Mocker
 
+from hca_ingest.api.ingestapi import IngestApi
+from hca_ingest.api.requests_utils import create_session_with_retry
 from tests.unit.api.utils_ingestapi import mocked_response_ingest_api, register_schema_responses
 
 API_URL = "http://mockingestapi.com"
@@ -50,6 +55,7 @@ class IngestApiTest(TestCase):
         submission_files_url, submission_url = self.mock_parent_child_link(
             mock, 'submissionEnvelope', '1', 'files'
         )
+        self.mock_submission_files(mock, submission_files_url)
         mock.post(submission_files_url, json={})
 
         filename = "test-filename"
@@ -60,10 +66,90 @@ class IngestApiTest(TestCase):
         self.api.create_file(submission_url, filename, content)
 
         # then
-        self.assertEqual(mock.call_count, 2)
+        self.assertEqual(mock.call_count, 3)
+        self.assertEqual(mock.last_request.method, 'POST')
         self.assertEqual(mock.last_request.path, submission_files_url.removeprefix(API_URL))
         self.assertDictEqual(mock.last_request.json(), target_request)
 
+    def test_create_file__lists_submission_files_once(self, mock):
+        # given
+        submission_files_url, submission_url = self.mock_parent_child_link(
+            mock, 'submissionEnvelope', '1', 'files'
+        )
+        self.mock_submission_files(mock, submission_files_url)
+        mock.post(submission_files_url, json={})
+
+        # when
+        for filename in ['file_1', 'file_2', 'file_3']:
+            self.api.create_file(submission_url, filename, {'attribute': 'value'})
+
+        # then
+        methods = [request.method for request in mock.request_history]
+        self.assertEqual(methods, ['GET', 'GET', 'POST', 'POST', 'POST'])
+
+    def test_create_file__existing_file_is_patched(self, mock):
+        # given
+        existing_file_url = f'{API_URL}/files/existing-file'
+        existing_file = {
+            'fileName': 'mock-filename',
+            'content': {'attr': 'value'},
+            '_links': {'self': {'href': existing_file_url}}
+        }
+        submission_files_url, submission_url = self.mock_parent_child_link(
+            mock, 'envelope', 'ENVELOPE_2', 'files'
+        )
+        self.mock_submission_files(mock, submission_files_url, [existing_file])
+        mock.patch(existing_file_url, json={})
+
+        # when
+        self.api.create_file(submission_url, 'mock-filename', {'attr2': 'value2'})
+
+        # then
+        self.assertEqual(mock.call_count, 3)
+        self.assertEqual(mock.last_request.method, 'PATCH')
+        self.assertEqual(mock.last_request.path, existing_file_url.removeprefix(API_URL))
+        self.assertDictEqual(mock.last_request.json(), {'content': {'attr': 'value', 'attr2': 'value2'}})
+
+    def test_create_file__deleted_file_is_created(self, mock):
+        # given
+        deleted_file_url = f'{API_URL}/files/deleted-file'
+        deleted_file = {
+            'fileName': 'mock-filename',
+            'content': {'attr': 'value'},
+            '_links': {'self': {'href': deleted_file_url}}
+        }
+        submission_files_url, submission_url = self.mock_parent_child_link(
+            mock, 'envelope', 'ENVELOPE_2', 'files'
+        )
+        self.mock_submission_files(mock, submission_files_url, [deleted_file])
+        mock.patch(deleted_file_url, status_code=404)
+        mock.post(submission_files_url, json={})
+
+        # when
+        self.api.create_file(submission_url, 'mock-filename', {'attr2': 'value2'})
+
+        # then
+        self.assertEqual(mock.last_request.method, 'POST')
+        self.assertDictEqual(mock.last_request.json(), {'fileName': 'mock-filename', 'content': {'attr2': 'value2'}})
+
+    def test_forget_submission_files__lists_submission_files_again(self, mock):
+        # given
+        submission_files_url, submission_url = self.mock_parent_child_link(
+            mock, 'submissionEnvelope', '1', 'files'
+        )
+        self.mock_submission_files(mock, submission_files_url)
+        mock.post(submission_files_url, json={})
+        self.api.create_file(submission_url, 'file_1', {'attribute': 'value'})
+
+        # when
+        self.api.forget_submission_files(submission_url)
+        self.api.create_file(submission_url, 'file_2', {'attribute': 'value'})
+
+        # then
+        methods = [request.method for request in mock.request_history]
+        self.assertEqual(methods, ['GET', 'GET', 'POST', 'GET', 'POST'])
+        self.assertEqual(self.api._files_by_name, {submission_url: {}})
+
     def test_create_file_conflict(self, mock):
         self.create_file_fail_scenario(mock, 409)
 
@@ -88,6 +174,8 @@ class IngestApiTest(TestCase):
         submission_files_url, submission_url = self.mock_parent_child_link(
             mock, 'envelope', 'ENVELOPE_2', 'files'
         )
+        # the file is created by someone else after the files of the submission are listed
+        self.mock_submission_files(mock, submission_files_url)
         mock.post(submission_files_url, status_code=status_code)
         self.mock_search_link(
             mock,
@@ -101,10 +189,14 @@ class IngestApiTest(TestCase):
         self.api.create_file(submission_url, "mock-filename", new_file_content)
 
         # then
-        self.assertEqual(mock.call_count, 5)
+        self.assertEqual(mock.call_count, 6)
         self.assertEqual(mock.last_request.path, existing_file_url.removeprefix(API_URL))
         self.assertDictEqual(mock.last_request.json(), target)
 
+    @staticmethod
+    def mock_submission_files(mock, submission_files_url, files=()):
+        mock.get(submission_files_url, json={'_embedded': {'files': list(files)}, '_links': {}})
+
     def test_get_submission_by_uuid(self, mock):
         # given
         test_uuid = str(uuid.uuid4())
@@ -179,6 +271,92 @@ class IngestApiTest(TestCase):
         # then
         self.assertEqual(len(list(entities)), 5)
 
+    def test_get_all__given_pages_in_flight__then_yield_entities_in_order(self, mock):
+        # given
+        url = f'{API_URL}/bundleManifests'
+        total_pages = 5
+        for number in range(total_pages):
+            links = {'next': {'href': f'{url}?page={number + 1}&size=2'}} if number + 1 < total_pages else {}
+            mock.get(f'{url}?page={number}&size=2', json={
+                'page': {'size': 2, 'totalElements': 2 * total_pages, 'totalPages': total_pages, 'number': number},
+                '_embedded': {'bundleManifests': [{'index': 2 * number}, {'index': 2 * number + 1}]},
+                '_links': links
+            })
+        self.api.set_pages_in_flight(3)
+
+        # when
+        entities = list(self.api.get_all(f'{url}?page=0&size=2', 'bundleManifests'))
+
+        # then
+        self.assertEqual([entity['index'] for entity in entities], list(range(2 * total_pages)))
+        self.assertEqual(mock.call_count, total_pages)
+
+    def test_get_all__given_pages_in_flight_and_no_page_metadata__then_follow_next_links(self, mock):
+        # given
+        url = f'{API_URL}/bundleManifests'
+        mock.get(f'{url}?page=0', json={
+            '_embedded': {'bundleManifests': [{'index': 0}]},
+            '_links': {'next': {'href': f'{url}?page=1'}}
+        })
+        mock.get(f'{url}?page=1', json={
+            '_embedded': {'bundleManifests': [{'index': 1}]},
+            '_links': {},
+            'page': {'number': 1}
+        })
+        self.api.set_pages_in_flight(3)
+
+        # when
+        entities = list(self.api.get_all(f'{url}?page=0', 'bundleManifests'))
+
+        # then
+        self.assertEqual([entity['index'] for entity in entities], [0, 1])
+
+    def test_get_all__given_stream_pages__then_decode_pages_while_reading(self, mock):
+        # given
+        url = f'{API_URL}/bundleManifests'
+        mock.get(f'{url}?page=0', json={
+            '_embedded': {'bundleManifests': [{'index': 0}, {'index': 1}]},
+            '_links': {'next': {'href': f'{url}?page=1'}}
+        })
+        mock.get(f'{url}?page=1', json={
+            '_embedded': {'bundleManifests': [{'index': 2}]},
+            '_links': {},
+            'page': {'number': 1}
+        })
+        self.api.set_stream_pages(True)
+
+        # when
+        entities = list(self.api.get_all(f'{url}?page=0', 'bundleManifests'))
+        call_count = mock.call_count
+        list(self.api.get_all(f'{url}?page=0', 'bundleManifests'))
+
+        # then
+        self.assertEqual([entity['index'] for entity in entities], [0, 1, 2])
+        self.assertEqual(mock.last_request.headers['Cache-Control'], 'no-store')
+        # streamed pages are not cached, reading them again requests them again
+        self.assertEqual(mock.call_count, 2 * call_count)
+
+    def test_get_related_entities__given_projection_and_fields(self, mock):
+        # given
+        url = f'{API_URL}/submissionEnvelopes/1/files'
+        mock.get(url, json={
+            '_embedded': {'files': [{
+                'uuid': {'uuid': 'file-uuid'},
+                'content': {'describedBy': 'schema'},
+                '_links': {'self': {'href': f'{API_URL}/files/1'}}
+            }]},
+            '_links': {}
+        })
+        submission = {'_links': {'files': {'href': url}}}
+
+        # when
+        files = list(self.api.get_related_entities('files', submission, 'files', projection='id',
+                                                   fields=['uuid.uuid', '_links.self']))
+
+        # then
+        self.assertEqual(mock.last_request.qs['projection'], ['id'])
+        self.assertEqual(files, [{'uuid': {'uuid': 'file-uuid'}, '_links': {'self': {'href': f'{API_URL}/files/1'}}}])
+
     def test_get_related_entities_count(self, mock):
         # given
         project_files_url = f'{API_URL}/project/1/files'
@@ -316,3 +494,104 @@ class IngestApiTest(TestCase):
 
         # then
         self.assertEqual(result, None)
+
+    def test_link_entities(self, mock):
+        # given
+        process_url = f'{API_URL}/processes/1'
+        protocols_url = f'{process_url}/protocols'
+        process = {'_links': {'self': {'href': process_url}, 'protocols': {'href': protocols_url}}}
+        protocols = [{'_links': {'self': {'href': f'{API_URL}/protocols/{index}'}}} for index in range(3)]
+        mock.post(protocols_url, status_code=204)
+
+        # when
+        self.api.link_entities(process, protocols, 'protocols')
+
+        # then
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(mock.last_request.headers['Content-type'], 'text/uri-list')
+        self.assertEqual(mock.last_request.text,
+                         f'{API_URL}/protocols/0\n{API_URL}/protocols/1\n{API_URL}/protocols/2')
+
+    def test_link_entities__given_no_relationship__then_raise_error(self, mock):
+        # given
+        process = {'_links': {'self': {'href': f'{API_URL}/processes/1'}}}
+        protocols = [{'_links': {'self': {'href': f'{API_URL}/protocols/1'}}}]
+
+        # then
+        with self.assertRaises(ValueError):
+            # when
+            self.api.link_entities(process, protocols, 'protocols')
+
+
+class IngestApiCreateFileConflictTest(TestCase):
+    """Sends the requests to a local server, the retries of the session are skipped by requests_mock."""
+
+    def setUp(self):
+        self.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.url = f'http://{host}:{port}'
+        self.existing_file = {'content': {'attr': 'value'}, '_links': {'self': {'href': f'{self.url}/files/1'}}}
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler_class(self):
+        test = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond()
+
+            def do_POST(self):
+                self._respond()
+
+            def do_PATCH(self):
+                self._respond()
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                test.requests.append((self.command, self.path.split('?')[0], body))
+                status, response = test.respond(self.command, self.path.split('?')[0])
+                content = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
+
+    def respond(self, method, path):
+        links = {
+            '/': {'_links': {}},
+            '/submissionEnvelopes/1': {'_links': {'files': {'href': f'{self.url}/submissionEnvelopes/1/files'}}},
+            '/files/search': {'_links': {'findBySubmissionEnvelopeAndFileName': {
+                'href': f'{self.url}/files/search/findBySubmissionEnvelopeAndFileName'}}},
+            '/files/search/findBySubmissionEnvelopeAndFileName': {'_embedded': {'files': [self.existing_file]}},
+            '/submissionEnvelopes/1/files': {'_embedded': {'files': []}, '_links': {}}
+        }
+        if method == 'POST':
+            return 409, {}
+        if method == 'PATCH':
+            return 200, self.existing_file
+        return 200, links[path]
+
+    def test_create_file__given_conflict__then_post_once_and_update_existing_file(self):
+        # given
+        api = IngestApi(url=self.url, session=create_session_with_retry(backend='memory'))
+
+        # when
+        api.create_file(f'{self.url}/submissionEnvelopes/1', 'mock-filename', {'attr2': 'value2'})
+
+        # then
+        methods = [method for method, _, _ in self.requests]
+        self.assertEqual(1, methods.count('POST'))
+        self.assertEqual('PATCH', methods[-1])
+        self.assertEqual({'content': {'attr': 'value', 'attr2': 'value2'}}, json.loads(self.requests[-1][2]))
@@ -1,9 +1,18 @@
+import os
+import sqlite3
+import tempfile
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
+from unittest.mock import Mock
 
 import requests_mock
+from requests_cache import CachedSession
+from requests_cache.backends.sqlite import SQLiteCache
 from requests_mock import Mocker
 
+from hca_ingest.api.ingestapi import IngestApi
+from hca_ingest.api.requests_utils import CacheStats
 from tests.unit.api.utils_ingestapi import mocked_response_ingest_api, register_schema_responses
 
 API_URL = "http://test.caching.ingest"
@@ -114,6 +123,127 @@ class IngestApiCacheTest(TestCase):
         # then
         self.assertFalse(self.api.session.cache.has_url(folder_url))
 
+    def test_write_keeps_unrelated_items_in_cache(self, mock):
+        # given
+        folder_url, item_url, search_url, search_all_url = self.register_item_responses(mock)
+        other_urls = self.register_item_responses(mock, item_type='others', item_id='other-id')
+        self.api.patch(item_url, json={})
+        self.prime_cache(folder_url, item_url, search_url, search_all_url, *other_urls)
+
+        # when
+        self.api.patch(item_url, json={})
+
+        # then
+        self.assertFalse(self.api.session.cache.has_url(item_url))
+        self.assertFalse(self.api.session.cache.has_url(search_url))
+        for url in other_urls:
+            self.assertTrue(self.api.session.cache.has_url(url))
+        self.assertEqual(self.api.cache_stats.clears, 0)
+        self.assertEqual(self.api.cache_stats.evictions, 4)
+
+    def test_write_evicts_items_cached_by_other_clients_of_the_session(self, mock):
+        # given
+        folder_url, item_url, search_url, search_all_url = self.register_item_responses(mock)
+        other_api = IngestApi(url=API_URL, session=self.api.session)
+        other_api.patch(item_url, json={})
+        self.api.patch(item_url, json={})
+        self.prime_cache(folder_url, item_url, search_url, search_all_url)
+
+        # when
+        other_api.patch(item_url, json={})
+
+        # then
+        for url in [folder_url, item_url, search_url, search_all_url]:
+            self.assertFalse(self.api.session.cache.has_url(url))
+        self.assertEqual(other_api.cache_stats.evictions, 4)
+
+    def test_shared_cache_evicts_items_cached_by_other_processes(self, mock):
+        # given
+        memory_cache = self.api.session.cache
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, 'http_cache')
+            self.api.session.cache = SQLiteCache(cache_path)
+            try:
+                folder_url, item_url, search_url, search_all_url = self.register_item_responses(mock)
+                other_urls = self.register_item_responses(mock, item_type='others', item_id='other-id')
+                self.api.patch(item_url, json={})
+                self.prime_cache(*other_urls)
+                # another process caches responses in the same file after the first write
+                other_process_session = CachedSession(cache_path)
+                for url in [folder_url, item_url, search_url, search_all_url]:
+                    other_process_session.get(url)
+
+                # when
+                self.api.patch(item_url, json={})
+
+                # then
+                for url in [folder_url, item_url, search_url, search_all_url]:
+                    self.assertFalse(self.api.session.cache.has_url(url))
+                for url in other_urls:
+                    self.assertTrue(self.api.session.cache.has_url(url))
+                self.assertEqual(self.api.cache_stats.clears, 0)
+                self.assertEqual(self.api.cache_stats.evictions, 4)
+            finally:
+                self.api.session.cache = memory_cache
+
+    def test_write__given_cache_fails__then_evict_before_next_request(self, mock):
+        # given
+        folder_url, item_url, search_url, search_all_url = self.register_item_responses(mock)
+        self.api.patch(item_url, json={})
+        self.prime_cache(folder_url, item_url, search_url, search_all_url)
+        delete = self.api.session.cache.delete
+        self.api.session.cache.delete = Mock(side_effect=sqlite3.OperationalError('database is locked'))
+
+        # when
+        response = self.api.patch(item_url, json={})
+
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.api.session.cache.has_url(item_url))
+
+        # when
+        self.api.session.cache.delete = delete
+        self.assertFalse(self.api.get(item_url).from_cache)
+
+        # then
+        for url in [folder_url, search_url, search_all_url]:
+            self.assertFalse(self.api.session.cache.has_url(url))
+
+    def test_link_removes_linked_item_from_cache(self, mock):
+        # given
+        folder_url, item_url, search_url, search_all_url = self.register_item_responses(mock)
+        other_folder_url, other_item_url, _, _ = self.register_item_responses(mock, item_type='others',
+                                                                              item_id='other-id')
+        unrelated_urls = self.register_item_responses(mock, item_type='unrelated', item_id='unrelated-id')
+        link_url = f'{item_url}/others'
+        mock.put(link_url, status_code=200)
+        self.api.put(link_url)
+        self.prime_cache(item_url, other_folder_url, other_item_url, *unrelated_urls)
+
+        # when
+        self.api.put(link_url, data=other_item_url, headers={'Content-type': 'text/uri-list'})
+
+        # then
+        self.assertFalse(self.api.session.cache.has_url(item_url))
+        self.assertFalse(self.api.session.cache.has_url(other_folder_url))
+        self.assertFalse(self.api.session.cache.has_url(other_item_url))
+        for url in unrelated_urls:
+            self.assertTrue(self.api.session.cache.has_url(url))
+
+    def test_cache_stats_count_hits_and_misses(self, mock):
+        # given
+        folder_url, item_url, _, _ = self.register_item_responses(mock)
+        misses = self.api.cache_stats.misses
+
+        # when
+        self.api.get(item_url)
+        self.api.get(item_url)
+        self.api.get(item_url)
+
+        # then
+        self.assertEqual(self.api.cache_stats.misses, misses + 1)
+        self.assertEqual(self.api.cache_stats.hits, 2)
+
     def test_bypass_cache_updates_cache(self, mock):
         # given
         test_id = str(uuid.uuid4()).replace('-', '')
@@ -213,3 +343,17 @@ class IngestApiCacheTest(TestCase):
         for url in urls:
             self.api.get(url)
             self.assertTrue(self.api.session.cache.has_url(url))
+
+
+class CacheStatsTest(TestCase):
+    def test_increment_from_threads(self):
+        # given
+        cache_stats = CacheStats()
+
+        # when
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in range(8):
+                executor.submit(lambda: [cache_stats.increment('hits') for _ in range(10000)])
+
+        # then
+        self.assertEqual(cache_stats.hits, 80000)
@@ -177,7 +177,7 @@ class ColumnSpecificationTest(TestCase):
 
         self.assertEqual(ConversionType.LINKING_DETAIL, column_specification.get_conversion_type())
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def _mock_fetching_of_property_migrations(self, property_migrations_request_mock):
         property_migrations_request_mock.return_value = Mock(ok=True)
         property_migrations_request_mock.return_value.json.return_value = {'migrations': []}
@@ -148,3 +148,21 @@ class MetadataEntityTest(TestCase):
         self.assertEqual(test_links, submission_dict.get('links_by_entity'))
         self.assertEqual(test_external_links, submission_dict.get('external_links_by_entity'))
         self.assertEqual(test_linking_details, submission_dict.get('linking_details'))
+
+    def test_map_for_submission__given_transfer__then_content_is_not_copied(self):
+        # given:
+        default_content = {'describedBy': 'schema'}
+        metadata_entity = MetadataEntity(concrete_type='warehouse', content=default_content,
+                                         links={'items': ['123']})
+        metadata_entity.define_content('description', 'test')
+
+        # when:
+        submission_dict = metadata_entity.map_for_submission(transfer=True)
+
+        # then:
+        self.assertEqual({'describedBy': 'schema', 'description': 'test'}, submission_dict.get('content'))
+        self.assertIs(metadata_entity._content.node, submission_dict.get('content'))
+        self.assertEqual({'items': ['123']}, submission_dict.get('links_by_entity'))
+
+        # and: the defaults given to the entity are left alone
+        self.assertEqual({'describedBy': 'schema'}, default_content)
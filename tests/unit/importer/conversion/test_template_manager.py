@@ -5,7 +5,8 @@ from openpyxl import Workbook
 
 from hca_ingest.importer.conversion import conversion_strategy
 from hca_ingest.importer.conversion.conversion_strategy import CellConversion
-from hca_ingest.importer.conversion.template_manager import TemplateManager, RowTemplate, InvalidTabName
+from hca_ingest.importer.conversion.template_manager import TemplateManager, RowTemplate, InvalidTabName, \
+    RowTemplateCache
 from hca_ingest.importer.data_node import DataNode
 from hca_ingest.importer.spreadsheet.ingest_worksheet import IngestWorksheet, \
     IngestRow
@@ -41,7 +42,7 @@ class TemplateManagerTest(TestCase):
             }
         }
 
-        schema_template.lookup_property_from_template = lambda key: lookup_map.get(key)
+        schema_template.find_property_in_template = lambda key: lookup_map.get(key)
 
         ingest_api = MagicMock(name='mock_ingest_api')
 
@@ -94,7 +95,7 @@ class TemplateManagerTest(TestCase):
             "user.numbers": property_two_schema
 
         }
-        template.lookup_property_from_template = lambda key: spec_map.get(key)
+        template.find_property_in_template = lambda key: spec_map.get(key)
 
         # and:
         name_strategy = MagicMock('name_strategy')
@@ -152,7 +153,7 @@ class TemplateManagerTest(TestCase):
             "profile_type": schema,
             "profile.name": property_schema
         }
-        schema_template.lookup_property_from_template = lambda key: spec_map.get(key)
+        schema_template.find_property_in_template = lambda key: spec_map.get(key)
 
         # and:
         determine_strategy.return_value = FakeConversion('')
@@ -184,7 +185,7 @@ class TemplateManagerTest(TestCase):
         spec_map = {
             'product': {'schema': {'domain_entity': 'merchandise/product'}}
         }
-        template.lookup_property_from_template = lambda key: spec_map.get(key, None)
+        template.find_property_in_template = lambda key: spec_map.get(key, None)
 
         domain_entity = "merchandise/product"
         schema_url = "http://schema.sample.com/product"
@@ -261,6 +262,44 @@ class TemplateManagerTest(TestCase):
         # then:
         self.assertEqual(0, len(row_template.cell_conversions))
 
+    @patch.object(conversion_strategy, 'determine_strategy')
+    def test_create_row_template__reuses_templates_of_same_layout(self, determine_strategy):
+        # given:
+        schema_template = MagicMock(name='schema_template')
+        schema_template.is_versioned = True
+        schema_template.metadata_schema_urls = ['https://schema.humancellatlas.org/type/profile/1.0.0/profile_type']
+        self._mock_schema_lookup(schema_template, object_type='profile_type', main_category='profile')
+        determine_strategy.return_value = FakeConversion('')
+        row_template_cache = RowTemplateCache()
+        template_manager = TemplateManager(schema_template, MagicMock(name='mock_ingest_api'),
+                                           row_template_cache=row_template_cache)
+
+        # and:
+        workbook = Workbook()
+        worksheets = []
+        for title, header in [('Profile', 'profile.name'), ('Profile copy', 'profile.name'),
+                              ('Profile other', 'profile.age')]:
+            worksheet = workbook.create_sheet(title)
+            worksheet['A4'] = header
+            worksheets.append(IngestWorksheet(worksheet))
+
+        # when:
+        row_templates = [template_manager.create_row_template(worksheet) for worksheet in worksheets]
+
+        # then:
+        self.assertIs(row_templates[0], row_templates[1])
+        self.assertIsNot(row_templates[0], row_templates[2])
+        self.assertEqual(2, determine_strategy.call_count)
+        self.assertEqual((1, 2), (row_template_cache.hits, row_template_cache.misses))
+
+        # when:
+        schema_template.is_versioned = False
+        template_manager.create_row_template(worksheets[0])
+
+        # then:
+        self.assertEqual(3, determine_strategy.call_count)
+        self.assertEqual((1, 2), (row_template_cache.hits, row_template_cache.misses))
+
     @staticmethod
     def _mock_schema_lookup(schema_template, schema_url='', object_type='', main_category=None):
         schema_template.get_tabs_config = MagicMock()
@@ -276,7 +315,7 @@ class TemplateManagerTest(TestCase):
         spec_map = {
             object_type: schema
         }
-        schema_template.lookup_property_from_template = lambda key: spec_map.get(key)
+        schema_template.find_property_in_template = lambda key: spec_map.get(key)
 
     def test_get_schema_type(self):
         # given
@@ -291,8 +330,8 @@ class TemplateManagerTest(TestCase):
                 'url': 'https://schema.humancellatlas.org/type/biomaterial/5.0.0/donor_organism'
             }
         }
-        schema_template.lookup_property_from_template = MagicMock(
-            name='lookup_property_from_template', return_value=spec)
+        schema_template.find_property_in_template = MagicMock(
+            name='find_property_in_template', return_value=spec)
         template_manager = TemplateManager(schema_template, ingest_api)
 
         # when:
@@ -316,8 +355,8 @@ class TemplateManagerTest(TestCase):
             }
         }
 
-        schema_template.lookup_property_from_template = MagicMock(
-            name='lookup_property_from_template', return_value=spec)
+        schema_template.find_property_in_template = MagicMock(
+            name='find_property_in_template', return_value=spec)
         template_manager = TemplateManager(schema_template, ingest_api)
         template_manager.get_latest_schema_url = MagicMock(return_value=latest_url)
 
@@ -370,7 +409,7 @@ class TemplateManagerTest(TestCase):
         # given:
         template = MagicMock(name='schema_template')
         schema_spec = {'schema': {'domain_entity': 'user/profile'}}
-        template.lookup_property_from_template = MagicMock(return_value=schema_spec)
+        template.find_property_in_template = MagicMock(return_value=schema_spec)
 
         # and:
         template_manager = TemplateManager(template, MagicMock(name='mock_ingest_api'))
@@ -409,7 +448,7 @@ class RowTemplateTest(TestCase):
         worksheet['B1'] = 'dela Cruz'
         worksheet['C1'] = 'Manila'
         worksheet['D1'] = 'Philippines'
-        row = list(worksheet.rows)[0]
+        row = list(worksheet.iter_rows(values_only=True))[0]
         row = IngestRow('worksheet_title', 0, row)
 
         # when:
@@ -466,6 +505,20 @@ class RowTemplateTest(TestCase):
         self.assertEqual({'description': 'a thing used for writing', 'name': 'pen'}, result.content.as_dict())
         self.assertEqual(errors, [])
 
+    def test_do_import__skips_columns_without_conversion(self):
+        # given:
+        do_nothing = MagicMock(spec=conversion_strategy.DoNothing)
+        cell_conversions = [FakeConversion('name'), do_nothing, FakeConversion('description')]
+        row_template = RowTemplate('user', 'user', cell_conversions)
+
+        # when:
+        result, errors = row_template.do_import(IngestRow('worksheet_title', 0, ('pen', 'ignored')))
+
+        # then:
+        self.assertEqual({'name': 'pen'}, result.content.as_dict())
+        self.assertEqual(errors, [])
+        do_nothing.apply.assert_not_called()
+
     def test_do_import_row_from_module_worksheet(self):
         # given:
         row_template = self._create_row_template()
@@ -489,7 +542,7 @@ class RowTemplateTest(TestCase):
         worksheet = workbook.create_sheet('list_of_things')
         worksheet['A1'] = 'pen'
         worksheet['B1'] = 'a thing used for writing'
-        row = list(worksheet.rows)[0]
+        row = list(worksheet.iter_rows(values_only=True))[0]
         row = IngestRow('worksheet_title', 0, row)
         return row
 
@@ -511,7 +564,7 @@ class RowTemplateTest(TestCase):
         worksheet['B1'] = 'dela Cruz'
         worksheet['C1'] = 'Manila'
         worksheet['D1'] = 'Philippines'
-        row = list(worksheet.rows)[0]
+        row = list(worksheet.iter_rows(values_only=True))[0]
         row = IngestRow('worksheet_title', 0, row)
 
         # when:
@@ -529,3 +582,24 @@ class RowTemplateTest(TestCase):
         address = result.get_content('address')
         self.assertIsNotNone(address)
         self.assertEqual('Philippines', address.get('country'))
+
+
+class RowTemplateCacheTest(TestCase):
+    def test_get__evicts_least_recently_used(self):
+        # given:
+        cache = RowTemplateCache(max_size=2)
+        row_templates = [RowTemplate('user', 'user_profile', []) for _ in range(3)]
+        cache.put('first', row_templates[0])
+        cache.put('second', row_templates[1])
+
+        # when:
+        cache.get('first')
+        cache.put('third', row_templates[2])
+
+        # then:
+        self.assertIs(row_templates[0], cache.get('first'))
+        self.assertIsNone(cache.get('second'))
+        self.assertIs(row_templates[2], cache.get('third'))
+        self.assertEqual(2, len(cache))
+        self.assertEqual((3, 1, 1), (cache.hits, cache.misses, cache.evictions))
+        self.assertEqual(0.75, cache.hit_rate)
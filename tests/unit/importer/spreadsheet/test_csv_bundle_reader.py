@@ -0,0 +1,83 @@
+import os
+import tempfile
+import zipfile
+from unittest import TestCase
+
+from hca_ingest.importer.spreadsheet.csv_bundle_reader import is_csv_bundle, load_csv_bundle
+from hca_ingest.importer.spreadsheet.ingest_workbook import IngestWorkbook, CSV_BUNDLE_READER
+
+SPREADSHEET_PATH = os.path.join(os.path.dirname(__file__), '..', 'metadata_spleen_new_protocols.xlsx')
+
+DONOR_CSV = '''DONOR ORGANISM,,
+Donor ID,Is living?,Notes
+"A unique ID for the donor.",,
+donor_organism.biomaterial_core.biomaterial_id,donor_organism.is_living,donor_organism.notes
+FILL OUT INFORMATION BELOW THIS ROW,,
+donor_1,yes,"first, with a comma"
+,,
+donor_2,no,
+'''
+
+SCHEMAS_TSV = '''Schemas
+https://schema.humancellatlas.org/type/project/14.2.0/project
+https://schema.humancellatlas.org/type/biomaterial/15.5.0/donor_organism
+'''
+
+
+class CsvBundleReaderTest(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.bundle_dir = os.path.join(self.temp_dir.name, 'bundle')
+        os.mkdir(self.bundle_dir)
+        self._write('Donor organism.csv', DONOR_CSV)
+        self._write('Schemas.tsv', SCHEMAS_TSV)
+        self._write('notes.txt', 'not a worksheet')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write(self, file_name, content):
+        with open(os.path.join(self.bundle_dir, file_name), 'w', encoding='utf-8', newline='') as bundle_file:
+            bundle_file.write(content)
+
+    def _zip_bundle(self):
+        zip_path = os.path.join(self.temp_dir.name, 'bundle.zip')
+        with zipfile.ZipFile(zip_path, 'w') as archive:
+            for file_name in os.listdir(self.bundle_dir):
+                archive.write(os.path.join(self.bundle_dir, file_name), f'bundle/{file_name}')
+        return zip_path
+
+    def test_is_csv_bundle(self):
+        self.assertTrue(is_csv_bundle(self.bundle_dir))
+        self.assertTrue(is_csv_bundle(self._zip_bundle()))
+        self.assertFalse(is_csv_bundle(SPREADSHEET_PATH))
+
+    def test_load_csv_bundle__worksheet_per_file(self):
+        # when:
+        bundle = load_csv_bundle(self.bundle_dir)
+
+        # then:
+        self.assertEqual(['Donor organism', 'Schemas'], bundle.sheetnames)
+        rows = list(bundle['Donor organism'].iter_rows(min_row=4, max_row=6, values_only=True))
+        self.assertEqual(rows, [
+            ('donor_organism.biomaterial_core.biomaterial_id', 'donor_organism.is_living', 'donor_organism.notes'),
+            ('FILL OUT INFORMATION BELOW THIS ROW', None, None),
+            ('donor_1', 'yes', 'first, with a comma')
+        ])
+
+    def test_ingest_workbook__reads_directory_bundle(self):
+        self._assert_workbook(IngestWorkbook.from_file(self.bundle_dir, reader=CSV_BUNDLE_READER))
+
+    def test_ingest_workbook__reads_zip_bundle(self):
+        self._assert_workbook(IngestWorkbook.from_file(self._zip_bundle(), reader=CSV_BUNDLE_READER))
+
+    def _assert_workbook(self, workbook):
+        self.assertEqual(workbook.get_schemas(), [
+            'https://schema.humancellatlas.org/type/project/14.2.0/project',
+            'https://schema.humancellatlas.org/type/biomaterial/15.5.0/donor_organism'
+        ])
+        worksheets = workbook.importable_worksheets()
+        self.assertEqual(['Donor organism'], [worksheet.title for worksheet in worksheets])
+        self.assertTrue(worksheets[0].has_column('donor_organism.is_living'))
+        rows = [(row.index, row.values) for row in worksheets[0].get_data_rows()]
+        self.assertEqual(rows, [(6, ('donor_1', 'yes', 'first, with a comma')), (7, ('donor_2', 'no', None))])
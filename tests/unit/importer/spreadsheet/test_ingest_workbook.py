@@ -105,6 +105,25 @@ class IngestWorkbookTest(TestCase):
 
         self.assertFalse(wb.workbook['X'].cell(5, 1).value, None)
 
+    def test_add_entity_uuids__given_existing_uuid_column__then_update_column(self):
+        # given:
+        entities = [Entity('type', 'AA', 'content', concrete_type='a', ingest_json={'uuid': {'uuid': 'A-1-uuid'}},
+                           spreadsheet_location={'row_index': 5, 'worksheet_title': 'A'})]
+        mock_submission = Mock('submission')
+        mock_submission.get_entities = Mock(return_value=entities)
+
+        workbook = create_test_workbook('A')
+        workbook['A'].cell(4, 1).value = 'a.name'
+        workbook['A'].cell(4, 2).value = 'a.uuid'
+        wb = IngestWorkbook(workbook)
+
+        # when
+        wb.add_entity_uuids(mock_submission)
+
+        # then
+        self.assertEqual(wb.workbook['A'].cell(4, 1).value, 'a.name')
+        self.assertEqual(wb.workbook['A'].cell(5, 2).value, 'A-1-uuid')
+
     def test_add_schemas_worksheet(self):
         # given
         sheets = ['A', 'B', 'C', 'X']
@@ -1,8 +1,8 @@
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import patch
 
 import hca_ingest.utils.spreadsheet as spreadsheet_utils
-from hca_ingest.importer.spreadsheet.ingest_worksheet import IngestWorksheet
+from hca_ingest.importer.spreadsheet.ingest_worksheet import IngestWorksheet, MaxRowExceededError
 from tests.utils import create_test_workbook
 
 
@@ -81,6 +81,49 @@ class IngestWorksheetTest(TestCase):
         self.assertEqual(len(column_headers), 3)
         self.assertEqual(column_headers, ['name', 'address', 'email'])
 
+    def test_get_column_headers__reads_header_row_once(self):
+        # given:
+        header_row = 4
+        rows = [['name', 'address']]
+        worksheet = spreadsheet_utils.create_worksheet('person', rows, start_row=header_row)
+        ingest_worksheet = IngestWorksheet(worksheet, header_row_idx=header_row)
+
+        # when:
+        with patch.object(worksheet, 'iter_rows', wraps=worksheet.iter_rows) as iter_rows:
+            ingest_worksheet.get_column_headers()
+            ingest_worksheet.has_column('name')
+            ingest_worksheet.get_column_index('address')
+
+        # then:
+        iter_rows.assert_called_once()
+
+    def test_get_column_index__skips_none_cells(self):
+        # given:
+        header_row = 4
+        rows = [['name', None, 'email', 'name']]
+        worksheet = spreadsheet_utils.create_worksheet('person', rows, start_row=header_row)
+        ingest_worksheet = IngestWorksheet(worksheet, header_row_idx=header_row)
+
+        # expect:
+        self.assertEqual(ingest_worksheet.get_column_index('name'), 1)
+        self.assertEqual(ingest_worksheet.get_column_index('email'), 3)
+        self.assertIsNone(ingest_worksheet.get_column_index('mobile'))
+
+    def test_insert_column_with_header__updates_column_headers(self):
+        # given:
+        header_row = 4
+        rows = [['name', 'address']]
+        worksheet = spreadsheet_utils.create_worksheet('person', rows, start_row=header_row)
+        ingest_worksheet = IngestWorksheet(worksheet, header_row_idx=header_row)
+        ingest_worksheet.get_column_headers()
+
+        # when:
+        ingest_worksheet.insert_column_with_header('person.uuid', 1)
+
+        # then:
+        self.assertEqual(ingest_worksheet.get_column_headers(), ['person.uuid', 'name', 'address'])
+        self.assertEqual(ingest_worksheet.get_column_index('name'), 2)
+
     def test_get_data_rows(self):
         # given:
         start_row_idx = 6
@@ -101,7 +144,7 @@ class IngestWorksheetTest(TestCase):
 
         data_row_values = []
         for row in data_rows:
-            cell_values = [cell.value for cell in row.values]
+            cell_values = list(row.values)
             data_row_values.append(cell_values)
 
         # then:
@@ -130,13 +173,32 @@ class IngestWorksheetTest(TestCase):
 
         data_row_values = []
         for row in data_rows:
-            cell_values = [cell.value for cell in row.values]
+            cell_values = list(row.values)
             data_row_values.append(cell_values)
 
         # then:
         self.assertEqual(len(data_row_values), 1)
         self.assertEqual(data_row_values, [expected_data_row])
 
+    @patch('hca_ingest.importer.spreadsheet.ingest_worksheet.MAX_ROW_LIMIT', 2)
+    def test_get_data_rows__given_rows_exceed_limit__then_raise_error_after_limit(self):
+        # given:
+        header_row = ['name', 'address']
+        data_row = ['Jane Doe', 'Cambridge']
+        blank_row = [None, None]
+        rows = [[], [], [], header_row, [], data_row, blank_row, data_row, data_row]
+        worksheet = spreadsheet_utils.create_worksheet('person', rows)
+        ingest_worksheet = IngestWorksheet(worksheet)
+
+        # when:
+        data_rows = ingest_worksheet.get_data_rows()
+
+        # then:
+        self.assertEqual(next(data_rows).index, 6)
+        self.assertEqual(next(data_rows).index, 7)
+        with self.assertRaises(MaxRowExceededError):
+            next(data_rows)
+
     def test_is_module_tab(self):
         # given:
         workbook = create_test_workbook('Product', 'Product - History')
@@ -0,0 +1,165 @@
+import glob
+import os
+import tempfile
+import zipfile
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from openpyxl import Workbook, load_workbook
+
+from hca_ingest.importer.spreadsheet.ingest_workbook import IngestWorkbook, XLSX_STREAM_READER
+from hca_ingest.importer.spreadsheet.xlsx_stream_reader import load_stream_workbook
+
+SPREADSHEET_PATH = os.path.join(os.path.dirname(__file__), '..', 'metadata_spleen_new_protocols.xlsx')
+TESTS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..')
+SPREADSHEET_PATHS = sorted(glob.glob(os.path.join(TESTS_DIR, '**', '*.xlsx'), recursive=True))
+
+
+class StreamWorksheetTest(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, 'test.xlsx')
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.title = 'Donor'
+        worksheet['A1'] = 'text'
+        worksheet['B1'] = 12
+        worksheet['C1'] = 1.5
+        worksheet['D1'] = True
+        worksheet['A2'] = datetime(2020, 2, 29, 13, 30)
+        worksheet['C2'] = '=B1*2'
+        worksheet['B5'] = 'after missing rows'
+        workbook.create_sheet('Empty')
+        workbook.save(self.file_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_iter_rows__same_values_as_openpyxl(self):
+        # given:
+        expected_workbook = load_workbook(self.file_path, read_only=True)
+        workbook = load_stream_workbook(self.file_path)
+
+        # expect:
+        self.assertEqual(expected_workbook.sheetnames, workbook.sheetnames)
+        for title in workbook.sheetnames:
+            for min_row, max_row in [(1, None), (2, 4), (4, 7)]:
+                expected_rows = expected_workbook[title].iter_rows(min_row=min_row, max_row=max_row, values_only=True)
+                rows = workbook[title].iter_rows(min_row=min_row, max_row=max_row, values_only=True)
+                self.assertEqual(list(expected_rows), list(rows), f'{title} rows {min_row} to {max_row}')
+
+    def test_iter_rows__converts_values(self):
+        # given:
+        worksheet = load_stream_workbook(self.file_path)['Donor']
+
+        # when:
+        rows = list(worksheet.iter_rows(min_row=1, max_row=5))
+
+        # then:
+        self.assertEqual(rows[0], ('text', 12, 1.5, True))
+        self.assertEqual(rows[1], (datetime(2020, 2, 29, 13, 30), None, '=B1*2', None))
+        self.assertEqual(rows[2], (None, None, None, None))
+        self.assertEqual(rows[4], (None, 'after missing rows', None, None))
+
+    def test_iter_rows__given_cells__then_raise_error(self):
+        # given:
+        worksheet = load_stream_workbook(self.file_path)['Donor']
+
+        # expect:
+        with self.assertRaises(ValueError):
+            next(worksheet.iter_rows(values_only=False))
+
+    def test_iter_rows__given_test_spreadsheets__then_same_values_as_openpyxl(self):
+        self.assertTrue(SPREADSHEET_PATHS)
+        for path in SPREADSHEET_PATHS:
+            # given:
+            expected_workbook = load_workbook(path, read_only=True)
+            workbook = load_stream_workbook(path)
+
+            # expect:
+            self.assertEqual(expected_workbook.sheetnames, workbook.sheetnames, path)
+            for title in workbook.sheetnames:
+                self.assertEqual(list(expected_workbook[title].iter_rows(values_only=True)),
+                                 list(workbook[title].iter_rows(values_only=True)), f'{path} {title}')
+
+    def test_ingest_workbook__same_rows_as_openpyxl_reader(self):
+        # given:
+        expected_workbook = IngestWorkbook.from_file(SPREADSHEET_PATH)
+        workbook = IngestWorkbook.from_file(SPREADSHEET_PATH, reader=XLSX_STREAM_READER)
+
+        # expect:
+        self.assertEqual(expected_workbook.get_schemas(), workbook.get_schemas())
+        for expected_worksheet, worksheet in zip(expected_workbook.importable_worksheets(),
+                                                 workbook.importable_worksheets()):
+            self.assertEqual(expected_worksheet.title, worksheet.title)
+            self.assertEqual(expected_worksheet.get_column_headers(), worksheet.get_column_headers())
+            self.assertEqual([(row.index, row.values) for row in expected_worksheet.get_data_rows()],
+                             [(row.index, row.values) for row in worksheet.get_data_rows()])
+
+    def test_ingest_workbook__given_stream_reader_for_writing__then_raise_error(self):
+        with self.assertRaises(ValueError):
+            IngestWorkbook.from_file(self.file_path, read_only=False, reader=XLSX_STREAM_READER)
+
+
+class StreamWorksheetFormulaAndDurationTest(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, 'test.xlsx')
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet['A1'] = 1
+        worksheet['B1'] = '=A1*2'
+        worksheet['A2'] = 2
+        worksheet['B2'] = '=A2*2'
+        worksheet['C1'] = timedelta(hours=30)
+        worksheet['C2'] = datetime(2020, 2, 29)
+        worksheet['C2'].value = 10 ** 7
+        workbook.save(self.file_path)
+        self._share_formula_of_b1_with_b2()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _share_formula_of_b1_with_b2(self):
+        # openpyxl never writes shared formulas, Excel does for formulas filled down a column
+        sheet_path = 'xl/worksheets/sheet1.xml'
+        with zipfile.ZipFile(self.file_path) as archive:
+            parts = {name: archive.read(name) for name in archive.namelist()}
+        sheet_xml = parts[sheet_path].decode()
+        sheet_xml = sheet_xml.replace('<f>A1*2</f><v />', '<f t="shared" ref="B1:B2" si="0">A1*2</f><v>2</v>')
+        sheet_xml = sheet_xml.replace('<f>A2*2</f><v />', '<f t="shared" si="0" /><v>4</v>')
+        parts[sheet_path] = sheet_xml.encode()
+        with zipfile.ZipFile(self.file_path, 'w') as archive:
+            for name, content in parts.items():
+                archive.writestr(name, content)
+
+    def test_iter_rows__same_values_as_openpyxl(self):
+        # given:
+        expected_worksheet = load_workbook(self.file_path).active
+        worksheet = load_stream_workbook(self.file_path).worksheets[0]
+
+        # expect:
+        self.assertEqual(list(expected_worksheet.iter_rows(values_only=True)), list(worksheet.iter_rows()))
+
+    def test_iter_rows__translates_shared_formula(self):
+        # given:
+        worksheet = load_stream_workbook(self.file_path).worksheets[0]
+
+        # when:
+        rows = list(worksheet.iter_rows())
+
+        # then:
+        self.assertEqual(rows[0][1], '=A1*2')
+        self.assertEqual(rows[1][1], '=A2*2')
+
+    def test_iter_rows__converts_durations_and_dates_out_of_range(self):
+        # given:
+        worksheet = load_stream_workbook(self.file_path).worksheets[0]
+
+        # when:
+        with self.assertWarns(UserWarning):
+            rows = list(worksheet.iter_rows())
+
+        # then:
+        self.assertEqual(rows[0][2], timedelta(hours=30))
+        self.assertEqual(rows[1][2], '#VALUE!')
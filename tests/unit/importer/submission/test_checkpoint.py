@@ -0,0 +1,104 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from hca_ingest.importer.submission.checkpoint import ImportCheckpoint
+from hca_ingest.importer.submission.entity import Entity
+from hca_ingest.importer.submission.entity_map import EntityMap
+
+SUBMISSION_URL = 'https://api.ingest.dev.archive.data.humancellatlas.org/submissionEnvelopes/1'
+
+
+class ImportCheckpointTest(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_dir = os.path.join(self.temp_dir.name, 'checkpoints')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_open__reads_records_of_previous_import(self):
+        # given:
+        biomaterial = Entity('biomaterial', 'biomaterial_1', {'key': 'value'}, ingest_json={
+            'content': {'key': 'value'},
+            'uuid': {'uuid': 'uuid_1'},
+            '_links': {'self': {'href': 'biomaterials/1'}, 'project': {'href': 'biomaterials/1/project'}}
+        })
+        link = {'entity': 'project', 'id': 'project_1', 'relationship': 'project', 'is_collection': False}
+        checkpoint = ImportCheckpoint.open(self.checkpoint_dir, SUBMISSION_URL)
+        checkpoint.add_manifest({'totalCount': 2}, EntityMap())
+        checkpoint.add_entity(biomaterial)
+        checkpoint.add_link(biomaterial, link)
+        checkpoint.close()
+
+        # when:
+        resumed_checkpoint = ImportCheckpoint.open(self.checkpoint_dir, SUBMISSION_URL)
+
+        # then:
+        self.assertEqual({'totalCount': 2}, resumed_checkpoint.manifest)
+        self.assertEqual((1, 1), (resumed_checkpoint.entity_count, resumed_checkpoint.link_count))
+        resumed_biomaterial = Entity('biomaterial', 'biomaterial_1', {'key': 'value'})
+        resumed_biomaterial.ingest_json = resumed_checkpoint.get_ingest_json(resumed_biomaterial)
+        self.assertEqual('uuid_1', resumed_biomaterial.uuid)
+        self.assertEqual('biomaterials/1', resumed_biomaterial.url)
+        self.assertTrue(resumed_checkpoint.has_link(resumed_biomaterial, link))
+        self.assertFalse(resumed_checkpoint.has_link(resumed_biomaterial, dict(link, id='project_2')))
+        self.assertIsNone(resumed_checkpoint.get_ingest_json(Entity('biomaterial', 'biomaterial_2', {})))
+
+    def test_open__given_incomplete_record__then_ignore_it(self):
+        # given:
+        checkpoint = ImportCheckpoint.open(self.checkpoint_dir, SUBMISSION_URL)
+        checkpoint.add_manifest({'totalCount': 2}, EntityMap())
+        checkpoint.close()
+        with open(checkpoint.path, 'a', encoding='utf-8') as journal:
+            journal.write('{"entity": "biomaterial.biomat')
+
+        # when:
+        resumed_checkpoint = ImportCheckpoint.open(self.checkpoint_dir, SUBMISSION_URL)
+        resumed_checkpoint.add_link(Entity('file', 'file_1', {}), {'entity': 'biomaterial', 'id': 'biomaterial_1',
+                                                                   'relationship': 'inputToProcesses'})
+        resumed_checkpoint.close()
+
+        # then:
+        checkpoint = ImportCheckpoint.open(self.checkpoint_dir, SUBMISSION_URL)
+        self.assertEqual({'totalCount': 2}, checkpoint.manifest)
+        self.assertEqual((0, 1), (checkpoint.entity_count, checkpoint.link_count))
+
+    def test_open__one_journal_per_submission(self):
+        # given:
+        checkpoint = ImportCheckpoint.open(self.checkpoint_dir, SUBMISSION_URL)
+        checkpoint.add_manifest({'totalCount': 2}, EntityMap())
+
+        # when:
+        other_checkpoint = ImportCheckpoint.open(self.checkpoint_dir, SUBMISSION_URL + '0')
+
+        # then:
+        self.assertNotEqual(checkpoint.path, other_checkpoint.path)
+        self.assertIsNone(other_checkpoint.manifest)
+
+        # when:
+        checkpoint.remove()
+
+        # then:
+        self.assertFalse(os.path.exists(checkpoint.path))
+        other_checkpoint.close()
+
+    def test_check_entities__given_other_entities__then_raise_error(self):
+        # given:
+        entity_map = EntityMap(Entity('biomaterial', 'biomaterial_1', {}), Entity('file', 'file_1', {}))
+        checkpoint = ImportCheckpoint.open(self.checkpoint_dir, SUBMISSION_URL)
+        checkpoint.add_manifest({'totalCount': 2}, entity_map)
+        checkpoint.close()
+
+        # when:
+        resumed_checkpoint = ImportCheckpoint.open(self.checkpoint_dir, SUBMISSION_URL)
+
+        # then:
+        resumed_checkpoint.check_entities(
+            EntityMap(Entity('file', 'file_1', {}), Entity('biomaterial', 'biomaterial_1', {})))
+        with self.assertRaises(ValueError):
+            resumed_checkpoint.check_entities(
+                EntityMap(Entity('biomaterial', 'biomaterial_1', {}), Entity('file', 'file_2', {})))
+        with self.assertRaises(ValueError):
+            resumed_checkpoint.check_entities(EntityMap(Entity('biomaterial', 'biomaterial_1', {})))
+        resumed_checkpoint.close()
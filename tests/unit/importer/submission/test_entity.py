@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from hca_ingest.importer.submission.entity import Entity
+
+
+class EntityTest(TestCase):
+    def test_init__given_no_links__then_links_are_empty(self):
+        # when:
+        entity = Entity('biomaterial', 'biomaterial_1', {'key': 'value'})
+
+        # then:
+        self.assertFalse(entity.has_direct_links())
+        self.assertEqual(0, entity.count_direct_links())
+        self.assertEqual([], entity.get_links('biomaterial'))
+        self.assertEqual([], entity.get_external_links('biomaterial'))
+        self.assertEqual([], list(entity.iter_links()))
+        self.assertEqual({}, entity.links_by_entity)
+        self.assertEqual((), entity.direct_links)
+        self.assertEqual({}, entity.external_links)
+        self.assertEqual({}, entity.linking_details)
+
+    def test_init__copies_links(self):
+        # given:
+        links_by_entity = {'biomaterial': ['biomaterial_1']}
+        external_links = {'file': ['file_uuid']}
+
+        # when:
+        entity = Entity('biomaterial', 'biomaterial_2', {}, links_by_entity=links_by_entity,
+                        external_links=external_links)
+        entity.add_link('protocol', 'protocol_1')
+
+        # then:
+        self.assertEqual({'biomaterial': ['biomaterial_1'], 'protocol': ['protocol_1']}, entity.links_by_entity)
+        self.assertEqual({'biomaterial': ['biomaterial_1']}, links_by_entity)
+        self.assertEqual(['file_uuid'], entity.get_external_links('file'))
+        self.assertEqual([('file', ['file_uuid'])], list(entity.iter_external_links()))
+
+    def test_direct_links__are_read_only(self):
+        # given:
+        link = {'entity': 'process', 'id': 'process_1', 'relationship': 'inputToProcesses'}
+        entity = Entity('file', 'file_1', {}, direct_links=[link])
+
+        # expect:
+        self.assertTrue(entity.has_direct_links())
+        self.assertEqual(1, entity.count_direct_links())
+        self.assertEqual((link,), entity.direct_links)
+        with self.assertRaises(AttributeError):
+            entity.direct_links.append(link)
+        with self.assertRaises(AttributeError):
+            entity.direct_links = [link, link]
+
+    def test_entity__has_no_instance_dict(self):
+        # given:
+        entity = Entity('file', 'file_1', {})
+
+        # expect:
+        with self.assertRaises(AttributeError):
+            entity.undeclared_attribute = True
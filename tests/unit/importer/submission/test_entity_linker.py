@@ -84,6 +84,21 @@ class EntityLinkerTest(TestCase):
         self.assertEqual('biomaterial_id_1', context.exception.from_entity.id)
         self.assertEqual('file_id_1', context.exception.link_entity_id)
 
+    def test_convert_links__given_no_ids_of_invalid_link_type__then_ignore_it(self):
+        # given
+        spreadsheet_json = load_json(f'{self.json_dir}/invalid_spreadsheet_links.json')
+        spreadsheet_json['biomaterial']['biomaterial_id_1']['links_by_entity'] = {'file': [], 'process': []}
+
+        entity_map = EntityMap.load(spreadsheet_json)
+        entity_linker = EntityLinker(self.mocked_template_manager, entity_map)
+
+        # when
+        entity_linker.convert_spreadsheet_links_to_ingest_links()
+
+        # then
+        biomaterial = entity_map.get_entity('biomaterial', 'biomaterial_id_1')
+        self.assertEqual(['project', 'projects'], [link['relationship'] for link in biomaterial.direct_links])
+
     def test_convert_links__multiple_process_links(self):
         # given
         spreadsheet_json = load_json(f'{self.json_dir}/multiple_process_links.json')
@@ -99,6 +114,51 @@ class EntityLinkerTest(TestCase):
         self.assertEqual('biomaterial', context.exception.from_entity.type)
         self.assertEqual(['process_id_1', 'process_id_2'], context.exception.process_ids)
 
+    def test_convert_links__looks_up_project_and_process_schema_once(self):
+        # given
+        spreadsheet_json = {
+            'project': {'project_id': {'content': {'key': 'project'}}},
+            'biomaterial': {
+                'donor_id': {'content': {'key': 'donor'}},
+                'sample_id_1': {'content': {'key': 'sample_1'}, 'links_by_entity': {'biomaterial': ['donor_id']}},
+                'sample_id_2': {'content': {'key': 'sample_2'}, 'links_by_entity': {'biomaterial': ['donor_id']}}
+            }
+        }
+        entity_map = EntityMap.load(spreadsheet_json)
+        entity_map.get_project = MagicMock(wraps=entity_map.get_project)
+        entity_linker = EntityLinker(self.mocked_template_manager, entity_map)
+
+        # when
+        entity_linker.convert_spreadsheet_links_to_ingest_links()
+
+        # then
+        processes = list(entity_map.get_entities_of_type('process'))
+        self.assertEqual(2, len(processes))
+        self.assertTrue(all(process.content['describedBy'] == 'url' for process in processes))
+        self.mocked_template_manager.get_schema_url.assert_called_once_with('process')
+        entity_map.get_project.assert_called_once()
+
+    def test_convert_links__counts_match_entities_and_links_in_map(self):
+        for input_file in sorted(os.listdir(self.json_dir)):
+            if not input_file.endswith('__before_convert.json'):
+                continue
+            with self.subTest(input_file):
+                # given
+                entity_map = EntityMap.load(load_json(f'{self.json_dir}/{input_file}'))
+                entity_linker = EntityLinker(self.mocked_template_manager, entity_map)
+
+                # when
+                entity_linker.convert_spreadsheet_links_to_ingest_links()
+
+                # then
+                entities = list(entity_map.get_entities())
+                self.assertEqual(sum(len(entity.direct_links) for entity in entities), entity_map.count_links())
+                self.assertEqual(len(entities), entity_map.count_total())
+                for entity_type in entity_map.get_entity_types():
+                    new_entities = [entity for entity in entity_map.get_entities_of_type(entity_type)
+                                    if not (entity.is_reference and entity.is_linking_reference)]
+                    self.assertEqual(len(new_entities), entity_map.count_entities_of_type(entity_type))
+
     def _test_convert_links(self, input_file, expected_output_file):
         # given
         spreadsheet_json = load_json(f'{self.json_dir}/{input_file}')
@@ -128,6 +128,45 @@ class EntityMapTest(TestCase):
         entity_map.add_entity(Entity('product', 'product_2', {}, direct_links=[{}, {}, {}, {}]))
         self.assertEqual(entity_map.count_links(), 7)
 
+    def test_count_links__counts_added_direct_links(self):
+        # given:
+        entity_map = EntityMap()
+        product = Entity('product', 'product_0', {}, direct_links=[{}])
+        entity_map.add_entity(product)
+        not_mapped_product = Entity('product', 'product_0', {})
+
+        # when:
+        entity_map.add_direct_link(product, {'entity': 'profile', 'id': 'profile_1'})
+        entity_map.add_direct_link(not_mapped_product, {'entity': 'profile', 'id': 'profile_1'})
+
+        # then:
+        self.assertEqual(2, entity_map.count_links())
+        self.assertEqual(2, product.count_direct_links())
+        self.assertEqual(1, not_mapped_product.count_direct_links())
+
+    def test_count_entities_of_type(self):
+        # given:
+        entity_map = EntityMap()
+        entity_map.add_entity(Entity('product', 'product_0', {}))
+        entity_map.add_entity(Entity('product', 'product_1', {}, is_reference=True))
+        entity_map.add_entity(Entity('product', 'product_2', {}, is_linking_reference=True))
+        entity_map.add_entity(Entity('profile', 'profile_0', {}))
+
+        # expect:
+        self.assertEqual(3, entity_map.count_entities_of_type('product'))
+        self.assertEqual(1, entity_map.count_entities_of_type('profile'))
+        self.assertEqual(0, entity_map.count_entities_of_type('project'))
+
+        # when: the references are found both in a row and a linking column
+        entity_map.add_entity(Entity('product', 'product_1', None, is_linking_reference=True))
+        entity_map.add_entity(Entity('product', 'product_2', {}, is_reference=True))
+        entity_map.add_entity(Entity('product', 'product_0', {}))
+
+        # then:
+        self.assertEqual(1, entity_map.count_entities_of_type('product'))
+        self.assertEqual(4, entity_map.count_total())
+        self.assertEqual(1, len([entity for entity in entity_map.get_new_entities_of_type('product')]))
+
     def test_get_project__returns_project(self):
         # given
         entity_map = EntityMap()
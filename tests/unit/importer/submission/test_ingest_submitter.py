@@ -1,10 +1,10 @@
+import tempfile
 from unittest import TestCase
-from unittest.mock import MagicMock, patch, call, Mock
+from unittest.mock import MagicMock, patch, call, Mock, ANY
 
-import hca_ingest
 from hca_ingest.importer.submission.entity import Entity
 from hca_ingest.importer.submission.entity_map import EntityMap
-from hca_ingest.importer.submission.ingest_submitter import IngestSubmitter
+from hca_ingest.importer.submission.ingest_submitter import IngestSubmitter, json_equals
 
 
 class IngestSubmitterTest(TestCase):
@@ -15,6 +15,7 @@ class IngestSubmitterTest(TestCase):
         self.ingest_api.create_submission_manifest = MagicMock()
         self.ingest_api.patch = MagicMock()
         self.ingest_api.get_link_from_resource = MagicMock()
+        self.ingest_api.forget_submission_files = MagicMock()
 
     @patch('hca_ingest.importer.submission.ingest_submitter.Submission')
     def test_submit(self, submission_constructor):
@@ -36,6 +37,7 @@ class IngestSubmitterTest(TestCase):
         submission_constructor.assert_called_with(self.ingest_api, 'url')
         submission.define_manifest.assert_called_with(entity_map)
         submission.add_entity.assert_has_calls([call(product), call(user)], any_order=True)
+        self.ingest_api.forget_submission_files.assert_called_once_with('url')
 
     def test_add_entity(self):
         new_entity_mock_response = {
@@ -48,7 +50,6 @@ class IngestSubmitterTest(TestCase):
             'validationState': 'Draft'
         }
 
-        hca_ingest.api.ingestapi.requests.get = MagicMock()
         mock_ingest_api = MagicMock(name='mock_ingest_api')
         mock_ingest_api.load_root = MagicMock()
         mock_ingest_api.create_entity = MagicMock(return_value=new_entity_mock_response)
@@ -59,6 +60,47 @@ class IngestSubmitterTest(TestCase):
 
         self.assertEqual(new_entity_mock_response, entity.ingest_json)
 
+    @patch('hca_ingest.importer.submission.ingest_submitter.Submission')
+    def test_submit__given_max_workers__then_add_all_entities(self, submission_constructor):
+        # given:
+        submission = self._mock_submission(submission_constructor)
+        entities = [Entity('biomaterial', f'biomaterial_{index}', {}) for index in range(20)]
+        entity_map = EntityMap(*entities)
+
+        # when:
+        submitter = IngestSubmitter(self.ingest_api, max_workers=4)
+        submitter.add_entity = MagicMock()
+        submitter.add_entities(entity_map, submission_url='url')
+
+        # then:
+        submitter.add_entity.assert_has_calls([call(entity, 'url') for entity in entities], any_order=True)
+        submission.add_entity.assert_has_calls([call(entity) for entity in entities])
+
+    @patch('hca_ingest.importer.submission.ingest_submitter.Submission')
+    def test_submit__given_entity_fails__then_collect_error_and_continue(self, submission_constructor):
+        # given:
+        submission = self._mock_submission(submission_constructor)
+        product = Entity('product', 'product_1', {})
+        user = Entity('user', 'user_1', {})
+        entity_map = EntityMap(product, user)
+
+        # and:
+        def add_entity(entity, submission_url):
+            if entity is product:
+                raise Exception('creation failed')
+            return entity
+
+        # when:
+        submitter = IngestSubmitter(self.ingest_api, max_workers=2)
+        submitter.add_entity = MagicMock(side_effect=add_entity)
+        submitter.add_entities(entity_map, submission_url='url')
+
+        # then:
+        submission.add_entity.assert_called_once_with(user)
+        submission.add_error.assert_called_once()
+        error = submission.add_error.call_args.args[0]
+        self.assertIs(product, error.entity)
+
     def test_update_entities(self):
         # given:
         entity_map = self._create_test_entity_map()
@@ -73,6 +115,43 @@ class IngestSubmitterTest(TestCase):
         # then:
         submitter.update_entity.assert_has_calls([call(user2), call(user3)], any_order=True)
 
+    def test_update_entities__fetches_references_and_patches_changed_content(self):
+        # given:
+        existing = {
+            'biomaterial_1': {'content': {'k': 'v', 'n': 1}, '_links': {'self': {'href': 'url_1'}}},
+            'biomaterial_2': {'content': {'k': 'v', 'n': 1}, '_links': {'self': {'href': 'url_2'}}},
+            'biomaterial_3': {'content': {'k': 'v', 'n': 1}, '_links': {'self': {'href': 'url_3'}}}
+        }
+        self.ingest_api.get_entity_by_uuid = MagicMock(side_effect=lambda entity_type, uuid: existing[uuid])
+        entity_map = EntityMap(Entity('biomaterial', 'biomaterial_1', {'k': 'v'}, is_reference=True),
+                               Entity('biomaterial', 'biomaterial_2', {'k': 'v2'}, is_reference=True),
+                               Entity('biomaterial', 'biomaterial_3', {'n': 1.0}, is_reference=True))
+
+        # when:
+        submitter = IngestSubmitter(self.ingest_api, max_workers=4)
+        updated_entities = submitter.update_entities(entity_map)
+
+        # then:
+        self.assertEqual(3, len(updated_entities))
+        self.assertEqual(3, self.ingest_api.get_entity_by_uuid.call_count)
+        self.ingest_api.patch.assert_has_calls([call('url_2', json={'content': {'k': 'v2', 'n': 1}}),
+                                                call('url_3', json={'content': {'k': 'v', 'n': 1.0}})],
+                                               any_order=True)
+        self.assertEqual(2, self.ingest_api.patch.call_count)
+
+    def test_update_entities__given_failed_patch__then_updates_the_others_and_raises(self):
+        # given:
+        entity_map = self._create_test_entity_map()
+        self.ingest_api.patch = MagicMock(side_effect=[Exception('rejected'), None])
+
+        # when:
+        submitter = IngestSubmitter(self.ingest_api)
+        with self.assertRaisesRegex(Exception, 'rejected'):
+            submitter.update_entities(entity_map)
+
+        # then:
+        self.assertEqual(2, self.ingest_api.patch.call_count)
+
     def _create_test_entity_map(self) -> EntityMap:
         product = Entity('product', 'product_1', {'k': 'v'})
         project = Entity('project', 'id', {'k': 'v'})
@@ -158,14 +237,199 @@ class IngestSubmitterTest(TestCase):
         # then:
         self.ingest_api.patch.assert_not_called()
 
+    def test_link_entities__then_report_monotonic_progress(self):
+        # given:
+        entity_map, link_count = self._create_linked_entity_map(entity_count=30, links_per_entity=4)
+        submission = self._mock_manifest_submission(link_count)
+
+        # when:
+        submitter = IngestSubmitter(self.ingest_api, max_workers=4)
+        submitter.PROGRESS_CTR = 25
+        submitter.link_entity = MagicMock()
+        submitter.link_entities(entity_map, submission)
+
+        # then:
+        self.assertEqual(link_count, submitter.link_entity.call_count)
+        reported = [patch_call.kwargs['json']['actualLinks'] for patch_call in self.ingest_api.patch.call_args_list]
+        self.assertEqual(sorted(reported), reported)
+        self.assertEqual(link_count, reported[-1])
+
+    def test_link_entities__given_link_fails_once__then_retry_link(self):
+        # given:
+        entity_map, link_count = self._create_linked_entity_map(entity_count=5, links_per_entity=2)
+        submission = self._mock_manifest_submission(link_count)
+
+        # and:
+        failed = []
+
+        def link_entity(from_entity, to_entity, relationship, is_collection):
+            if from_entity.id == 'biomaterial_3' and not failed:
+                failed.append(from_entity)
+                raise Exception('conflict')
+
+        # when:
+        submitter = IngestSubmitter(self.ingest_api, max_workers=2)
+        submitter.link_entity = MagicMock(side_effect=link_entity)
+        submitter.link_entities(entity_map, submission)
+
+        # then:
+        self.assertEqual(link_count + 1, submitter.link_entity.call_count)
+        submission.add_error.assert_not_called()
+        self.ingest_api.patch.assert_called_with(ANY, json={'actualLinks': link_count})
+
+    def test_link_entities__given_link_keeps_failing__then_add_error(self):
+        # given:
+        entity_map, link_count = self._create_linked_entity_map(entity_count=5, links_per_entity=1)
+        submission = self._mock_manifest_submission(link_count)
+
+        # and:
+        def link_entity(from_entity, to_entity, relationship, is_collection):
+            if from_entity.id == 'biomaterial_3':
+                raise Exception('not found')
+
+        # when:
+        submitter = IngestSubmitter(self.ingest_api, max_workers=2)
+        submitter.link_entity = MagicMock(side_effect=link_entity)
+        submitter.link_entities(entity_map, submission)
+
+        # then:
+        self.assertEqual(link_count + submitter.LINK_RETRIES, submitter.link_entity.call_count)
+        submission.add_error.assert_called_once()
+        self.assertEqual('biomaterial_3', submission.add_error.call_args.args[0].from_entity.id)
+        self.ingest_api.patch.assert_called_with(ANY, json={'actualLinks': link_count - 1})
+
+    def test_link_entities__given_links_share_relationship__then_link_in_one_request(self):
+        # given:
+        entity_map, link_count = self._create_process_with_protocols(protocol_count=3)
+        submission = self._mock_manifest_submission(link_count)
+        self.ingest_api.link_entities = MagicMock()
+
+        # when:
+        submitter = IngestSubmitter(self.ingest_api)
+        submitter.link_entity = MagicMock()
+        submitter.link_entities(entity_map, submission)
+
+        # then:
+        protocols = [entity_map.get_entity('protocol', f'protocol_{index}').ingest_json for index in range(3)]
+        process = entity_map.get_entity('process', 'process_1')
+        self.ingest_api.link_entities.assert_called_once_with(process.ingest_json, protocols, 'protocols')
+        submitter.link_entity.assert_not_called()
+        self.ingest_api.patch.assert_called_with(ANY, json={'actualLinks': link_count})
+
+    def test_link_entities__given_batch_is_rejected__then_link_one_by_one(self):
+        # given:
+        entity_map, link_count = self._create_process_with_protocols(protocol_count=3)
+        submission = self._mock_manifest_submission(link_count)
+        self.ingest_api.link_entities = MagicMock(side_effect=Exception('bad request'))
+
+        # when:
+        submitter = IngestSubmitter(self.ingest_api)
+        submitter.link_entity = MagicMock()
+        submitter.link_entities(entity_map, submission)
+
+        # then:
+        self.assertEqual(link_count, submitter.link_entity.call_count)
+        submission.add_error.assert_not_called()
+        self.ingest_api.patch.assert_called_with(ANY, json={'actualLinks': link_count})
+
+    @patch('hca_ingest.importer.submission.ingest_submitter.Submission')
+    def test_add_entities_and_link_entities__given_checkpoint__then_resume_unfinished_work(self, submission_constructor):
+        # given:
+        submission = self._mock_submission(submission_constructor)
+        submission.get_submission_url = MagicMock(return_value='url')
+        submission.manifest = {'expectedLinks': 10}
+
+        # and:
+        def create_entity_map():
+            entity_map, link_count = self._create_linked_entity_map(entity_count=5, links_per_entity=2)
+            entity_map.get_entity('project', 'project_1').is_reference = True
+            entity_map.get_entity('project', 'project_1').is_linking_reference = True
+            return entity_map
+
+        def add_entity(entity, submission_url):
+            if entity.id == 'biomaterial_3' and not resumed:
+                raise Exception('token expired')
+            entity.ingest_json = {'uuid': {'uuid': entity.id}, '_links': {'self': {'href': entity.id}}}
+            return entity
+
+        def link_entity(from_entity, to_entity, relationship, is_collection):
+            if from_entity.id in ['biomaterial_1', 'biomaterial_3'] and not resumed:
+                raise Exception('token expired')
+
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            # when: the first import fails to create and link some of the entities
+            resumed = False
+            submitter = IngestSubmitter(self.ingest_api, checkpoint_dir=checkpoint_dir)
+            submitter.LINK_RETRIES = 0
+            submitter.add_entity = MagicMock(side_effect=add_entity)
+            submitter.link_entity = MagicMock(side_effect=link_entity)
+            entity_map = create_entity_map()
+            submitter.add_entities(entity_map, submission_url='url')
+            submitter.link_entities(entity_map, submission)
+
+            # and: the import is run again
+            resumed = True
+            submitter = IngestSubmitter(self.ingest_api, checkpoint_dir=checkpoint_dir)
+            submitter.add_entity = MagicMock(side_effect=add_entity)
+            submitter.link_entity = MagicMock(side_effect=link_entity)
+            entity_map = create_entity_map()
+            submitter.add_entities(entity_map, submission_url='url')
+            submitter.link_entities(entity_map, submission)
+
+        # then:
+        submission.define_manifest.assert_called_once()
+        submitter.add_entity.assert_called_once_with(entity_map.get_entity('biomaterial', 'biomaterial_3'), 'url')
+        self.assertEqual(['biomaterial_1', 'biomaterial_1', 'biomaterial_3', 'biomaterial_3'],
+                         sorted(link_call.args[0].id for link_call in submitter.link_entity.call_args_list))
+        self.assertEqual('biomaterial_0', entity_map.get_entity('biomaterial', 'biomaterial_0').uuid)
+        self.ingest_api.patch.assert_called_with(ANY, json={'actualLinks': 10})
+
+    @staticmethod
+    def _create_process_with_protocols(protocol_count):
+        protocols = [Entity('protocol', f'protocol_{index}', {}, {'_links': {'self': {'href': f'protocol_{index}'}}})
+                     for index in range(protocol_count)]
+        links = [{'entity': 'protocol', 'id': protocol.id, 'relationship': 'protocols'} for protocol in protocols]
+        process = Entity('process', 'process_1', {}, {'_links': {'self': {'href': 'process_1'}}}, direct_links=links)
+        return EntityMap(process, *protocols), protocol_count
+
+    @staticmethod
+    def _create_linked_entity_map(entity_count, links_per_entity):
+        project = Entity('project', 'project_1', {})
+        entity_map = EntityMap(project)
+        for index in range(entity_count):
+            links = [{'entity': 'project', 'id': 'project_1', 'relationship': f'relationship_{link_index}'}
+                     for link_index in range(links_per_entity)]
+            entity_map.add_entity(Entity('biomaterial', f'biomaterial_{index}', {}, direct_links=links))
+        return entity_map, entity_count * links_per_entity
+
+    @staticmethod
+    def _mock_manifest_submission(link_count):
+        submission = MagicMock('submission')
+        submission.manifest = {'expectedLinks': link_count}
+        submission.get_submission_url = MagicMock(return_value='url')
+        submission.add_error = MagicMock()
+        return submission
+
     @staticmethod
     def _mock_submission(submission_constructor):
         submission = MagicMock('submission')
         submission.define_manifest = MagicMock()
         submission.add_entity = MagicMock()
+        submission.add_error = MagicMock()
         submission.update_entity = MagicMock()
         submission.link_entity = MagicMock()
         submission.manifest = {}
         submission.is_update = lambda: False
         submission_constructor.return_value = submission
         return submission
+
+
+class JsonEqualsTest(TestCase):
+    def test_json_equals(self):
+        self.assertTrue(json_equals({'a': [1, {'b': 'c'}], 'd': None}, {'d': None, 'a': [1, {'b': 'c'}]}))
+        self.assertTrue(json_equals({'a': (1, 2)}, {'a': [1, 2]}))
+        self.assertFalse(json_equals({'a': [1, 2]}, {'a': [2, 1]}))
+        self.assertFalse(json_equals({'a': 1}, {'a': 1, 'b': 1}))
+        self.assertFalse(json_equals({'a': 1}, {'a': 1.0}))
+        self.assertFalse(json_equals({'a': 1}, {'a': True}))
+        self.assertFalse(json_equals({'a': '1'}, {'a': 1}))
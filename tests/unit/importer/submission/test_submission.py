@@ -2,7 +2,6 @@ from unittest import TestCase
 
 from mock import MagicMock
 
-import hca_ingest.api.ingestapi
 from hca_ingest.importer.submission.entity import Entity
 from hca_ingest.importer.submission.submission import Submission
 
@@ -11,7 +10,6 @@ class SubmissionTest(TestCase):
 
     def test_new_submission(self):
         # given
-        hca_ingest.api.ingestapi.requests.get = MagicMock()
         mock_ingest_api = MagicMock(name='mock_ingest_api')
 
         submission = Submission(mock_ingest_api, submission_url='submission_url')
@@ -18,6 +18,17 @@ class DataNodeTest(TestCase):
         self.assertEqual('value', dict['path']['to']['node'])
         self.assertEqual(347, dict['path']['to']['nested']['field'])
 
+    def test___setitem____given_split_field_chain(self):
+        # given:
+        node = DataNode(defaults={'path': {'to': {'node': 'value'}}})
+
+        # when:
+        node[('path', 'to', 'nested', 'field')] = 347
+
+        # then:
+        self.assertEqual(347, node['path.to.nested.field'])
+        self.assertEqual('value', node[('path', 'to', 'node')])
+
     def test___getitem__(self):
         # given:
         defaults = {
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from unittest.case import TestCase
 
 from mock import MagicMock, patch, Mock
@@ -28,6 +29,10 @@ class XlsImporterBaseTest(TestCase):
 
 
 class XlsImporterTest(XlsImporterBaseTest):
+    def test_init__given_max_workers_and_max_processes__then_value_error(self):
+        with self.assertRaises(ValueError):
+            XlsImporter(self.mock_ingest_api, max_workers=4, max_processes=2)
+
     @patch('hca_ingest.importer.importer.IngestWorkbook')
     @patch('hca_ingest.importer.importer.WorkbookImporter')
     @patch('hca_ingest.importer.importer.template_manager')
@@ -85,6 +90,21 @@ class XlsImporterTest(XlsImporterBaseTest):
         self.assertEqual(errors, ['error'])
         self.assertFalse(entity_map)
 
+    @patch('hca_ingest.importer.importer.IngestWorkbook')
+    def test_update_spreadsheet_with_uuids__given_csv_bundle__then_skip(self, mock_workbook):
+        # given:
+        with tempfile.TemporaryDirectory() as csv_dir:
+            with open(os.path.join(csv_dir, 'Donor.csv'), 'w') as csv_file:
+                csv_file.write('donor_organism.biomaterial_core.biomaterial_id\n')
+
+            # when:
+            with self.assertLogs('hca_ingest.importer.importer', level='WARNING'):
+                result = XlsImporter.update_spreadsheet_with_uuids(MagicMock(), self.mock_template_mgr, csv_dir)
+
+        # then:
+        self.assertIsNone(result)
+        mock_workbook.from_file.assert_not_called()
+
     @patch('hca_ingest.importer.importer.IngestWorkbook')
     @patch('hca_ingest.importer.importer.WorkbookImporter')
     @patch('hca_ingest.importer.importer.template_manager')
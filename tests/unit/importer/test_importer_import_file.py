@@ -153,6 +153,7 @@ class ImporterImportFileTest(XlsImporterBaseTest):
     def test_when_is_update_false__then_add_and_link_entities(self, mock_add_entities, mock_link_entities):
         # given:
         self.importer.generate_json = Mock(return_value=({}, self.mock_template_mgr, None))
+        mock_add_entities.return_value.errors = []
 
         # when:
         submission, _ = self.importer.import_file(file_path='path', submission_url='url')
@@ -162,6 +163,34 @@ class ImporterImportFileTest(XlsImporterBaseTest):
         mock_link_entities.assert_called_once()
         self.assertTrue(submission)
 
+    @patch('hca_ingest.importer.submission.ingest_submitter.IngestSubmitter.link_entities')
+    @patch('hca_ingest.importer.submission.ingest_submitter.IngestSubmitter.add_entities')
+    def test_when_entities_fail_to_be_created__then_report_errors_and_do_not_link(self, mock_add_entities,
+                                                                                  mock_link_entities):
+        # given:
+        self.importer.generate_json = Mock(return_value=({}, self.mock_template_mgr, None))
+        mock_add_entities.return_value.errors = [Exception('error1'), Exception('error2')]
+
+        # when:
+        self.importer.import_file(file_path='path', submission_url='url')
+
+        # then:
+        self.assertEqual(2, self.mock_ingest_api.create_submission_error.call_count)
+        mock_link_entities.assert_not_called()
+
+    @patch('hca_ingest.importer.submission.ingest_submitter.IngestSubmitter.close_checkpoint')
+    @patch('hca_ingest.importer.submission.ingest_submitter.IngestSubmitter.add_entities')
+    def test_when_entities_fail_to_be_created__then_close_checkpoint(self, mock_add_entities, mock_close_checkpoint):
+        # given:
+        self.importer.generate_json = Mock(return_value=({}, self.mock_template_mgr, None))
+        mock_add_entities.side_effect = Exception('Error thrown for Unit Test')
+
+        # when:
+        self.importer.import_file(file_path='path', submission_url='url')
+
+        # then:
+        mock_close_checkpoint.assert_called_once_with('url')
+
     def test_throwing_exception(self):
         # given:
         exception = Exception('Error thrown for Unit Test')
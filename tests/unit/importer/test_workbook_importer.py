@@ -55,6 +55,50 @@ class WorkbookImporterTest(TestCase):
         self.assertEqual({'user_name': 'jdelacruz'}, user_map.get(1)['content'])
         self.assertEqual({'user_name': 'sayyeah'}, user_map.get(96)['content'])
 
+    def test_do_import__given_max_processes__then_same_result_as_sequential_import(self):
+        # given:
+        workbook = create_test_workbook('Project', 'Users')
+        for row in [[], [], [], ['project.name', 'project.id'], [], ['test project', None]]:
+            workbook['Project'].append(row)
+        for row in [[], [], [], ['users.name', 'users.id'], [], ['jdelacruz', None], [None, 'u-2'], ['sayyeah', None]]:
+            workbook['Users'].append(row)
+        self.template_mgr.create_row_template = lambda worksheet: _FakeRowTemplate(worksheet.title.lower())
+
+        # when:
+        expected_json, expected_errors = WorkbookImporter(self.template_mgr).do_import(
+            IngestWorkbook(workbook), is_update=False)
+        spreadsheet_json, errors = WorkbookImporter(self.template_mgr, max_processes=2).do_import(
+            IngestWorkbook(workbook), is_update=False)
+
+        # then:
+        self.assertEqual(expected_errors, errors)
+        self.assertEqual(['sheet=Users row=1'], [error['location'] for error in errors])
+        self.assertEqual(expected_json, spreadsheet_json)
+        self.assertEqual(['_unknown_2', 'u-2', '_unknown_3'], list(spreadsheet_json['users'].keys()))
+
+    @patch('hca_ingest.importer.spreadsheet.ingest_worksheet.MAX_ROW_LIMIT', 2)
+    def test_do_import__given_max_processes_and_sheet_over_row_limit__then_same_ids_as_sequential_import(self):
+        # given:
+        workbook = create_test_workbook('Project', 'Users')
+        for row in [[], [], [], ['project.name', 'project.id'], [], ['project 1', None], ['project 2', None],
+                    ['project 3', None]]:
+            workbook['Project'].append(row)
+        for row in [[], [], [], ['users.name', 'users.id'], [], ['jdelacruz', None], ['sayyeah', None]]:
+            workbook['Users'].append(row)
+        self.template_mgr.create_row_template = lambda worksheet: _FakeRowTemplate(worksheet.title.lower())
+
+        # when:
+        expected_json, expected_errors = WorkbookImporter(self.template_mgr).do_import(
+            IngestWorkbook(workbook), is_update=False)
+        spreadsheet_json, errors = WorkbookImporter(self.template_mgr, max_processes=2).do_import(
+            IngestWorkbook(workbook), is_update=False)
+
+        # then:
+        self.assertEqual(expected_errors, errors)
+        self.assertIn('MaxRowExceededError', [error['type'] for error in errors])
+        self.assertEqual(expected_json, spreadsheet_json)
+        self.assertEqual(['_unknown_1', '_unknown_2'], list(spreadsheet_json['users'].keys()))
+
     @patch('hca_ingest.importer.importer.WorksheetImporter')
     def test_do_import_with_module_tab(self, worksheet_importer_constructor):
         # given:
@@ -336,3 +380,15 @@ class WorkbookImporterTest(TestCase):
         self.assertEqual([], errors)
         self.assertEqual(len(spreadsheet_json.get('project', {}).keys()), 1)
         self.assertTrue(spreadsheet_json['project']['project-uuid']['is_linking_reference'])
+
+
+class _FakeRowTemplate:
+    def __init__(self, domain_type):
+        self.domain_type = domain_type
+
+    def do_import(self, row, is_module=False):
+        name, object_id = row.values
+        errors = [] if name else [{'type': 'MissingName', 'detail': 'The name is missing.'}]
+        metadata = MetadataEntity(concrete_type=self.domain_type, domain_type=self.domain_type, object_id=object_id,
+                                  content={'name': name}, row=row)
+        return metadata, errors
@@ -1,5 +1,5 @@
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from openpyxl import Workbook
 
@@ -46,6 +46,30 @@ class WorksheetImporterTest(TestCase):
         # and: domain and concrete type should be set
         pass
 
+    @patch('hca_ingest.importer.spreadsheet.ingest_worksheet.MAX_ROW_LIMIT', 1)
+    def test_do_import__given_rows_exceed_limit__then_only_return_limit_error(self):
+        # given:
+        row_template = MagicMock('row_template')
+        row_error = {'type': 'RowError', 'detail': 'invalid value'}
+        row_template.do_import = MagicMock(return_value=(MetadataEntity(object_id='profile_1'), [row_error]))
+        mock_template_manager = MagicMock('template_manager')
+        mock_template_manager.create_row_template = MagicMock(return_value=row_template)
+
+        # and:
+        workbook = Workbook()
+        worksheet = workbook.create_sheet('user_profile')
+        worksheet['A4'] = 'header'
+        worksheet['A6'] = 'john'
+        worksheet['A7'] = 'emma'
+
+        # when:
+        worksheet_importer = WorksheetImporter(mock_template_manager)
+        profiles, errors = worksheet_importer.do_import(IngestWorksheet(worksheet))
+
+        # then:
+        self.assertEqual(profiles, [])
+        self.assertEqual([error['type'] for error in errors], ['MaxRowExceededError'])
+
     def test_do_import_no_id_metadata(self):
         # given:
         row_template = MagicMock('row_template')
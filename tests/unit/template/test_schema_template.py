@@ -25,7 +25,7 @@ class TestSchemaTemplate(unittest.TestCase):
                                     "may be populated"):
             SchemaTemplate(metadata_schema_urls=[sample_schema_url], json_schema_docs=[sample_schema_json])
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test__creation_of_template_with_json__success(self, property_migrations_request_mock):
         property_migrations_request_mock.return_value = Mock(ok=True)
         property_migrations_request_mock.return_value.json.return_value = {'migrations': []}
@@ -70,7 +70,7 @@ class TestSchemaTemplate(unittest.TestCase):
         self.assertEqual(schema_template.labels, expected_schema_labels)
         self.assertEqual(schema_template.tabs, expected_schema_tabs)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test__get_list_of_schema_spreadsheet_representations__success(self, property_migrations_request_mock):
         property_migrations_request_mock.return_value = Mock(ok=True)
         property_migrations_request_mock.return_value.json.return_value = {'migrations': []}
@@ -105,7 +105,7 @@ class TestSchemaTemplate(unittest.TestCase):
         self.assertEqual(schema_template.get_list_of_schema_spreadsheet_representations(),
                          expected_schema_spreadsheet_tab_representations)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test__lookup_property_in_schema__success(self, property_migrations_request_mock):
         property_migrations_request_mock.return_value = Mock(ok=True)
         property_migrations_request_mock.return_value.json.return_value = {'migrations': []}
@@ -142,7 +142,7 @@ class TestSchemaTemplate(unittest.TestCase):
         self.assertEqual(schema_template.lookup_property_attributes_in_metadata("timecourse.unit"),
                          expected_property_value.get_dictionary_representation_of_descriptor())
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test__lookup_unknown_property_in_schema__throws_exception(self, property_migrations_request_mock):
         property_migrations_request_mock.return_value = Mock(ok=True)
         property_migrations_request_mock.return_value.json.return_value = {'migrations': []}
@@ -169,6 +169,43 @@ class TestSchemaTemplate(unittest.TestCase):
         with self.assertRaisesRegex(UnknownKeySchemaException, "Cannot find key"):
             schema_template.lookup_property_attributes_in_metadata("timecourse.unit")
 
+    @patch("requests.Session.get")
+    def test__find_property_in_template__looks_up_schemas_once_per_key(self, property_migrations_request_mock):
+        property_migrations_request_mock.return_value = Mock(ok=True)
+        property_migrations_request_mock.return_value.json.return_value = {'migrations': []}
+
+        sample_metadata_schema_json = {
+            "$schema": "http://json-schema.org/draft-07/schema#",
+            "$id": "https://schema.humancellatlas.org/module/biomaterial/2.0.2/timecourse",
+            "description": "Information relating to a timecourse.",
+            "type": "object",
+            "properties": {
+                "unit": {
+                    "description": "The unit in which the Timecourse value is expressed.",
+                    "type": "object",
+                    "user_friendly": "Timecourse unit"
+                },
+            }
+        }
+
+        schema_template = SchemaTemplate(json_schema_docs=[sample_metadata_schema_json])
+        expected_unit_spec = schema_template.lookup_property_attributes_in_metadata("timecourse.unit")
+
+        with patch.object(schema_template, '_lookup_fully_qualified_key_path_in_dictionary',
+                          wraps=schema_template._lookup_fully_qualified_key_path_in_dictionary) as key_path_lookup:
+            lookup_counts = []
+            for _ in range(3):
+                # unit is found in the metadata, uuid in the custom properties and value in neither
+                self.assertEqual(schema_template.find_property_in_template("timecourse.unit"), expected_unit_spec)
+                self.assertTrue(schema_template.find_property_in_template("timecourse.uuid")['external_reference'])
+                self.assertIsNone(schema_template.find_property_in_template("timecourse.value"))
+                with self.assertRaisesRegex(UnknownKeySchemaException, "Cannot find key"):
+                    schema_template.lookup_property_from_template("timecourse.value")
+                lookup_counts.append(key_path_lookup.call_count)
+
+        self.assertGreater(lookup_counts[0], 0)
+        self.assertEqual(lookup_counts, [lookup_counts[0]] * 3)
+
     def test__lookup_next_latest_key_migration_simple_migration__success(self):
         sample_metadata_schema_json = {
             "$schema": "http://json-schema.org/draft-07/schema#",
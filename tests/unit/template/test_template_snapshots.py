@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+import requests_mock
+
+from hca_ingest.template.schema_template import SchemaTemplate
+from hca_ingest.template.template_snapshots import TemplateSnapshots
+from hca_ingest.utils.schema_store import SchemaStore
+
+DONOR_URL = 'https://schema.humancellatlas.org/type/biomaterial/15.5.0/donor_organism'
+CORE_URL = 'https://schema.humancellatlas.org/core/biomaterial/2.1.0/biomaterial_core'
+LATEST_DONOR_URL = 'https://schema.humancellatlas.org/type/biomaterial/latest/donor_organism'
+
+
+class TestTemplateSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.snapshots = TemplateSnapshots(self.temp_dir.name)
+        self.property_migrations = [{
+            'source_schema': 'donor_organism',
+            'property': 'is_living',
+            'target_schema': 'donor_organism',
+            'replaced_by': 'is_alive',
+            'effective_from': '16.0.0'
+        }]
+        self.donor = {
+            '$id': DONOR_URL,
+            'name': 'donor_organism',
+            'type': 'object',
+            'properties': {
+                'biomaterial_core': {'$ref': CORE_URL, 'user_friendly': 'Biomaterial core'},
+                'is_living': {'type': 'string', 'user_friendly': 'Is living?'}
+            }
+        }
+        self.core = {
+            '$id': CORE_URL,
+            'name': 'biomaterial_core',
+            'type': 'object',
+            'properties': {
+                'biomaterial_name': {'type': 'string', 'user_friendly': 'Biomaterial name'},
+                'biomaterial_description': {'type': 'string', 'user_friendly': 'Biomaterial description'}
+            }
+        }
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def create_template(self, schema_url):
+        return SchemaTemplate(metadata_schema_urls=[schema_url], property_migrations=self.property_migrations,
+                              schema_store=SchemaStore(), template_snapshots=self.snapshots)
+
+    def test_template__given_snapshot__then_load_without_fetching_schemas(self):
+        # given
+        with requests_mock.Mocker() as mock:
+            mock.get(DONOR_URL, json=self.donor)
+            mock.get(CORE_URL, json=self.core)
+            built = self.create_template(DONOR_URL)
+
+        # when
+        with requests_mock.Mocker() as mock:
+            loaded = self.create_template(DONOR_URL)
+
+        # then
+        self.assertEqual(mock.call_count, 0)
+        for attribute in ['json_schemas', 'meta_data_properties', 'custom_properties', 'labels', 'tabs', 'migrations']:
+            self.assertEqual(getattr(loaded, attribute), getattr(built, attribute))
+        self.assertEqual(loaded.lookup_metadata_schema_name_given_title('Donor organism'), 'donor_organism')
+        self.assertEqual(loaded.lookup_next_latest_key_migration('donor_organism.is_living'), 'donor_organism.is_alive')
+
+    def test_template__given_other_migrations__then_do_not_use_snapshot(self):
+        # given
+        with requests_mock.Mocker() as mock:
+            mock.get(DONOR_URL, json=self.donor)
+            mock.get(CORE_URL, json=self.core)
+            self.create_template(DONOR_URL)
+            self.property_migrations[0]['replaced_by'] = 'is_dead'
+
+            # when
+            template = self.create_template(DONOR_URL)
+
+        # then
+        self.assertEqual([request.url for request in mock.request_history].count(DONOR_URL), 2)
+        self.assertEqual(template.lookup_next_latest_key_migration('donor_organism.is_living'), 'donor_organism.is_dead')
+        self.assertEqual(len(os.listdir(self.temp_dir.name)), 2)
+
+    def test_template__given_latest_schema_url__then_do_not_save_snapshot(self):
+        # given
+        with requests_mock.Mocker() as mock:
+            mock.get(LATEST_DONOR_URL, json=self.donor)
+            mock.get(CORE_URL, json=self.core)
+
+            # when
+            self.create_template(LATEST_DONOR_URL)
+
+        # then
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
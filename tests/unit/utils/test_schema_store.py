@@ -0,0 +1,93 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest import TestCase
+
+import jsonref
+import requests
+import requests_mock
+
+from hca_ingest.utils.schema_store import SchemaStore, SchemaStoreLoader
+
+VERSIONED_URL = 'https://schema.humancellatlas.org/type/project/17.0.0/project'
+LATEST_URL = 'https://schema.humancellatlas.org/type/project/latest/project'
+
+
+@requests_mock.Mocker()
+class SchemaStoreTest(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get__given_versioned_url__then_fetch_once_for_all_stores(self, mock):
+        # given
+        mock.get(VERSIONED_URL, json={'title': 'project'})
+
+        # when
+        first = SchemaStore(self.cache_dir).get(VERSIONED_URL)
+        second = SchemaStore(self.cache_dir, ttl=timedelta(0)).get(VERSIONED_URL)
+
+        # then
+        self.assertEqual(first, {'title': 'project'})
+        self.assertEqual(second, first)
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual([name for name in os.listdir(self.cache_dir) if name.endswith('.tmp')], [])
+
+    def test_get__given_latest_url__then_fetch_again_after_ttl(self, mock):
+        # given
+        mock.get(LATEST_URL, [{'json': {'version': 1}}, {'json': {'version': 2}}])
+
+        # when
+        first = SchemaStore(self.cache_dir).get(LATEST_URL)
+        cached = SchemaStore(self.cache_dir).get(LATEST_URL)
+        expired = SchemaStore(self.cache_dir, ttl=timedelta(0)).get(LATEST_URL)
+
+        # then
+        self.assertEqual((first, cached, expired), ({'version': 1}, {'version': 1}, {'version': 2}))
+        self.assertEqual(mock.call_count, 2)
+
+    def test_get__given_no_cache_dir__then_always_fetch(self, mock):
+        # given
+        mock.get(VERSIONED_URL, json={'title': 'project'})
+        schema_store = SchemaStore()
+
+        # when
+        schema_store.get(VERSIONED_URL)
+        schema_store.get(VERSIONED_URL)
+
+        # then
+        self.assertEqual(mock.call_count, 2)
+
+    def test_get__fetches_with_timeout(self, mock):
+        # given
+        mock.get(VERSIONED_URL, json={'title': 'project'})
+
+        # when
+        SchemaStore(timeout=5).get(VERSIONED_URL)
+
+        # then
+        self.assertEqual(mock.last_request.timeout, 5)
+
+    def test_get__given_error__then_raise_and_do_not_store(self, mock):
+        # given
+        mock.get(VERSIONED_URL, status_code=404)
+
+        # expect
+        with self.assertRaises(requests.HTTPError):
+            SchemaStore(self.cache_dir).get(VERSIONED_URL)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_loader__dereferences_through_store(self, mock):
+        # given
+        mock.get(VERSIONED_URL, json={'title': 'project'})
+        loader = SchemaStoreLoader(SchemaStore(self.cache_dir))
+
+        # when
+        schema = jsonref.loads('{"project": {"$ref": "%s"}}' % VERSIONED_URL, loader=loader)
+
+        # then
+        self.assertEqual(schema['project']['title'], 'project')
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)